@@ -1,7 +1,26 @@
+import collections
+import os
+import sys
+import time
 import tkinter as tk
 from tkinter import messagebox
-import random
-import copy
+
+import sudoku_engine
+import sudoku_engine.journal
+import sudoku_engine.users
+
+GENERATE_SECONDS = 60  # Longest a New Game may search before it gives up
+POLL_MS = 50  # Milliseconds between looks at a worker thread's progress
+
+# How the footer names each phase of a generation in progress
+PHASE_TEXT = {"fill": "filling the grid", "dig": "digging", "grade": "grading", "search": "searching"}
+
+def when_done(window, task, on_done):
+    """Calls on_done(task) from the Tk loop once a Task has finished, looking every POLL_MS"""
+    if task.done():
+        on_done(task)
+    else:
+        window.after(POLL_MS, when_done, window, task, on_done)
 
 class LoginScreen:
     def __init__(self):
@@ -104,17 +123,25 @@ class LoginScreen:
         self.register_label.pack(pady=10)
         self.register_label.bind("<Button-1>", self.show_register)
 
-        # For demonstration, store some dummy users
-        self.users = {
-            "demo": "password123",
-            "test": "test123"
-        }
-
     def login(self):
         username = self.username_entry.get()
         password = self.password_entry.get()
-
-        if username in self.users and self.users[username] == password:
+        # Accounts live in SQLite, SUDOKU_USERS=<path> picks the database
+        path = sudoku_engine.users.default_path()
+
+        def verify(budget):
+            # A connection of the worker's own, as SQLite ties one to its thread; hashing has
+            # no search to charge the budget with
+            with sudoku_engine.users.UserStore(path) as users:
+                return users.verify(username, password)
+
+        # Password hashing takes most of a second, so it runs on a worker thread
+        self.login_button.config(state='disabled', text="Checking...")
+        when_done(self.window, sudoku_engine.Task(verify), self._login_checked)
+
+    def _login_checked(self, task):
+        self.login_button.config(state='normal', text="Login")
+        if task.result():
             messagebox.showinfo("Success", "Login successful!")
             self.window.destroy()  # Close login window
             game = SudokuBoard()  # Start Sudoku game
@@ -286,34 +313,12 @@ class SignupScreen:
             self.confirm_entry.config(show="*")
 
     def validate_username(self, username):
-        import re
-        # Check if username starts with a letter and contains only letters, numbers, or underscore
-        pattern = r'^[a-zA-Z][a-zA-Z0-9_]{3,19}$'
-        return bool(re.match(pattern, username))
+        """Starts with a letter, then letters, numbers or underscores, 4-20 in all"""
+        return sudoku_engine.users.validate_username(username)
 
     def validate_password(self, password):
-        import re
-        # Check length
-        if not (8 <= len(password) <= 30):
-            return False
-
-        # Check for at least one uppercase letter
-        if not re.search(r'[A-Z]', password):
-            return False
-
-        # Check for at least one lowercase letter
-        if not re.search(r'[a-z]', password):
-            return False
-
-        # Check for at least one number
-        if not re.search(r'\d', password):
-            return False
-
-        # Check for at least one special character
-        if not re.search(r'[!@#$%^&*]', password):
-            return False
-
-        return True
+        """8-30 characters with upper and lower case, a number and a special character"""
+        return sudoku_engine.users.validate_password(password)
 
     def signup(self):
         username = self.username_entry.get()
@@ -336,7 +341,24 @@ class SignupScreen:
             messagebox.showerror("Error", "Passwords do not match")
             return
 
-        # Here you would typically save the new user to your database
+        path = sudoku_engine.users.default_path()
+
+        def add_user(budget):
+            with sudoku_engine.users.UserStore(path) as users:
+                users.add_user(username, password)
+
+        # Hashed on a worker thread, as in LoginScreen.login
+        self.signup_button.config(state='disabled', text="Creating...")
+        when_done(self.window, sudoku_engine.Task(add_user), self._signed_up)
+
+    def _signed_up(self, task):
+        self.signup_button.config(state='normal', text="Sign Up")
+        try:
+            task.result()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
         messagebox.showinfo("Success", "Account created successfully!")
         self.window.destroy()
         login = LoginScreen()
@@ -355,7 +377,34 @@ class SudokuBoard:
         self.window = tk.Tk()
         self.window.title("Advanced Sudoku Game")
         self.current_solution = None
-        self.original_numbers = set()
+
+        # Board state lives in the model, widgets are only read for the edited cell;
+        # the view works out which widgets a change must touch
+        self.model = sudoku_engine.BoardModel()
+        self.view = sudoku_engine.BoardView(self.model)
+        # Follows the model between hints, finding the next logical step
+        self.hint_engine = sudoku_engine.HintEngine()
+        # Undo and redo walk the moves one cell at a time; the journal autosaves them off
+        # the Tk thread, to SUDOKU_AUTOSAVE or ~/.sudoku/autosave.journal
+        self.history = sudoku_engine.MoveHistory()
+        self.journal = sudoku_engine.Journal(sudoku_engine.journal.default_path())
+        self.keystroke_latency = collections.deque(maxlen=1000)  # Seconds from key release to colour
+        # A generation running on a worker thread, polled from the Tk loop; None when idle
+        self.task = None
+
+        # SUDOKU_STATS=1 measures every New Game and prints the stats as JSON to stderr
+        self.stats_enabled = bool(os.environ.get('SUDOKU_STATS'))
+        self.last_stats = None
+
+        # Puzzles are generated in the background so "New Game" only pops one;
+        # each comes with the ID that rebuilds it
+        self.puzzle_pool = sudoku_engine.PuzzlePool(generator=sudoku_engine.new_puzzle).start()
+        self.puzzle_cache = sudoku_engine.PuzzleCache()
+
+        # SUDOKU_STORE=<path> serves New Game from a packed store built with
+        # `python -m sudoku_engine <difficulty> <count> --store -o <path>`
+        store_path = os.environ.get('SUDOKU_STORE')
+        self.puzzle_store = sudoku_engine.PuzzleStore(store_path) if store_path else None
 
         # Set window background and style
         self.window.configure(bg='#2C3E50')  # Dark blue-grey background
@@ -380,36 +429,9 @@ class SudokuBoard:
         middle_frame.pack()
         self.main_frame.pack()
 
-        # Create 9x9 grid of entry widgets
+        # Grid of entry widgets, rebuilt when the board size changes
         self.cells = {}
-        for i in range(9):
-            for j in range(9):
-                # Alternate colors for 3x3 boxes
-                if (i//3 + j//3) % 2 == 0:
-                    cell_bg = '#FCF3CF'  # Light yellow
-                else:
-                    cell_bg = '#FFFFFF'  # White
-
-                # Create entry widget with styled border
-                cell = tk.Entry(
-                    self.main_frame,
-                    width=2,
-                    font=('Arial', 20, 'bold'),
-                    justify='center',
-                    bg=cell_bg,
-                    fg='#2C3E50',  # Dark text
-                    relief='solid',
-                    borderwidth=1
-                )
-
-                # Add padding for 3x3 box effect
-                padx = (1, 2) if j % 3 == 2 and j != 8 else 1
-                pady = (1, 2) if i % 3 == 2 and i != 8 else 1
-
-                cell.grid(row=i, column=j, padx=padx, pady=pady, ipady=6)
-                cell.bind('<KeyRelease>', lambda e, i=i, j=j: self.validate_input(e, i, j))
-
-                self.cells[(i, j)] = cell
+        self._build_cells(3)
 
         # Create styled control panel
         self.control_panel = tk.Frame(self.window, bg='#2C3E50')
@@ -439,6 +461,35 @@ class SudokuBoard:
             )
             rb.pack(side=tk.LEFT, padx=5)
 
+        # Quick games are derived from stored puzzles instead of generated
+        self.quick_games = tk.BooleanVar(value=False)
+        quick_check = tk.Checkbutton(
+            self.control_panel,
+            text="Quick",
+            variable=self.quick_games,
+            font=('Arial', 10),
+            fg='#ECF0F1',
+            bg='#2C3E50',
+            selectcolor='#34495E'
+        )
+        quick_check.pack(side=tk.LEFT, padx=5)
+
+        # Board size; 16x16 and 25x25 games are generated on the spot
+        self.box_size = tk.IntVar(value=3)
+        for text, box_size in (("9x9", 3), ("16x16", 4), ("25x25", 5)):
+            rb = tk.Radiobutton(
+                self.control_panel,
+                text=text,
+                variable=self.box_size,
+                value=box_size,
+                command=self.change_board_size,
+                font=('Arial', 10),
+                fg='#ECF0F1',
+                bg='#2C3E50',
+                selectcolor='#34495E'
+            )
+            rb.pack(side=tk.LEFT, padx=5)
+
         # Create styled buttons
         self.buttons_frame = tk.Frame(self.window, bg='#2C3E50')
         self.buttons_frame.pack(pady=10)
@@ -456,9 +507,12 @@ class SudokuBoard:
             ("New Game", self.generate_new_game, '#27AE60'),  # Green
             ("Check Solution", self.check_solution, '#3498DB'),  # Blue
             ("Hint", self.give_hint, '#E67E22'),  # Orange
+            ("Undo", self.undo, '#7F8C8D'),  # Grey
+            ("Redo", self.redo, '#7F8C8D'),
             ("Clear Board", self.clear_board, '#E74C3C')  # Red
         ]
 
+        self.buttons = {}
         for text, command, color in button_configs:
             btn = tk.Button(
                 self.buttons_frame,
@@ -471,158 +525,324 @@ class SudokuBoard:
                 **button_style
             )
             btn.pack(side=tk.LEFT, padx=5)
+            self.buttons[text] = btn
+
+        # Puzzle ID of the current game; type one and press Enter to play it
+        id_frame = tk.Frame(self.window, bg='#2C3E50')
+        id_frame.pack()
+        id_label = tk.Label(
+            id_frame,
+            text="Puzzle ID:",
+            font=('Arial', 10, 'bold'),
+            fg='#ECF0F1',
+            bg='#2C3E50'
+        )
+        id_label.pack(side=tk.LEFT, padx=5)
+        self.puzzle_id = tk.StringVar()
+        id_entry = tk.Entry(
+            id_frame,
+            textvariable=self.puzzle_id,
+            width=14,
+            font=('Courier', 10),
+            justify='center'
+        )
+        id_entry.pack(side=tk.LEFT, padx=5)
+        id_entry.bind('<Return>', lambda e: self.open_puzzle_id())
 
-        # Add a decorative footer
+        # Add a decorative footer, which also explains the last hint
+        self.footer_text = tk.StringVar(value="Good Luck!")
         footer = tk.Label(
             self.window,
-            text="Good Luck!",
+            textvariable=self.footer_text,
             font=('Arial', 10, 'italic'),
             fg='#ECF0F1',
             bg='#2C3E50',
-            pady=5
+            pady=5,
+            wraplength=450
         )
         footer.pack()
 
+        self.window.bind('<Control-z>', lambda e: self.undo())
+        self.window.bind('<Control-y>', lambda e: self.redo())
+        self.window.bind('<Escape>', lambda e: self.cancel_task())
+
         # Configure window
         self.window.resizable(False, False)
+
+        self._resume()
+
+    def _build_cells(self, box_size):
+        """Replaces the entry widgets with a grid for boxes of box_size x box_size"""
+        for cell in self.cells.values():
+            cell.destroy()
+        self.cells = {}
+        size = box_size * box_size
+        # Smaller cells for the larger boards so they fit on screen
+        font_size, ipady = {3: (20, 6), 4: (12, 2), 5: (9, 0)}[box_size]
+        for i in range(size):
+            for j in range(size):
+                # Start in the state the view wants, alternating box colours included
+                text, fg, bg = self.view.cell(i, j)
+
+                # Create entry widget with styled border
+                cell = tk.Entry(
+                    self.main_frame,
+                    width=2,
+                    font=('Arial', font_size, 'bold'),
+                    justify='center',
+                    bg=bg,
+                    fg=fg,
+                    relief='solid',
+                    borderwidth=1
+                )
+                cell.insert(0, text)
+
+                # Add padding for box effect
+                padx = (1, 2) if j % box_size == box_size - 1 and j != size - 1 else 1
+                pady = (1, 2) if i % box_size == box_size - 1 and i != size - 1 else 1
+
+                cell.grid(row=i, column=j, padx=padx, pady=pady, ipady=ipady)
+                cell.bind('<KeyRelease>', lambda e, i=i, j=j: self.validate_input(e, i, j))
+
+                self.cells[(i, j)] = cell
+        self.view.synced()
+
+    def render(self, positions=None):
+        """Applies the view's changes to the widgets in one pass, touching changed cells only
+
+        Returns the number of widget calls made.
+        """
+        calls = 0
+        for pos, (old_text, old_fg, old_bg), (text, fg, bg) in self.view.changes(positions):
+            cell = self.cells[pos]
+            if text != old_text:
+                if old_text:
+                    cell.delete(0, tk.END)
+                    calls += 1
+                if text:
+                    cell.insert(0, text)
+                    calls += 1
+            options = {}
+            if fg != old_fg:
+                options['fg'] = fg
+            if bg != old_bg:
+                options['bg'] = bg
+            if options:
+                cell.config(**options)
+                calls += 1
+        return calls
+
+    def change_board_size(self):
+        """Switches to an empty board of the selected size"""
+        box_size = self.box_size.get()
+        if box_size == self.model.box_size:
+            return
+        self.cancel_task()  # A puzzle of the old size is no use now
+        self.current_solution = None
+        self.puzzle_id.set('')
+        self.history.clear()
+        self.journal.discard()  # The journal holds 9x9 games only, and this one is given up
+        self.model = sudoku_engine.BoardModel(box_size=box_size)
+        self.view = sudoku_engine.BoardView(self.model)
+        self._build_cells(box_size)
+
     def validate_input(self, event, i, j):
             """Validates user input in cells"""
+            started = time.perf_counter()
             cell = self.cells[(i, j)]
             value = cell.get()
 
-            # Clear invalid inputs
-            if value and not value.isdigit():
-                cell.delete(0, tk.END)
-                return
-
-            if len(value) > 1:
-                cell.delete(1, tk.END)
-                value = value[0]
-
-            if value and (i, j) not in self.original_numbers:
-                if not self.is_valid_move(i, j, int(value)):
-                    cell.config(fg='red')
-                else:
-                    cell.config(fg='blue')
+            # Invalid inputs are cleared and extra characters dropped by the render:
+            # digits, and letters for 10 and up on larger boards, are valid
+            num = sudoku_engine.cell_value(value[0], self.model.size) if value else 0
+            self.view.typed(i, j, value)
+            old = self.model.get(i, j)
+            if old != (num or 0):
+                self._log(b"M", self.history.record([sudoku_engine.Move(i * self.model.size + j, old, num or 0,
+                                                                        time.time())]))
+
+            # Redraw the edited cell and any cell whose conflict state changed
+            affected = self.model.set(i, j, num or 0)
+            affected.add((i, j))
+            self.render(affected)
+            self.keystroke_latency.append(time.perf_counter() - started)
 
     def is_valid_move(self, row, col, num):
         """Checks if a number placement is valid"""
-        # Check row
-        for j in range(9):
-            if j != col:
-                cell_value = self.cells[(row, j)].get()
-                if cell_value and int(cell_value) == num:
-                    return False
-
-        # Check column
-        for i in range(9):
-            if i != row:
-                cell_value = self.cells[(i, col)].get()
-                if cell_value and int(cell_value) == num:
-                    return False
-
-        # Check 3x3 box
-        box_row, box_col = 3 * (row // 3), 3 * (col // 3)
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if (i, j) != (row, col):
-                    cell_value = self.cells[(i, j)].get()
-                    if cell_value and int(cell_value) == num:
-                        return False
-
-        return True
+        return self.model.is_valid_move(row, col, num)
     def generate_new_game(self):
-        """Generates a new Sudoku puzzle"""
-        self.clear_board()
-        self.original_numbers.clear()
-
-        # Create a solved board
-        self.current_solution = self.generate_solved_board()
-        puzzle = copy.deepcopy(self.current_solution)
-
-        # Remove numbers based on difficulty
-        cells_to_keep = {
-            "easy": 50,
-            "medium": 40,
-            "hard": 30
-        }[self.difficulty.get()]
-
-        # Randomly remove numbers
-        cells_to_remove = 81 - cells_to_keep
-        positions = [(i, j) for i in range(9) for j in range(9)]
-        random.shuffle(positions)
-
-        for i, j in positions[:cells_to_remove]:
-            puzzle[i][j] = 0
-
-        # Fill the board
-        for i in range(9):
-            for j in range(9):
-                if puzzle[i][j] != 0:
-                    self.cells[(i, j)].insert(0, str(puzzle[i][j]))
-                    self.cells[(i, j)].config(fg='black')
-                    self.original_numbers.add((i, j))
+        """Starts a new Sudoku puzzle; pressed while one is being generated, cancels it instead
+
+        Puzzles that must be generated on the spot are made on a worker
+        thread, so the window keeps responding.
+        """
+        if self.task is not None:
+            self.cancel_task()
+            return
+        stats = sudoku_engine.EngineStats() if self.stats_enabled else None
+        difficulty = self.difficulty.get()
+        box_size = self.box_size.get()
+        if box_size != 3:
+            # Pools, stores, quick games and IDs are all 9x9
+            label = "%dx%d" % (box_size * box_size, box_size * box_size)
+            self._run_task(label, lambda pair: self._show_generated(pair + ('',), stats), sudoku_engine.generate,
+                           difficulty, stats=stats, box_size=box_size)
+            return
+        elif self.quick_games.get():
+            puzzle, self.current_solution = sudoku_engine.derive(difficulty)
+            puzzle_id = ''  # Derived puzzles cannot be rebuilt from an ID
+        elif self.puzzle_store is not None and self.puzzle_store.count_of(difficulty):
+            puzzle, self.current_solution = self.puzzle_store.random(difficulty)
+            puzzle_id = ''  # Stored puzzles carry no seed
+        elif stats is not None:
+            # Generate on the spot so this game's fill, dig and uniqueness phases are measured
+            puzzle_id = sudoku_engine.new_puzzle_id(difficulty)
+            _, _, seed = sudoku_engine.parse_puzzle_id(puzzle_id)
+            self._run_task(difficulty, lambda pair: self._show_generated(pair + (puzzle_id,), stats),
+                           sudoku_engine.generate, difficulty, seed, stats=stats)
+            return
+        else:
+            triple = self.puzzle_pool.get(difficulty, block=False)
+            if triple is None:
+                # The pool ran dry; generate this one aside rather than wait for the refill
+                self._run_task(difficulty, self._show_generated, sudoku_engine.new_puzzle, difficulty)
+                return
+            puzzle, self.current_solution, puzzle_id = triple
+        self._show_puzzle(puzzle, puzzle_id, stats)
+
+    def _show_generated(self, triple, stats=None):
+        """Shows a (puzzle, solution, puzzle_id) triple a worker thread generated"""
+        puzzle, self.current_solution, puzzle_id = triple
+        self._show_puzzle(puzzle, puzzle_id, stats)
+
+    def _run_task(self, label, on_done, function, *args, fallback=True, **kwargs):
+        """Runs function(*args, **kwargs) on a worker thread under GENERATE_SECONDS, passing its result to on_done
+
+        Any generation already running is cancelled. Past the deadline a
+        9x9 game falls back to a derived puzzle, unless fallback is False.
+        """
+        self.cancel_task()
+        task = self.task = sudoku_engine.Task(function, *args, seconds=GENERATE_SECONDS, **kwargs)
+        self.buttons["New Game"].config(text="Cancel")
+        self._poll_task(task, label, on_done, fallback)
+
+    def _poll_task(self, task, label, on_done, fallback):
+        """Shows the task's progress until it ends, then hands on its result"""
+        if task is not self.task:
+            return  # Cancelled and replaced; the newer task reports for itself
+        if not task.done():
+            progress = task.progress()
+            text = "Generating %s puzzle: %s" % (label, PHASE_TEXT[progress.phase])
+            if progress.detail is not None:
+                text += ", %d clues left" % progress.detail
+            self.footer_text.set(text + " (%.1f s, Esc cancels)" % progress.seconds)
+            self.window.after(POLL_MS, self._poll_task, task, label, on_done, fallback)
+            return
+
+        self.task = None
+        self.buttons["New Game"].config(text="New Game")
+        try:
+            result = task.result()
+        except sudoku_engine.BudgetExceeded as e:
+            if e.reason == "cancelled":
+                self.footer_text.set("Generation cancelled")
+            elif fallback and self.model.box_size == 3:
+                # A bad streak of random grids: play a derived puzzle rather than wait longer
+                puzzle, self.current_solution = sudoku_engine.derive(self.difficulty.get())
+                self._show_puzzle(puzzle, '')
+            else:
+                self.footer_text.set("Gave up after %g s, press New Game to try another" % GENERATE_SECONDS)
+            return
+        except ValueError as e:
+            # A puzzle ID from another generator version
+            messagebox.showinfo("Puzzle ID", str(e))
+            return
+        if task.token.is_set():
+            # Cancelled just as it finished; the board may have changed size since
+            self.footer_text.set("Generation cancelled")
+            return
+        on_done(result)
+
+    def cancel_task(self):
+        """Stops the generation in progress, if any; the next poll reports it"""
+        if self.task is not None:
+            self.task.cancel()
+
+    def open_puzzle_id(self):
+        """Starts the game a typed puzzle ID stands for; an ID not in the cache is generated on a worker thread"""
+        puzzle_id = self.puzzle_id.get()
+        try:
+            pair = self.puzzle_cache.get(puzzle_id, block=False)
+        except ValueError as e:
+            messagebox.showinfo("Puzzle ID", str(e))
+            return
+        if pair is None:
+            # The ID is rebuilt exactly or not at all, so no derived puzzle stands in past the deadline
+            self._run_task(puzzle_id, lambda pair: self._show_puzzle_id(puzzle_id, pair), self.puzzle_cache.get,
+                           puzzle_id, fallback=False)
+            return
+        self.cancel_task()
+        self._show_puzzle_id(puzzle_id, pair)
+
+    def _show_puzzle_id(self, puzzle_id, pair):
+        """Shows the (puzzle, solution) pair an ID stands for, switching to 9x9 if need be"""
+        if self.box_size.get() != 3:
+            self.box_size.set(3)
+            self.change_board_size()
+        puzzle, self.current_solution = pair
+        self.difficulty.set(sudoku_engine.parse_puzzle_id(puzzle_id)[1])
+        self._show_puzzle(puzzle, sudoku_engine.canonical_puzzle_id(puzzle_id))
+
+    def _show_puzzle(self, puzzle, puzzle_id, stats=None):
+        """Puts a new puzzle's givens on the board"""
+        self.model.load(puzzle)
+        self.view.clear_marks()
+        self.puzzle_id.set(puzzle_id)
+        self.footer_text.set("Good Luck!")
+        self.history.clear()
+        if self.model.box_size == 3:
+            self.journal.start_game(self.difficulty.get(), puzzle, self.current_solution, puzzle_id)
+        else:
+            self.journal.discard()
+
+        # Only cells that differ from the last game are redrawn
+        with sudoku_engine.timed(stats, "render"):
+            calls = self.render()
+            if stats is not None:
+                stats.calls["render_widget_calls"] += calls
+                self.window.update_idletasks()  # Count the redraw too
+
+        if stats is not None:
+            self.last_stats = stats
+            print(stats.to_json(), file=sys.stderr)
     def generate_solved_board(self):
         """Generates a solved Sudoku board"""
-        board = [[0]*9 for _ in range(9)]
-        self.solve_board(board)
-        return board
-
-    def solve_board(self, board):
-        """Solves the Sudoku board using backtracking"""
-        empty = self.find_empty(board)
-        if not empty:
-            return True
-
-        row, col = empty
-        for num in random.sample(range(1, 10), 9):
-            if self.is_valid(board, row, col, num):
-                board[row][col] = num
-                if self.solve_board(board):
-                    return True
-                board[row][col] = 0
-
-        return False
-
-    def find_empty(self, board):
+        return sudoku_engine.generate_solved_board()
+
+    def solve_board(self, board, stats=None, budget=None):
+        """Returns the solved board as a Grid, or None if it has no solution
+
+        Raises BudgetExceeded once `budget` runs out; run it through a Task
+        to keep it off the Tk thread.
+        """
+        return sudoku_engine.solve_board(board, stats=stats, budget=budget)
+
+    def find_empty(self, board, stats=None):
         """Finds an empty cell in the board"""
-        for i in range(9):
-            for j in range(9):
-                if board[i][j] == 0:
-                    return (i, j)
-        return None
-    def is_valid(self, board, row, col, num):
+        return sudoku_engine.find_empty(board, stats)
+    def is_valid(self, board, row, col, num, stats=None):
         """Checks if a number is valid in the board"""
-        # Check row
-        for j in range(9):
-            if board[row][j] == num and j != col:
-                return False
-
-        # Check column
-        for i in range(9):
-            if board[i][col] == num and i != row:
-                return False
-
-        # Check 3x3 box
-        box_row, box_col = 3 * (row // 3), 3 * (col // 3)
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if board[i][j] == num and (i, j) != (row, col):
-                    return False
-
-        return True
+        return sudoku_engine.is_valid(board, row, col, num, stats)
     
     def check_solution(self):
         """Checks if the current board state is correct"""
-        for i in range(9):
-            for j in range(9):
-                value = self.cells[(i, j)].get()
-                if not value:
-                    messagebox.showinfo("Incomplete", "Please fill in all cells!")
-                    return
-                if not self.is_valid_move(i, j, int(value)):
-                    messagebox.showinfo("Incorrect", "There are some errors in your solution.")
-                    return
+        if self.model.filled < len(self.model.cells):
+            messagebox.showinfo("Incomplete", "Please fill in all cells!")
+            return
+        if self.model.conflicts:
+            messagebox.showinfo("Incorrect", "There are some errors in your solution.")
+            return
+        self.journal.discard()  # Nothing left to resume
         messagebox.showinfo("Congratulations!", "You solved the puzzle correctly!")
     def give_hint(self):
 
@@ -643,102 +863,154 @@ class SudokuBoard:
                 f"Maximum hints ({current_limit}) reached for {self.difficulty.get()} difficulty!")
             return
 
-        # Collect and analyze empty cells
-        empty_cells = []
-        cell_scores = {}
-
-        for i in range(9):
-            for j in range(9):
-                if not self.cells[(i, j)].get():
-                    empty_cells.append((i, j))
-                    # Calculate complexity score for this cell
-                    score = self._calculate_hint_score(i, j)
-                    cell_scores[(i, j)] = score
+        # The next logical step, working through eliminations to the digit they lead to
+        engine = self.hint_engine
+        engine.sync(self.model.cells)
+        steps = []
+        hint = engine.next_hint()
+        while hint is not None and hint.placement is None and hint.eliminations:
+            engine.apply(hint)
+            steps.append(hint)
+            hint = engine.next_hint()
+        if hint is not None and hint.placement is not None:
+            row, col, num = hint.placement
+            # A wrong digit on the board can make a wrong deduction look logical
+            if num == self.current_solution[row][col]:
+                self.footer_text.set("; ".join(sudoku_engine.describe_hint(step) for step in steps + [hint]))
+                reasons = {cell for step in steps + [hint] for cell in step.cells}
+                self._apply_hint_effect(row, col, reasons)
+                self.hints_used += 1
+                return
 
-        if not empty_cells:
+        # Nothing these techniques can deduce: reveal a cell chosen by score
+        cell_scores = sudoku_engine.hint_scores(self.model.grid())
+        if not cell_scores:
             messagebox.showinfo("No Hints", "No empty cells to hint!")
             return
 
         # Select cell based on difficulty and scores
-        selected_cell = self._select_hint_cell(empty_cells, cell_scores)
+        selected_cell = self._select_hint_cell(list(cell_scores), cell_scores)
         if selected_cell:
             row, col = selected_cell
+            self.footer_text.set("No logical step found, revealing r%dc%d" % (row + 1, col + 1))
             self._apply_hint_effect(row, col)
             self.hints_used += 1
 
     def _calculate_hint_score(self, row, col):
         """Calculate the strategic importance of a cell for hinting"""
-        score = 0
-
-        # Count filled neighbors
-        filled_neighbors = 0
-        for i in range(9):
-            if self.cells[(row, i)].get():  # Row check
-                filled_neighbors += 1
-            if self.cells[(i, col)].get():  # Column check
-                filled_neighbors += 1
-
-        # Check 3x3 box
-        box_row, box_col = 3 * (row // 3), 3 * (col // 3)
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if self.cells[(i, j)].get():
-                    filled_neighbors += 1
-
-        # Calculate positional weight
-        center_distance = abs(row - 4) + abs(col - 4)
-        positional_weight = 9 - center_distance  # Prefer center cells
-
-        # Calculate final score
-        score = (filled_neighbors * 2) + positional_weight
-        return score
+        return sudoku_engine.hint_score(self.model.grid(), row, col)
 
     def _select_hint_cell(self, empty_cells, cell_scores):
         """Select appropriate cell based on difficulty and scores"""
         if not empty_cells:
             return None
-
-        sorted_cells = sorted(cell_scores.items(), key=lambda x: x[1])
-        difficulty = self.difficulty.get()
-
-        if difficulty == 'easy':
-            # Choose easiest cell (highest score)
-            return sorted_cells[-1][0]
-        elif difficulty == 'hard':
-            # Choose harder cell (lower score)
-            return sorted_cells[0][0]
-        else:  # medium
-            # Choose medium difficulty cell
-            mid_index = len(sorted_cells) // 2
-            return sorted_cells[mid_index][0]
-
-    def _apply_hint_effect(self, row, col):
-        """Apply visual feedback for the hint"""
-        cell = self.cells[(row, col)]
-        value = str(self.current_solution[row][col])
-
-        # Animated hint effect
-        original_bg = cell['bg']
-
-        # Flash effect
-        def flash_sequence():
-            cell.config(bg='yellow')
-            self.window.after(200, lambda: cell.config(bg='white'))
-            self.window.after(400, lambda: cell.config(bg='yellow'))
-            self.window.after(600, lambda: cell.config(bg=original_bg))
-            self.window.after(800, lambda: cell.insert(0, value))
-            self.window.after(800, lambda: cell.config(fg='green'))
-
-        flash_sequence()
+        return sudoku_engine.select_hint_cell(cell_scores, self.difficulty.get())
+
+    def _apply_hint_effect(self, row, col, reasons=()):
+        """Apply visual feedback for the hint, tinting the cells the deduction rests on until it is revealed"""
+        pos = (row, col)
+        num = self.current_solution[row][col]
+        reasons = set(reasons) - {pos}
+
+        def highlight(bg):
+            if bg is None:
+                self.view.highlights.pop(pos, None)
+            else:
+                self.view.highlights[pos] = bg
+            self.render([pos])
+
+        def reveal():
+            for cell in reasons:
+                self.view.highlights.pop(cell, None)
+            self.view.hinted.add(pos)
+            old = self.model.get(row, col)
+            if old != num:
+                self._log(b"H", self.history.record([sudoku_engine.Move(row * self.model.size + col, old, num,
+                                                                        time.time(), hinted=True)]))
+            self.render(self.model.set(row, col, num) | {pos} | reasons)
+
+        for cell in reasons:
+            self.view.highlights[cell] = '#D6EAF8'  # Light blue
+        self.render(reasons)
+
+        # Flash effect, then the digit appears
+        highlight('yellow')
+        self.window.after(200, lambda: highlight('white'))
+        self.window.after(400, lambda: highlight('yellow'))
+        self.window.after(600, lambda: highlight(None))
+        self.window.after(800, reveal)
     def clear_board(self):
-        """Clears all cells on the board"""
-        for cell in self.cells.values():
-            cell.delete(0, tk.END)
-            cell.config(fg='black')
+        """Clears the player's digits, givens staying, as one step Undo can take back"""
+        size = self.model.size
+        now = time.time()
+        self._play(b"M", self.history.record(
+            sudoku_engine.Move(index, num, 0, now) for index, num in enumerate(self.model.cells)
+            if num and divmod(index, size) not in self.model.givens))
+
+    def undo(self):
+        """Takes back the last step"""
+        self._play(b"U", self.history.undo())
+
+    def redo(self):
+        """Makes the last undone step again"""
+        self._play(b"R", self.history.redo())
+
+    def _play(self, kind, moves):
+        """Applies a step's moves to the board one cell at a time, redraws what changed and journals them
+
+        A hint's moves unmark the cell when undone and mark it again when redone.
+        """
+        size = self.model.size
+        affected = set()
+        for move in moves:
+            pos = divmod(move.cell, size)
+            if move.hinted:
+                if kind == b"U":
+                    self.view.hinted.discard(pos)
+                else:
+                    self.view.hinted.add(pos)
+                affected.add(pos)
+            affected |= self.model.set(*pos, move.new)
+        self.render(affected)
+        self._log(kind, moves)
+
+    def _log(self, kind, moves):
+        """Queues moves for the autosave journal, which covers 9x9 games only"""
+        if self.current_solution is not None and self.model.box_size == 3:
+            self.journal.log(kind, moves)
+
+    def _resume(self):
+        """Picks up the game the autosave journal holds, where it was left"""
+        try:
+            saved = sudoku_engine.load_game(self.journal.path)
+        except (ValueError, KeyError):
+            return  # Not a journal this version can read
+        if saved is None:
+            return
+        self.current_solution = saved.solution
+        self.difficulty.set(saved.difficulty)
+        self.model.load(saved.puzzle)
+        self.view.clear_marks()
+        for index, (num, given) in enumerate(zip(saved.board.cells, saved.puzzle.cells)):
+            if num != given:
+                self.model.set(index // 9, index % 9, num)
+        self.view.hinted.update(saved.hinted)
+        self.history = saved.history
+        self.puzzle_id.set(saved.puzzle_id)
+        self.render()
+        self.footer_text.set("Resumed your last game")
+        # Carry on in a fresh journal that starts from where the game stands
+        self.journal.start_game(saved.difficulty, saved.puzzle, saved.solution, saved.puzzle_id, saved.board,
+                                saved.hinted)
 
     def run(self):
         """Starts the game"""
         self.window.mainloop()
+        self.cancel_task()
+        self.journal.close()
+        self.puzzle_pool.stop()
+        if self.puzzle_store is not None:
+            self.puzzle_store.close()
 
 # Create and run the game
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+"""Shared correctness checks and timings for every solver backend
+
+Run from the repository root:
+
+    python -m benchmarks.bench_backends [--fills N]
+"""
+import argparse
+import random
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, ROW_MAJOR_SLOW, is_solved, parse
+
+
+def check_backend(backend, fills, seed):
+    """Runs the correctness checks, returns a list of failure messages"""
+    failures = []
+    solver_class = sudoku_engine.get_backend(backend)
+
+    for name, line in PUZZLES.items():
+        puzzle = parse(line)
+        if sudoku_engine.count_solutions(puzzle, backend=backend) != 1:
+            failures.append("%s: expected exactly one solution" % name)
+        if backend == "bitboard" and name in ROW_MAJOR_SLOW:
+            continue
+        solution = sudoku_engine.solve(puzzle, backend=backend)
+        if solution is None or not is_solved(solution):
+            failures.append("%s: no valid solution" % name)
+        elif any(puzzle[i][j] not in (0, solution[i][j]) for i in range(9) for j in range(9)):
+            failures.append("%s: solution overwrites a clue" % name)
+
+    if sudoku_engine.count_solutions(sudoku_engine.Grid(), backend=backend) != 2:
+        failures.append("empty grid: counting should stop at the limit of 2")
+
+    easy = parse(PUZZLES["norvig_easy"])
+    conflicting = easy.with_cell(0, 0, easy[0][2])
+    if sudoku_engine.count_solutions(conflicting, backend=backend) != 0:
+        failures.append("conflicting clues: expected no solutions")
+    if sudoku_engine.solve(conflicting, backend=backend) is not None:
+        failures.append("conflicting clues: solve should fail")
+
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(fills):
+        solver = solver_class(sudoku_engine.Grid())
+        if not solver.solve(rng) or not is_solved(solver.grid()):
+            failures.append("random fill produced an invalid grid")
+            break
+        boards.append(solver.grid())
+    if len(set(boards)) < len(boards) // 2:
+        failures.append("random fills are not random")
+
+    for difficulty in sudoku_engine.CELLS_TO_KEEP:
+        puzzle, solution = sudoku_engine.generate(difficulty, seed, backend=backend)
+        if sudoku_engine.count_solutions(puzzle) != 1:
+            failures.append("generate(%s): puzzle is not unique" % difficulty)
+        if sudoku_engine.solve(puzzle) != solution:
+            failures.append("generate(%s): puzzle does not lead to its solution" % difficulty)
+    return failures
+
+
+def time_backend(backend, fills, seed):
+    """Returns [(case, seconds)] for the backend"""
+    results = []
+    for name, line in PUZZLES.items():
+        start = time.perf_counter()
+        sudoku_engine.count_solutions(parse(line), backend=backend)
+        results.append(("count " + name, time.perf_counter() - start))
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(fills):
+        sudoku_engine.generate_solved_board(rng, backend)
+    results.append(("fill x%d" % fills, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for difficulty in sudoku_engine.CELLS_TO_KEEP:
+        sudoku_engine.generate(difficulty, seed, backend=backend)
+    results.append(("generate x3", time.perf_counter() - start))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fills', type=int, default=50, help="empty grids to fill per backend")
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args(argv)
+
+    failed = False
+    timings = {}
+    for backend in sudoku_engine.BACKENDS:
+        for failure in check_backend(backend, args.fills, args.seed):
+            print("FAIL [%s] %s" % (backend, failure))
+            failed = True
+        timings[backend] = time_backend(backend, args.fills, args.seed)
+
+    backends = list(timings)
+    print("%-24s" % "case" + "".join("%12s" % ("%s s" % b) for b in backends))
+    for row, (case, _) in enumerate(timings[backends[0]]):
+        print("%-24s" % case + "".join("%12.4f" % timings[b][row][1] for b in backends))
+
+    if not failed:
+        print("OK: all backends passed the correctness checks")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
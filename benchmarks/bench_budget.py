@@ -0,0 +1,234 @@
+"""Event-loop stalls while a generation runs on a worker thread and is cancelled, against generating inline
+
+The event loop is Tk's when a display is available, otherwise a stand-in
+that sleeps between callbacks the way Tk waits for events. A heartbeat
+callback is scheduled every --tick-ms, and its lateness is the stall
+the window would show. Meanwhile a Task generates a large puzzle, polled
+for progress every POLL_MS as the game polls it. After --cancel-after
+seconds the Task is cancelled, and the bench records how long it takes
+to stop. The inline run generates a 16x16 puzzle inside one callback, as
+New Game did before, and stalls the loop for the whole generation.
+
+It also checks three other things:
+- the cost of charging a Budget, over 9x9 generation;
+- that a node limit stops every backend at the same node;
+- how far a deadline is overrun.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_budget [--cancel-after S] [--max-stall-ms MS]
+"""
+import argparse
+import heapq
+import itertools
+import sys
+import threading
+import time
+
+import sudoku_engine
+from benchmarks.corpus import percentile
+from sudoku_engine import Budget, BudgetExceeded, Task
+
+POLL_MS = 50  # As Sudoku.POLL_MS
+
+
+class SleepLoop:
+    """An event loop of after() callbacks that sleeps until the next one is due, releasing the GIL as Tk does"""
+
+    name = "stand-in loop"
+
+    def __init__(self):
+        self._queue = []
+        self._order = itertools.count()
+        self._running = False
+
+    def after(self, ms, function, *args):
+        heapq.heappush(self._queue, (time.monotonic() + ms / 1000, next(self._order), function, args))
+
+    def run(self):
+        self._running = True
+        while self._running and self._queue:
+            due, _, function, args = heapq.heappop(self._queue)
+            time.sleep(max(0.0, due - time.monotonic()))
+            function(*args)
+
+    def stop(self):
+        self._running = False
+
+
+class TkLoop:
+    """Tk's own event loop in a hidden window"""
+
+    name = "Tk event loop"
+
+    def __init__(self, root):
+        self.root = root
+
+    def after(self, ms, function, *args):
+        self.root.after(ms, function, *args)
+
+    def run(self):
+        self.root.mainloop()
+
+    def stop(self):
+        self.root.quit()
+
+
+def make_loop():
+    try:
+        import tkinter
+        root = tkinter.Tk()
+    except Exception:  # No tkinter or no display
+        return SleepLoop()
+    root.withdraw()
+    return TkLoop(root)
+
+
+def run_loop(loop, tick_ms, start, finished):
+    """Runs the loop with a heartbeat until finished() is true, returns the heartbeat's lateness in seconds"""
+    lateness = []
+
+    def beat(due):
+        now = time.monotonic()
+        lateness.append(max(0.0, now - due))
+        if finished():
+            loop.stop()
+            return
+        loop.after(tick_ms, beat, now + tick_ms / 1000)
+
+    loop.after(0, start)
+    loop.after(tick_ms, beat, time.monotonic() + tick_ms / 1000)
+    loop.run()
+    return lateness
+
+
+def cancelled_run(loop, tick_ms, box_size, cancel_after):
+    """Stalls, progress updates seen, cancel-to-stop seconds and the Task's outcome for one cancelled generation"""
+    state = {"task": None, "cancelled_at": None, "stopped_at": None, "polled_done": False, "updates": set()}
+
+    def stopped(task):
+        task.wait()
+        state["stopped_at"] = time.monotonic()
+
+    def poll():
+        task = state["task"]
+        if task.done():
+            state["polled_done"] = True
+            return
+        state["updates"].add(task.progress()[:3])
+        if state["cancelled_at"] is None and task.progress().seconds >= cancel_after:
+            # Time the stop from a thread waiting on the Task, not from the next poll
+            threading.Thread(target=stopped, args=(task,)).start()
+            state["cancelled_at"] = time.monotonic()
+            task.cancel()
+        loop.after(POLL_MS, poll)
+
+    def start():
+        state["task"] = Task(sudoku_engine.generate, "hard", 1, box_size=box_size)
+        poll()
+
+    lateness = run_loop(loop, tick_ms, start, lambda: state["polled_done"])
+    try:
+        state["task"].result()
+        outcome = "finished"
+    except BudgetExceeded as e:
+        outcome = e.reason
+    stop_seconds = state["stopped_at"] - state["cancelled_at"] if state["cancelled_at"] else None
+    return lateness, len(state["updates"]), stop_seconds, outcome
+
+
+def inline_run(loop, tick_ms, box_size):
+    """Stalls with the generation run inside one callback"""
+    done = []
+
+    def start():
+        sudoku_engine.generate("hard", 1, box_size=box_size)
+        done.append(True)
+
+    return run_loop(loop, tick_ms, start, lambda: bool(done))
+
+
+def report(label, lateness):
+    print("%-30s %8d %10.1f %10.1f %10.1f" % (label, len(lateness), percentile(lateness, 0.5) * 1e3,
+                                               percentile(lateness, 0.99) * 1e3, max(lateness) * 1e3))
+    return max(lateness)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cancel-after', type=float, default=1.0, help="seconds before the generation is cancelled")
+    parser.add_argument('--tick-ms', type=int, default=10, help="heartbeat interval")
+    parser.add_argument('--max-stall-ms', type=float, default=100.0, help="longest allowed heartbeat delay")
+    parser.add_argument('--max-stop-ms', type=float, default=250.0, help="longest allowed time from cancel to stop")
+    parser.add_argument('--puzzles', type=int, default=40, help="9x9 puzzles for the overhead run")
+    args = parser.parse_args(argv)
+
+    failed = False
+    loop = make_loop()
+    print("%s, %d ms heartbeat, switch interval %g ms" % (loop.name, args.tick_ms, sys.getswitchinterval() * 1e3))
+    print("%-30s %8s %10s %10s %10s" % ("", "beats", "p50 ms", "p99 ms", "max ms"))
+    for box_size in (4, 5):
+        label = "%dx%d on a Task" % (box_size * box_size, box_size * box_size)
+        lateness, updates, stop_seconds, outcome = cancelled_run(loop, args.tick_ms, box_size, args.cancel_after)
+        stall = report(label, lateness)
+        if outcome == "cancelled":
+            print("%30s cancelled; stopped %.1f ms after cancel(), %d progress updates" % (
+                "", stop_seconds * 1e3, updates))
+            if stop_seconds * 1e3 > args.max_stop_ms:
+                print("FAIL: %s: took %.0f ms to stop after cancel()" % (label, stop_seconds * 1e3))
+                failed = True
+        else:
+            print("%30s finished before --cancel-after, %d progress updates" % ("", updates))
+        if stall * 1e3 > args.max_stall_ms:
+            print("FAIL: %s: the event loop stalled for %.0f ms" % (label, stall * 1e3))
+            failed = True
+    report("16x16 inline (no Task)", inline_run(loop, args.tick_ms, 4))
+
+    # Charging a budget costs one comparison per node; the variants alternate, best of three rounds
+    timings = {"no budget": float('inf'), "budget": float('inf')}
+    puzzles = {"no budget": [], "budget": []}
+    for _ in range(3):
+        spent = dict.fromkeys(timings, 0.0)
+        for seed in range(args.puzzles):
+            for variant in timings:
+                start = time.perf_counter()
+                pair = sudoku_engine.generate("hard", seed, budget=Budget(60) if variant == "budget" else None)
+                spent[variant] += time.perf_counter() - start
+                if len(puzzles[variant]) < args.puzzles:
+                    puzzles[variant].append(pair)
+        for variant in timings:
+            timings[variant] = min(timings[variant], spent[variant])
+    print("\n9x9 hard generate: %.2f ms without a budget, %.2f ms with one (%+.1f%%)" % (
+        timings["no budget"] / args.puzzles * 1e3, timings["budget"] / args.puzzles * 1e3,
+        (timings["budget"] / timings["no budget"] - 1) * 100))
+    if puzzles["budget"] != puzzles["no budget"]:
+        print("FAIL: a budget changed the puzzles generated")
+        failed = True
+
+    # The node limit is exact on every backend
+    for backend in sudoku_engine.BACKENDS:
+        budget = Budget(nodes=1000)
+        try:
+            sudoku_engine.count_solutions(sudoku_engine.Grid.empty(3), 10 ** 9, backend, budget=budget)
+            reason = "finished"
+        except BudgetExceeded as e:
+            reason = e.reason
+        print("%-10s node limit 1000: stopped (%s) at node %d" % (backend, reason, budget.nodes))
+        if reason != "nodes" or budget.nodes != 1001:
+            print("FAIL: %s did not stop at node 1001" % backend)
+            failed = True
+
+    # A deadline is checked after every clue dug and paced through the search nodes
+    for seconds in (0.1, 0.5):
+        task = Task(sudoku_engine.generate, "hard", 1, box_size=5, seconds=seconds)
+        task.wait()
+        overrun = time.monotonic() - task.budget.deadline
+        print("25x25 with a %.1f s deadline: stopped %.1f ms past it" % (seconds, overrun * 1e3))
+        if overrun * 1e3 > args.max_stop_ms:
+            print("FAIL: the %.1f s deadline was overrun by %.0f ms" % (seconds, overrun * 1e3))
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Throughput of derive() from stored seeds against generate() from scratch
+
+Every derived puzzle is checked for a unique solution that matches the
+derived solution, and its grade is compared with the seed's.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_derive [--puzzles N] [--generated N]
+"""
+import argparse
+import sys
+import time
+
+import sudoku_engine
+from sudoku_engine.transform import load_seeds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--puzzles', type=int, default=20000, help="derived puzzles timed per difficulty")
+    parser.add_argument('--generated', type=int, default=20, help="generated puzzles timed per difficulty")
+    parser.add_argument('--checked', type=int, default=200, help="derived puzzles verified per difficulty")
+    args = parser.parse_args(argv)
+
+    seeds = load_seeds()
+    seed_grades = {pair[0].to_line(): sudoku_engine.grade(pair[0]).technique
+                   for pairs in seeds.values() for pair in pairs}
+    failed = False
+
+    print("%-8s %14s %14s %9s" % ("level", "derive /s", "generate /s", "speedup"))
+    for difficulty in sudoku_engine.CELLS_TO_KEEP:
+        start = time.perf_counter()
+        for seed in range(args.puzzles):
+            sudoku_engine.derive(difficulty, seed, seeds)
+        derive_rate = args.puzzles / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for seed in range(args.generated):
+            sudoku_engine.generate(difficulty, seed)
+        generate_rate = args.generated / (time.perf_counter() - start)
+
+        print("%-8s %14.0f %14.1f %8.0fx" % (difficulty, derive_rate, generate_rate, derive_rate / generate_rate))
+
+        techniques = set(seed_grades[pair[0].to_line()] for pair in seeds[difficulty])
+        distinct = set()
+        for seed in range(args.checked):
+            puzzle, solution = sudoku_engine.derive(difficulty, seed, seeds)
+            distinct.add(puzzle)
+            if sudoku_engine.count_solutions(puzzle) != 1 or sudoku_engine.solve(puzzle) != solution:
+                print("FAIL: derived %s puzzle for seed %d does not solve uniquely to its solution" % (difficulty, seed))
+                failed = True
+            if sudoku_engine.grade(puzzle).technique not in techniques:
+                print("FAIL: derived %s puzzle for seed %d grades differently from the seeds" % (difficulty, seed))
+                failed = True
+        if len(distinct) < args.checked:
+            print("FAIL: only %d of %d derived %s puzzles are distinct" % (len(distinct), args.checked, difficulty))
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
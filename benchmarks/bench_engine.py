@@ -0,0 +1,71 @@
+"""Startup time and per-call overhead of the headless engine
+
+Run from the repository root:
+
+    python -m benchmarks.bench_engine [--calls N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, parse
+
+# Runs in a fresh interpreter: prints the import time and whether tkinter got loaded
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, 'tkinter' in sys.modules)
+"""
+
+
+def time_import(module, runs):
+    """Median cold import time of `module`, and whether it pulled in tkinter"""
+    timings = []
+    loads_tk = False
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_PROBE.format(module=module)], text=True)
+        seconds, tk_flag = output.split()
+        timings.append(float(seconds))
+        loads_tk = loads_tk or tk_flag == 'True'
+    return statistics.median(timings), loads_tk
+
+
+def time_calls(func, args_list):
+    """Mean seconds per call of func over args_list"""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200, help="calls per timed function")
+    parser.add_argument('--import-runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    engine_import, engine_tk = time_import('sudoku_engine', args.import_runs)
+    tk_import, _ = time_import('Sudoku', args.import_runs)
+    print("import sudoku_engine  %8.2f ms  (tkinter loaded: %s)" % (engine_import * 1e3, engine_tk))
+    print("import Sudoku         %8.2f ms" % (tk_import * 1e3))
+
+    for difficulty in sudoku_engine.CELLS_TO_KEEP:
+        per_call = time_calls(sudoku_engine.generate, [(difficulty, seed) for seed in range(args.calls)])
+        print("generate(%-6s)      %8.3f ms/call" % (difficulty, per_call * 1e3))
+
+    puzzle = parse(PUZZLES["norvig_easy"])
+    per_call = time_calls(sudoku_engine.solve, [(puzzle,)] * args.calls)
+    print("solve(norvig_easy)    %8.3f ms/call" % (per_call * 1e3))
+
+    if engine_tk:
+        print("FAIL: importing sudoku_engine loaded tkinter")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Batch factory throughput at 1, 2, 4 and 8 worker processes
+
+Run from the repository root:
+
+    python -m benchmarks.bench_factory [--puzzles N] [--difficulty LEVEL]
+"""
+import argparse
+import os
+import sys
+
+import sudoku_engine
+from sudoku_engine.factory import generate_batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--puzzles', type=int, default=800)
+    parser.add_argument('--difficulty', default="medium", choices=sorted(sudoku_engine.CELLS_TO_KEEP))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=25)
+    args = parser.parse_args(argv)
+
+    print("CPUs available: %d" % os.cpu_count())
+    print("%8s %10s %14s %9s %11s" % ("workers", "seconds", "puzzles/s", "speedup", "efficiency"))
+    baseline = None
+    for workers in args.workers:
+        with open(os.devnull, 'w') as out:
+            seconds = generate_batch(out, args.difficulty, args.puzzles, workers, args.chunk_size, seed=1234)
+        rate = args.puzzles / seconds
+        baseline = baseline or rate
+        print("%8d %10.2f %14.1f %8.2fx %10.0f%%" % (
+            workers, seconds, rate, rate / baseline, 100 * rate / baseline / workers))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Difficulty grader throughput in grids per second on a fixed corpus
+
+The corpus is the shared benchmark puzzles plus puzzles dug to each
+difficulty's clue count from fixed seeds, so every run grades the same grids.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_grader [--per-difficulty N] [--rounds N] [--min-rate GRIDS_PER_S]
+"""
+import argparse
+import collections
+import random
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, parse
+
+
+def build_corpus(per_difficulty):
+    puzzles = [parse(line) for line in PUZZLES.values()]
+    for difficulty, cells_to_keep in sudoku_engine.CELLS_TO_KEEP.items():
+        rng = random.Random(difficulty)
+        for _ in range(per_difficulty):
+            solution = sudoku_engine.generate_solved_board(rng)
+            puzzles.append(sudoku_engine.dig(solution, cells_to_keep, rng))
+    return puzzles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--per-difficulty', type=int, default=100, help="generated puzzles per difficulty")
+    parser.add_argument('--rounds', type=int, default=3, help="passes over the corpus, the best one counts")
+    parser.add_argument('--min-rate', type=float, default=200.0, help="fail below this many grids per second")
+    args = parser.parse_args(argv)
+
+    puzzles = build_corpus(args.per_difficulty)
+    best = None
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        grades = [sudoku_engine.grade(puzzle) for puzzle in puzzles]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    techniques = collections.Counter(grade.technique for grade in grades)
+    print("%-18s %7s" % ("hardest technique", "grids"))
+    for name, _ in sudoku_engine.TECHNIQUES:
+        if techniques[name]:
+            print("%-18s %7d" % (name, techniques[name]))
+
+    rate = len(puzzles) / best
+    print("\n%d grids in %.3f s: %.0f grids/s, %.2f ms per grid" % (len(puzzles), best, rate, best / len(puzzles) * 1e3))
+    if rate < args.min_rate:
+        print("FAIL: %.0f grids/s is below the %.0f grids/s minimum" % (rate, args.min_rate))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
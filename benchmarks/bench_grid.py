@@ -0,0 +1,78 @@
+"""Memory and copy cost of Grid versus list-of-lists boards
+
+Run from the repository root:
+
+    python -m benchmarks.bench_grid [--puzzles N]
+"""
+import argparse
+import copy
+import random
+import sys
+import time
+import tracemalloc
+
+import sudoku_engine
+from sudoku_engine import Grid
+
+
+def relabellings(count, seed):
+    """`count` random digit relabellings as bytes.translate tables"""
+    rng = random.Random(seed)
+    tables = []
+    for _ in range(count):
+        digits = rng.sample(range(1, 10), 9)
+        tables.append(bytes([0] + digits) + bytes(246))
+    return tables
+
+
+def held_bytes(build):
+    """Bytes still allocated after build() returns its objects"""
+    tracemalloc.start()
+    objects = build()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return held
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--puzzles', type=int, default=200000, help="puzzles held in memory")
+    parser.add_argument('--copies', type=int, default=100000, help="derived copies timed")
+    args = parser.parse_args(argv)
+
+    puzzle, _ = sudoku_engine.generate("medium", 1)
+    rows = puzzle.to_rows()
+    tables = relabellings(1000, 1)
+
+    # Distinct puzzles, so nothing is shared between the held objects
+    def build_lists():
+        return [[[table[num] for num in row] for row in rows] for table in
+                (tables[k % len(tables)] for k in range(args.puzzles))]
+
+    def build_grids():
+        return [Grid(puzzle.cells.translate(tables[k % len(tables)])) for k in range(args.puzzles)]
+
+    list_bytes = held_bytes(build_lists) / args.puzzles
+    grid_bytes = held_bytes(build_grids) / args.puzzles
+    print("memory per puzzle: list-of-lists %7.0f B   Grid %7.0f B   (%.1fx smaller)" % (
+        list_bytes, grid_bytes, list_bytes / grid_bytes))
+    print("10^6 puzzles:      list-of-lists %7.0f MB  Grid %7.0f MB" % (list_bytes, grid_bytes))
+
+    start = time.perf_counter()
+    for k in range(args.copies):
+        derived = copy.deepcopy(rows)
+        derived[4][4] = 0
+    deepcopy_time = (time.perf_counter() - start) / args.copies
+
+    start = time.perf_counter()
+    for k in range(args.copies):
+        puzzle.with_cell(4, 4, 0)
+    grid_time = (time.perf_counter() - start) / args.copies
+    print("derive a modified board: deepcopy %7.2f us   Grid.with_cell %7.2f us   (%.1fx faster)" % (
+        deepcopy_time * 1e6, grid_time * 1e6, deepcopy_time / grid_time))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Hint latency: HintEngine's next deduction on mid-game positions, against the 1 ms budget
+
+Two kinds of position are timed. "filled" positions are generated and
+corpus puzzles with a random share of their empty cells filled in
+correctly, from none to three quarters. The engine follows them through
+sync(), as the game does between hints, and the cost per changed cell is
+reported. "path" positions are every step of solving each puzzle hint by
+hint, eliminations included. That is where pairs, triples and fish
+come up, and where no technique applies, the slowest case: every
+technique up to swordfish has to come up empty.
+
+Every hint is checked against the solution: placements must match it,
+eliminations must not remove it. The slowest 9x9 hint, not a percentile,
+is held to --max-us, which leaves a margin under the 1 ms budget.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_hints [--games N] [--large N] [--max-us US]
+"""
+import argparse
+import collections
+import random
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, percentile
+
+FILLED_SHARES = (0.0, 0.25, 0.5, 0.75)
+
+
+def positions(puzzle, solution, rng):
+    """The puzzle with growing shares of its empty cells filled from the solution"""
+    empty = [index for index, num in enumerate(puzzle.cells) if not num]
+    rng.shuffle(empty)
+    for share in FILLED_SHARES:
+        cells = bytearray(puzzle.cells)
+        for index in empty[:int(share * len(empty))]:
+            cells[index] = solution.cells[index]
+        yield sudoku_engine.Grid(cells)
+
+
+def timed_hint(engine):
+    """The engine's next hint and the best of three timings in microseconds"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        hint = engine.next_hint()
+        elapsed = (time.perf_counter() - start) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return hint, best
+
+
+def is_wrong(hint, solution):
+    return hint is not None and (
+        hint.technique == "contradiction"
+        or hint.placement is not None and solution[hint.placement[:2]] != hint.placement[2]
+        or any(solution[row, col] == num for row, col, num in hint.eliminations))
+
+
+def measure(games):
+    """Hint times in microseconds by kind of position, sync microseconds per changed cell, hints by technique,
+    and the wrong hints found"""
+    rng = random.Random(0)
+    hint_us = {"filled": [], "path": []}
+    move_us, by_technique, wrong = [], collections.Counter(), []
+    for puzzle, solution in games:
+        engine = sudoku_engine.HintEngine(puzzle)
+        for position in positions(puzzle, solution, rng):
+            moves = sum(1 for new, old in zip(position.cells, engine.cells) if new != old)
+            start = time.perf_counter()
+            engine.sync(position.cells)
+            if moves:
+                move_us.append((time.perf_counter() - start) * 1e6 / moves)
+            hint, elapsed = timed_hint(engine)
+            hint_us["filled"].append(elapsed)
+            if is_wrong(hint, solution):
+                wrong.append((position, hint))
+
+        engine.load(puzzle)
+        while True:
+            hint, elapsed = timed_hint(engine)
+            hint_us["path"].append(elapsed)
+            by_technique[hint.technique if hint else "none"] += 1
+            if is_wrong(hint, solution):
+                wrong.append((bytes(engine.cells), hint))
+            if hint is None or hint.technique == "contradiction":
+                break
+            engine.apply(hint)
+    return hint_us, move_us, by_technique, wrong
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=60, help="9x9 puzzles, spread over the difficulties")
+    parser.add_argument('--large', type=int, default=3, help="16x16 puzzles, reported but not held to the budget")
+    parser.add_argument('--max-us', type=float, default=750.0, help="longest hint time allowed on 9x9")
+    args = parser.parse_args(argv)
+
+    games = [sudoku_engine.derive(("easy", "medium", "hard")[k % 3], seed=k) for k in range(args.games)]
+    for line in PUZZLES.values():
+        puzzle = sudoku_engine.from_line(line)
+        games.append((puzzle, sudoku_engine.solve(puzzle, "dlx")))
+    large = [sudoku_engine.generate("hard", seed, box_size=4) for seed in range(args.large)]
+
+    failed = False
+    print("%-6s %-7s %10s %10s %10s %10s" % ("board", "kind", "positions", "p50 us", "p99 us", "max us"))
+    for label, corpus in (("9x9", games), ("16x16", large)):
+        if not corpus:
+            continue
+        hint_us, move_us, by_technique, wrong = measure(corpus)
+        for kind, times in hint_us.items():
+            print("%-6s %-7s %10d %10.1f %10.1f %10.1f" % (label, kind, len(times), percentile(times, 0.5),
+                                                          percentile(times, 0.99), max(times)))
+            if label == "9x9" and max(times) > args.max_us:
+                print("FAIL: a hint took over %.0f us on %s positions" % (args.max_us, kind))
+                failed = True
+        print("       sync %.1f us per changed cell; path hints: %s" % (
+            sum(move_us) / len(move_us), ", ".join("%s %d" % item for item in by_technique.most_common())))
+        for position, hint in wrong[:5]:
+            print("FAIL: %s: wrong hint %s on %s" % (label, sudoku_engine.describe_hint(hint),
+                                                      sudoku_engine.Grid(position)))
+        failed |= bool(wrong)
+
+    # For scale: the old hint ranked every empty cell and only picked one to reveal
+    grid = games[0][0]
+    start = time.perf_counter()
+    for _ in range(1000):
+        sudoku_engine.select_hint_cell(sudoku_engine.hint_scores(grid), "medium")
+    print("\nhint_scores + select_hint_cell: %.1f us (no deduction, just a cell)" % (
+        (time.perf_counter() - start) * 1e3))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
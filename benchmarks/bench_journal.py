@@ -0,0 +1,204 @@
+"""Move journal: bytes and writes per game, Tk-thread cost per move, undo cost, and resume time after a crash
+
+Each game is played by a simulated player who fills the empty cells in a
+random order. Along the way the player makes mistakes and undoes some,
+takes hints, undoes and redoes, and clears the board once and takes that
+back. The moves go through MoveHistory and a Journal on a real file. The
+journal is compared with writing a packed 81-byte snapshot of the board
+after every move.
+
+The crash test plays a game in a child process and kills it with
+SIGKILL right after the journal's last batch reaches disk, with no
+close(). The parent then times load_game(), checks the board and
+hinted cells it rebuilds, and repeats this for a long game with and
+without checkpoints.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_journal [--games N] [--long-moves N]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import tempfile
+import time
+
+import sudoku_engine
+from benchmarks.corpus import percentile
+from sudoku_engine import Move, MoveHistory
+
+SNAPSHOT_BYTES = 81
+
+
+def play(puzzle, solution, rng, history):
+    """Yields (kind, moves) steps of a player solving the puzzle, made through history"""
+    cells = bytearray(puzzle.cells)
+    empties = [index for index, num in enumerate(puzzle.cells) if not num]
+    rng.shuffle(empties)
+
+    def step(kind, moves):
+        for move in moves:
+            cells[move.cell] = move.new
+        return kind, moves
+
+    for count, index in enumerate(empties):
+        if count == len(empties) // 2:
+            yield step(b"M", history.record(Move(cell, num, 0, time.time()) for cell, num in enumerate(cells)
+                                            if num and not puzzle.cells[cell]))
+            yield step(b"U", history.undo())
+        if rng.random() < 0.15:
+            wrong = rng.choice([num for num in range(1, 10) if num != solution.cells[index]])
+            yield step(b"M", history.record([Move(index, cells[index], wrong, time.time())]))
+            if rng.random() < 0.5:
+                yield step(b"U", history.undo())
+        hint = rng.random() < 0.05
+        yield step(b"H" if hint else b"M", history.record([Move(index, cells[index], solution.cells[index],
+                                                                 time.time(), hint)]))
+        if rng.random() < 0.05:
+            yield step(b"U", history.undo())
+            yield step(b"R", history.redo())
+
+
+def long_game(puzzle, rng, history, moves):
+    """Yields `moves` single-cell steps of a player typing anything anywhere, for a journal much longer than a game"""
+    cells = bytearray(puzzle.cells)
+    empties = [index for index, num in enumerate(puzzle.cells) if not num]
+    for _ in range(moves):
+        index = rng.choice(empties)
+        num = rng.choice([num for num in range(10) if num != cells[index]])
+        moves = history.record([Move(index, cells[index], num, time.time())])
+        cells[index] = num
+        yield b"M", moves
+
+
+def expected_game(puzzle, steps):
+    """The board and hinted (row, col) cells the steps leave"""
+    cells = bytearray(puzzle.cells)
+    hinted = set()
+    for kind, moves in steps:
+        for move in moves:
+            cells[move.cell] = move.new
+            if move.hinted:
+                (hinted.discard if kind == b"U" else hinted.add)(divmod(move.cell, 9))
+    return sudoku_engine.Grid(cells), hinted
+
+
+def game(seed):
+    return sudoku_engine.derive(("easy", "medium", "hard")[seed % 3], seed=seed)
+
+
+def steps_of(seed, long_moves):
+    puzzle, solution = game(seed)
+    rng = random.Random(seed)
+    if long_moves:
+        return list(long_game(puzzle, rng, MoveHistory(), long_moves))
+    return list(play(puzzle, solution, rng, MoveHistory()))
+
+
+def crash_child(path, seed, long_moves, checkpoint_every):
+    """Plays a game into a journal, then dies without closing it"""
+    puzzle, solution = game(seed)
+    journal = sudoku_engine.Journal(path, checkpoint_every=checkpoint_every)
+    journal.start_game(("easy", "medium", "hard")[seed % 3], puzzle, solution)
+    for kind, moves in steps_of(seed, long_moves):
+        journal.log(kind, moves)
+    journal.flush()
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def resume(folder, seed, long_moves, checkpoint_every):
+    """(best load_game seconds, moves replayed, bytes on disk, whether the board came back right)"""
+    path = os.path.join(folder, "crash-%d-%d.journal" % (seed, checkpoint_every))
+    child = multiprocessing.get_context("fork").Process(target=crash_child,
+                                                        args=(path, seed, long_moves, checkpoint_every))
+    child.start()
+    child.join()
+    best = None
+    for _ in range(20):
+        start = time.perf_counter()
+        saved = sudoku_engine.load_game(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    correct = child.exitcode == -signal.SIGKILL and (saved.board, saved.hinted) == expected_game(
+        game(seed)[0], steps_of(seed, long_moves))
+    return best, saved.moves, os.path.getsize(path), correct
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=30, help="simulated games")
+    parser.add_argument('--long-moves', type=int, default=5000, help="moves in the long crash test")
+    parser.add_argument('--max-log-us', type=float, default=1000.0, help="allowed 99th percentile Tk-thread us per step")
+    args = parser.parse_args(argv)
+
+    failed = False
+    folder = tempfile.mkdtemp(prefix="bench_journal")
+    path = os.path.join(folder, "games.journal")
+    step_us, steps_total, moves_total, sizes, writes, peak = [], 0, 0, [], [], 0
+    journal = sudoku_engine.Journal(path)
+    for seed in range(args.games):
+        puzzle, solution = game(seed)
+        writes_before = journal.writes
+        journal.start_game(("easy", "medium", "hard")[seed % 3], puzzle, solution)
+        history = MoveHistory()
+        # Time what the Tk thread does per step: the history and queueing the moves
+        steps = play(puzzle, solution, random.Random(seed), history)
+        while True:
+            start = time.perf_counter()
+            step = next(steps, None)
+            if step is None:
+                break
+            journal.log(*step)
+            step_us.append((time.perf_counter() - start) * 1e6)
+            steps_total += 1
+            moves_total += len(step[1])
+            if steps_total % 16 == 0:
+                journal.flush()  # A player's pace: batches of a few moves
+                peak = max(peak, os.path.getsize(path))
+        journal.flush()
+        sizes.append(os.path.getsize(path))
+        writes.append(journal.writes - writes_before)
+    journal.close()
+
+    print("%d games, %.1f steps and %.1f cell moves per game" % (args.games, steps_total / args.games,
+                                                                moves_total / args.games))
+    print("%-26s %12s %12s" % ("", "journal", "snapshots"))
+    print("%-26s %12.0f %12.0f" % ("bytes on disk per game", sum(sizes) / len(sizes),
+                                   SNAPSHOT_BYTES * steps_total / args.games))
+    print("%-26s %12d %12s" % ("largest file seen", peak, "-"))
+    print("%-26s %12.1f %12.1f" % ("writes per game", sum(writes) / len(writes), steps_total / args.games))
+    print("Tk thread per step: p50 %.1f us, p99 %.1f us, max %.1f us" % (
+        percentile(step_us, 0.5), percentile(step_us, 0.99), max(step_us)))
+    if percentile(step_us, 0.99) > args.max_log_us:
+        print("FAIL: 99th percentile Tk-thread cost per step over %.0f us" % args.max_log_us)
+        failed = True
+
+    # Undo and redo cost the same however long the history, as they never copy the board
+    for length in (10, 10000):
+        history = MoveHistory()
+        for k in range(length):
+            history.record([Move(k % 81, 0, k % 9 + 1, 0.0)])
+        start = time.perf_counter()
+        for _ in range(1000):
+            history.undo()
+            history.redo()
+        print("undo + redo with %5d steps of history: %.2f us" % (length, (time.perf_counter() - start) * 1e3))
+
+    print("\n%-34s %12s %10s %10s" % ("crash, then resume", "resume ms", "replayed", "bytes"))
+    for label, seed, long_moves, checkpoint_every in (
+            ("one game", 0, 0, 64),
+            ("%d moves, checkpoint every 64" % args.long_moves, 1, args.long_moves, 64),
+            ("%d moves, no checkpoints" % args.long_moves, 1, args.long_moves, 10 ** 9)):
+        seconds, replayed, size, correct = resume(folder, seed, long_moves, checkpoint_every)
+        print("%-34s %12.3f %10d %10d" % (label, seconds * 1e3, replayed, size))
+        if not correct:
+            print("FAIL: %s: the resumed board or hints differ from the ones played" % label)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Keystroke validation cost by board fullness: BoardModel versus rescanning the cells
+
+The rescan mirrors the old is_valid_move, which read and parsed the text of
+every cell in the row, column and box on each key release. Each read goes
+through a Tcl interpreter, like Entry.get() does, so the comparison runs
+without a display.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_model [--keystrokes N]
+"""
+import argparse
+import random
+import sys
+import time
+import tkinter
+
+import sudoku_engine
+
+
+class TclCells:
+    """Cell texts held in Tcl variables, read back with one Tcl call each like tk.Entry"""
+
+    def __init__(self):
+        self.tcl = tkinter.Tcl()
+        for i in range(9):
+            for j in range(9):
+                self[(i, j)] = ''
+
+    def __getitem__(self, pos):
+        return self.tcl.call('set', 'cell%d%d' % pos)
+
+    def __setitem__(self, pos, text):
+        self.tcl.call('set', 'cell%d%d' % pos, text)
+
+
+def rescan_is_valid(texts, row, col, num):
+    """is_valid_move as it was, reading cell texts through Tcl instead of tk.Entry widgets"""
+    for j in range(9):
+        if j != col:
+            value = texts[(row, j)]
+            if value and int(value) == num:
+                return False
+    for i in range(9):
+        if i != row:
+            value = texts[(i, col)]
+            if value and int(value) == num:
+                return False
+    box_row, box_col = 3 * (row // 3), 3 * (col // 3)
+    for i in range(box_row, box_row + 3):
+        for j in range(box_col, box_col + 3):
+            if (i, j) != (row, col):
+                value = texts[(i, j)]
+                if value and int(value) == num:
+                    return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keystrokes', type=int, default=20000, help="keystrokes timed per fullness level")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    solution = sudoku_engine.generate_solved_board(rng)
+    order = rng.sample(range(81), 81)
+
+    print("%8s %16s %16s" % ("filled", "model us/key", "rescan us/key"))
+    for filled in (0, 20, 40, 60, 80):
+        model = sudoku_engine.BoardModel()
+        texts = TclCells()
+        for index in order[:filled]:
+            row, col = divmod(index, 9)
+            model.set(row, col, solution[row][col])
+            texts[(row, col)] = str(solution[row][col])
+        row, col = divmod(order[filled], 9) if filled < 81 else divmod(order[-1], 9)
+
+        # A keystroke types a digit, then the next one deletes it again
+        start = time.perf_counter()
+        for k in range(args.keystrokes):
+            num = k % 9 + 1 if k % 2 == 0 else 0
+            model.set(row, col, num)
+            model.conflicts  # What the UI reads to pick the colour
+        model_time = (time.perf_counter() - start) / args.keystrokes
+
+        start = time.perf_counter()
+        for k in range(args.keystrokes):
+            num = k % 9 + 1 if k % 2 == 0 else 0
+            texts[(row, col)] = str(num) if num else ''
+            if num:
+                rescan_is_valid(texts, row, col, num)
+        rescan_time = (time.perf_counter() - start) / args.keystrokes
+
+        print("%8d %16.2f %16.2f" % (filled, model_time * 1e6, rescan_time * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
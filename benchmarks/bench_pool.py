@@ -0,0 +1,64 @@
+"""Click-to-board latency with a warm puzzle pool versus generating on click
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pool [--clicks N] [--interval S]
+"""
+import argparse
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import percentile
+
+
+def summarize(label, timings):
+    timings = sorted(timings)
+    print("%-22s p50 %8.3f ms   p99 %8.3f ms   max %8.3f ms" % (
+        label, percentile(timings, 0.5) * 1e3, percentile(timings, 0.99) * 1e3, timings[-1] * 1e3))
+    return percentile(timings, 0.99)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clicks', type=int, default=60, help="New Game clicks per difficulty")
+    parser.add_argument('--interval', type=float, default=0.25, help="seconds between clicks")
+    parser.add_argument('--capacity', type=int, default=8)
+    parser.add_argument('--low-water', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for difficulty in sudoku_engine.CELLS_TO_KEEP:
+        timings = []
+        for seed in range(args.clicks // 4):
+            start = time.perf_counter()
+            sudoku_engine.generate(difficulty, seed)
+            timings.append(time.perf_counter() - start)
+        summarize("generate(%s)" % difficulty, timings)
+
+    pool = sudoku_engine.PuzzlePool(capacity=args.capacity, low_water=args.low_water).start()
+    # Warm up: wait for every level to reach capacity
+    while any(pool.size(level) < args.capacity for level in sudoku_engine.CELLS_TO_KEEP):
+        time.sleep(0.05)
+
+    worst = 0.0
+    for difficulty in sudoku_engine.CELLS_TO_KEEP:
+        timings = []
+        for _ in range(args.clicks):
+            start = time.perf_counter()
+            pool.get(difficulty)
+            timings.append(time.perf_counter() - start)
+            time.sleep(args.interval)
+        worst = max(worst, summarize("pool.get(%s)" % difficulty, timings))
+    pool.stop()
+
+    stats = pool.stats()
+    print("hits %s" % stats["hits"])
+    print("misses %s" % stats["misses"])
+    print("refills %d, mean %.1f ms, p99 %.1f ms" % (
+        stats["refills"], stats["refill_mean"] * 1e3, stats["refill_p99"] * 1e3))
+    print("warm pool p99 click latency: %.3f ms" % (worst * 1e3))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
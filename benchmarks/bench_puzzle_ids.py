@@ -0,0 +1,78 @@
+"""Rebuilding puzzles from IDs: cold rebuild time, PuzzleCache hit time and hit rate
+
+Also checks that IDs still rebuild the puzzles they stood for when this was
+written. A mismatch means generate() changed without GENERATOR_VERSION
+being bumped, which would break every shared ID.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_puzzle_ids [--requests N] [--popular N] [--cache-size N]
+"""
+import argparse
+import random
+import sys
+import time
+
+import sudoku_engine
+
+# Puzzles the IDs rebuilt under generator version 1
+KNOWN_IDS = {
+    "1e1": "287.54.9...4..67356..79..48.53....79.6248...38719354625....391731627..847.95...2.",
+    "1m2": "9.12.5..4.......7.637..8....2..16..5........3..5.9..........71....35..28....87...",
+    "1h3": ".64.81295......18....2...4....87..1...24..........9.5.13..6.92..569..8...283.....",
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help="ID lookups in the cache workload")
+    parser.add_argument('--popular', type=int, default=50, help="distinct IDs in the workload, e.g. daily puzzles")
+    parser.add_argument('--cache-size', type=int, default=32, help="PuzzleCache maxsize")
+    args = parser.parse_args(argv)
+
+    failed = False
+    if sudoku_engine.GENERATOR_VERSION == 1:
+        for puzzle_id, line in KNOWN_IDS.items():
+            if sudoku_engine.puzzle_from_id(puzzle_id)[0].to_line() != line:
+                print("FAIL: %s no longer rebuilds its puzzle; bump GENERATOR_VERSION" % puzzle_id)
+                failed = True
+
+    print("%-8s %16s" % ("level", "rebuild ms"))
+    for difficulty in sudoku_engine.CELLS_TO_KEEP:
+        ids = [sudoku_engine.make_puzzle_id(difficulty, seed) for seed in range(10)]
+        start = time.perf_counter()
+        pairs = [sudoku_engine.puzzle_from_id(puzzle_id) for puzzle_id in ids]
+        elapsed = (time.perf_counter() - start) / len(ids)
+        print("%-8s %16.2f" % (difficulty, elapsed * 1e3))
+        if [sudoku_engine.puzzle_from_id(puzzle_id) for puzzle_id in ids] != pairs:
+            print("FAIL: %s IDs rebuild different puzzles on a second call" % difficulty)
+            failed = True
+
+    # Lookups skewed towards a few popular IDs (Zipf-like), as daily puzzles are
+    rng = random.Random(1)
+    ids = [sudoku_engine.make_puzzle_id("medium", seed) for seed in range(args.popular)]
+    weights = [1 / (rank + 1) for rank in range(len(ids))]
+    workload = rng.choices(ids, weights, k=args.requests)
+
+    cache = sudoku_engine.PuzzleCache(args.cache_size)
+    start = time.perf_counter()
+    for puzzle_id in workload:
+        cache.get(puzzle_id)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats()
+
+    hit_id = workload[-1]
+    start = time.perf_counter()
+    for _ in range(10000):
+        cache.get(hit_id)
+    hit_time = (time.perf_counter() - start) / 10000
+
+    print("\n%d lookups over %d IDs with room for %d: hit rate %.1f%%, %.2f ms per lookup" % (
+        args.requests, args.popular, args.cache_size, 100 * stats["hits"] / args.requests,
+        elapsed / args.requests * 1e3))
+    print("cache hit: %.2f us" % (hit_time * 1e6))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Widget calls and time per New Game and per hint: diffed rendering versus redrawing every cell
+
+The old New Game cleared all 81 cells (a delete and a config each) and then
+inserted and coloured every given. The old hint read every cell's text to
+find the empty ones and 27 more per empty cell to score it. The game now
+renders through BoardView, which touches only cells whose text or colours
+changed.
+
+Cells are stand-ins for tk.Entry that make one Tcl call per widget call,
+so this runs without a display. Every render is read back and checked
+against the model.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_render [--games N]
+"""
+import argparse
+import sys
+import time
+import tkinter
+import types
+
+import sudoku_engine
+from Sudoku import SudokuBoard
+
+
+class TclEntry:
+    """The tk.Entry calls the game makes, each one Tcl round trip, counted"""
+    calls = 0
+
+    def __init__(self, tcl, name, text, fg, bg):
+        self.tcl = tcl
+        self.name = name
+        tcl.call('array', 'set', name, ('text', text, 'fg', fg, 'bg', bg))
+
+    def get(self):
+        TclEntry.calls += 1
+        return self.tcl.call('set', self.name + '(text)')
+
+    def delete(self, first, last=None):
+        TclEntry.calls += 1
+        text = self.tcl.call('set', self.name + '(text)')
+        self.tcl.call('set', self.name + '(text)', text[:first] if last else text[:first] + text[first + 1:])
+
+    def insert(self, index, text):
+        TclEntry.calls += 1
+        old = self.tcl.call('set', self.name + '(text)')
+        self.tcl.call('set', self.name + '(text)', old[:index] + text + old[index:])
+
+    def config(self, **options):
+        TclEntry.calls += 1
+        self.tcl.call('array', 'set', self.name, tuple(item for pair in options.items() for item in pair))
+
+    def __getitem__(self, option):
+        TclEntry.calls += 1
+        return self.tcl.call('set', '%s(%s)' % (self.name, option))
+
+    def state(self):
+        return tuple(self.tcl.call('set', '%s(%s)' % (self.name, key)) for key in ('text', 'fg', 'bg'))
+
+
+def make_cells(view):
+    tcl = tkinter.Tcl()
+    return {(i, j): TclEntry(tcl, 'cell%d_%d' % (i, j), *view.cell(i, j)) for i in range(9) for j in range(9)}
+
+
+def legacy_new_game(cells, puzzle):
+    """clear_board and the given-filling loop as they were"""
+    for cell in cells.values():
+        cell.delete(0, 'end')
+        cell.config(fg='black')
+    for i in range(9):
+        for j in range(9):
+            if puzzle[i][j] != 0:
+                cells[(i, j)].insert(0, str(puzzle[i][j]))
+                cells[(i, j)].config(fg='black')
+
+
+def legacy_hint(cells, solution, difficulty):
+    """give_hint as it was: widget reads to find and score empty cells, then the flash"""
+    scores = {}
+    for i in range(9):
+        for j in range(9):
+            if not cells[(i, j)].get():
+                filled = 0
+                for k in range(9):
+                    filled += bool(cells[(i, k)].get()) + bool(cells[(k, j)].get())
+                for r in range(3 * (i // 3), 3 * (i // 3) + 3):
+                    for c in range(3 * (j // 3), 3 * (j // 3) + 3):
+                        filled += bool(cells[(r, c)].get())
+                scores[(i, j)] = filled * 2 + 9 - (abs(i - 4) + abs(j - 4))
+    row, col = sudoku_engine.select_hint_cell(scores, difficulty)
+    cell = cells[(row, col)]
+    original_bg = cell['bg']
+    for bg in ('yellow', 'white', 'yellow', original_bg):
+        cell.config(bg=bg)
+    cell.insert(0, str(solution[row][col]))
+    cell.config(fg='green')
+
+
+def view_hint(board, solution, difficulty):
+    """give_hint and _apply_hint_effect as they are, with the after() steps run in turn"""
+    row, col = sudoku_engine.select_hint_cell(sudoku_engine.hint_scores(board.model.grid()), difficulty)
+    pos = (row, col)
+    for bg in ('yellow', 'white', 'yellow', None):
+        if bg is None:
+            board.view.highlights.pop(pos, None)
+        else:
+            board.view.highlights[pos] = bg
+        SudokuBoard.render(board, [pos])
+    board.view.hinted.add(pos)
+    SudokuBoard.render(board, board.model.set(row, col, solution[row][col]) | {pos})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=50, help="New Games in a row, each followed by three hints")
+    args = parser.parse_args(argv)
+
+    games = [sudoku_engine.derive(("easy", "medium", "hard")[k % 3], seed=k) for k in range(args.games)]
+    failed = False
+    results = {}
+    for label in ("redraw all", "diffed"):
+        model = sudoku_engine.BoardModel()
+        board = types.SimpleNamespace(model=model, view=sudoku_engine.BoardView(model))
+        board.cells = make_cells(board.view)
+        game_calls, hint_calls, game_time, hint_time = [], [], 0.0, 0.0
+        for k, (puzzle, solution) in enumerate(games):
+            difficulty = ("easy", "medium", "hard")[k % 3]
+            TclEntry.calls = 0
+            start = time.perf_counter()
+            if label == "redraw all":
+                legacy_new_game(board.cells, puzzle)
+            else:
+                model.load(puzzle)
+                board.view.clear_marks()
+                SudokuBoard.render(board)
+            game_time += time.perf_counter() - start
+            game_calls.append(TclEntry.calls)
+
+            for _ in range(3):
+                TclEntry.calls = 0
+                start = time.perf_counter()
+                if label == "redraw all":
+                    legacy_hint(board.cells, solution, difficulty)
+                else:
+                    view_hint(board, solution, difficulty)
+                hint_time += time.perf_counter() - start
+                hint_calls.append(TclEntry.calls)
+
+            if label == "diffed":
+                shown = {pos: cell.state() for pos, cell in board.cells.items()}
+                if shown != {pos: board.view.cell(*pos) for pos in board.cells}:
+                    print("FAIL: widgets differ from the view after game %d" % k)
+                    failed = True
+
+        results[label] = (sum(game_calls) / len(game_calls), max(game_calls), game_time / len(games) * 1e6,
+                          sum(hint_calls) / len(hint_calls), hint_time / len(hint_calls) * 1e6)
+
+    print("%-12s %12s %12s %12s %12s %12s" % ("render", "calls/game", "max/game", "us/game", "calls/hint",
+                                                "us/hint"))
+    for label, (mean_game, max_game, game_us, mean_hint, hint_us) in results.items():
+        print("%-12s %12.1f %12d %12.1f %12.1f %12.1f" % (label, mean_game, max_game, game_us, mean_hint, hint_us))
+    old, new = results["redraw all"], results["diffed"]
+    if new[0] >= old[0] or new[3] >= old[3]:
+        print("FAIL: diffed rendering makes no fewer widget calls")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
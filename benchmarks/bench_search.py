@@ -0,0 +1,89 @@
+"""Search nodes and wall time: propagation with MRV branching versus the row-major backtracker
+
+For each hard puzzle, solve and count_solutions run on the "bitboard"
+backend, whose solve walks the empty cells in row-major order, and on
+"propagate". Propagate applies naked and hidden singles after every
+placement, branches on the fewest-candidates cell and undoes through a
+trail. Nodes are the recursive search calls counted by EngineStats. Fills
+of an empty grid are compared too.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search [--generated N] [--fills N]
+"""
+import argparse
+import random
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, ROW_MAJOR_SLOW
+
+BACKENDS = ("bitboard", "propagate")
+
+
+def measure(call):
+    """(nodes, seconds) of one call that takes a stats= argument"""
+    stats = sudoku_engine.EngineStats()
+    start = time.perf_counter()
+    call(stats)
+    return stats.nodes, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--generated', type=int, default=10, help="generated hard puzzles added to the corpus")
+    parser.add_argument('--fills', type=int, default=50, help="empty grids filled per backend")
+    args = parser.parse_args(argv)
+
+    corpus = [(name, sudoku_engine.from_line(line)) for name, line in PUZZLES.items() if name != "norvig_easy"]
+    corpus += [("generated_%d" % seed, sudoku_engine.generate("hard", seed)[0]) for seed in range(args.generated)]
+
+    failed = False
+    totals = {(op, backend): [0, 0.0] for op in ("solve", "count") for backend in BACKENDS}
+    print("%-20s %-6s %12s %10s %12s %10s" % ("puzzle", "op", "row-major", "ms", "propagate", "ms"))
+    for name, puzzle in corpus:
+        for op in ("solve", "count"):
+            row = []
+            for backend in BACKENDS:
+                if op == "solve" and backend == "bitboard" and name in ROW_MAJOR_SLOW:
+                    row.append(None)
+                    continue
+                if op == "solve":
+                    nodes, seconds = measure(lambda stats: sudoku_engine.solve(puzzle, backend, stats=stats))
+                else:
+                    nodes, seconds = measure(lambda stats: sudoku_engine.count_solutions(
+                        puzzle, backend=backend, stats=stats))
+                row.append((nodes, seconds))
+                totals[(op, backend)][0] += nodes
+                totals[(op, backend)][1] += seconds
+            print("%-20s %-6s %s" % (name, op, " ".join(
+                "%12s %10s" % ("skipped", "-") if cell is None else "%12d %10.2f" % (cell[0], cell[1] * 1e3)
+                for cell in row)))
+        if sudoku_engine.count_solutions(puzzle, backend="propagate") != 1:
+            print("FAIL: %s: propagate does not find exactly one solution" % name)
+            failed = True
+        if sudoku_engine.solve(puzzle, "propagate") != sudoku_engine.solve(puzzle, "dlx"):
+            print("FAIL: %s: propagate and dlx solutions differ" % name)
+            failed = True
+
+    print("\n%-10s %-10s %14s %12s" % ("op", "backend", "total nodes", "total ms"))
+    for (op, backend), (nodes, seconds) in totals.items():
+        print("%-10s %-10s %14d %12.1f" % (op, backend, nodes, seconds * 1e3))
+    print("(row-major solve skips %s)" % ", ".join(sorted(ROW_MAJOR_SLOW)))
+
+    for backend in BACKENDS:
+        rng = random.Random(0)
+        nodes, seconds = measure(lambda stats: [sudoku_engine.generate_solved_board(rng, backend, stats)
+                                                for _ in range(args.fills)])
+        print("fill      %-10s %14.1f %12.3f  (per grid)" % (backend, nodes / args.fills, seconds / args.fills * 1e3))
+
+    for name, backend in (("solve", "propagate"), ("count", "propagate")):
+        if totals[(name, backend)][0] >= totals[(name, "bitboard")][0]:
+            print("FAIL: %s with propagation takes no fewer nodes than the row-major backtracker" % name)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
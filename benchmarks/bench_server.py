@@ -0,0 +1,145 @@
+"""Load test for the puzzle server: requests/s and p50/p99 latency per endpoint
+
+Starts `python -m sudoku_engine.server` on a free port unless --url points
+at a running server, then keeps --concurrency keep-alive connections busy
+with a mix of solve, validate, hint and generate requests. Client-side
+latencies are reported next to the server's own histograms from /stats.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_server [--requests N] [--concurrency N] [--workers N] [--url URL]
+"""
+import argparse
+import asyncio
+import collections
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+import urllib.parse
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, ROW_MAJOR_SLOW, percentile
+
+
+async def request(reader, writer, method, path, payload=None):
+    """One request on an open keep-alive connection, returns (status, decoded JSON body)"""
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(("%s %s HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                  % (method, path, len(body))).encode() + body)
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(None, 2)[1])
+    length = int(re.search(rb"(?i)content-length:\s*(\d+)", head).group(1))
+    return status, json.loads(await reader.readexactly(length))
+
+
+def workload(count, rng):
+    """(endpoint, payload) pairs: mostly solve/validate/hint, with some easy and medium generation"""
+    puzzles = [line for name, line in PUZZLES.items() if name not in ROW_MAJOR_SLOW]
+    derived = [sudoku_engine.derive(difficulty, seed) for seed in range(20) for difficulty in ("easy", "medium")]
+    requests = []
+    for _ in range(count):
+        kind = rng.random()
+        puzzle, solution = rng.choice(derived)
+        if kind < 0.35:
+            requests.append(("/solve", {"puzzle": rng.choice(puzzles + [puzzle.to_line()])}))
+        elif kind < 0.65:
+            requests.append(("/validate", {"board": rng.choice((puzzle, solution)).to_line()}))
+        elif kind < 0.9:
+            requests.append(("/hint", {"board": puzzle.to_line(), "difficulty": rng.choice(("easy", "hard")),
+                                       "solution": solution.to_line()}))
+        else:
+            requests.append(("/generate", {"difficulty": rng.choice(("easy", "medium"))}))
+    return requests
+
+
+async def run_load(host, port, requests, concurrency):
+    """Sends the requests over `concurrency` connections, returns ({endpoint: [seconds]}, errors, elapsed)"""
+    queue = collections.deque(requests)
+    latencies = {}
+    errors = []
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while queue:
+                endpoint, payload = queue.popleft()
+                start = time.perf_counter()
+                status, body = await request(reader, writer, "POST", endpoint, payload)
+                latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+                if status != 200:
+                    errors.append((endpoint, status, body.get("error")))
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, "GET", "/stats"))[1]
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help="requests in the load run")
+    parser.add_argument('--concurrency', type=int, default=16, help="open connections sending requests")
+    parser.add_argument('--workers', type=int, default=None, help="server worker processes (default: CPU count)")
+    parser.add_argument('--url', default=None, help="load an already running server instead, e.g. http://host:8080")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        command = [sys.executable, "-m", "sudoku_engine.server", "--port", "0"]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, stderr=subprocess.PIPE, text=True)
+        banner = server.stderr.readline()
+        match = re.search(r"http://([^:]+):(\d+)", banner)
+        if not match:
+            server.kill()
+            print("FAIL: server did not start: %s" % banner.strip())
+            return 1
+        host, port = match.group(1), int(match.group(2))
+
+    try:
+        requests = workload(args.requests, random.Random(0))
+        # A short warm-up so worker start-up is not counted as latency
+        asyncio.run(run_load(host, port, requests[:args.concurrency * 2], args.concurrency))
+        latencies, errors, elapsed = asyncio.run(run_load(host, port, requests, args.concurrency))
+        stats = asyncio.run(fetch_stats(host, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print("%d requests over %d connections in %.2f s: %.0f requests/s\n" % (
+        len(requests), args.concurrency, elapsed, len(requests) / elapsed))
+    print("%-10s %8s %10s %10s %14s %14s" % ("endpoint", "count", "p50 ms", "p99 ms", "server p50 ms",
+                                             "server p99 ms"))
+    for endpoint, timings in sorted(latencies.items()):
+        timings.sort()
+        server_side = stats["endpoints"].get(endpoint, {})
+        print("%-10s %8d %10.2f %10.2f %14.2f %14.2f" % (
+            endpoint, len(timings), percentile(timings, 0.5) * 1e3, percentile(timings, 0.99) * 1e3,
+            (server_side.get("p50") or 0) * 1e3, (server_side.get("p99") or 0) * 1e3))
+
+    for endpoint, status, message in errors[:5]:
+        print("FAIL: %s answered %d: %s" % (endpoint, status, message))
+    if len(errors) > 5:
+        print("FAIL: %d more errors" % (len(errors) - 5))
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
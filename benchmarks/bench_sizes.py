@@ -0,0 +1,82 @@
+"""Generation, solving and game-side costs on 9x9, 16x16 and 25x25 boards
+
+16x16 games are generated while the player waits, so their p99 must stay
+interactive (--budget-16-ms). 25x25 games are a batch job with a looser
+budget (--budget-25-ms). Every puzzle is checked to have one solution, and
+the validator and hint scorer are timed on each size too.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sizes [--puzzles N] [--sizes 3,4,5] [--budget-16-ms MS] [--budget-25-ms MS]
+"""
+import argparse
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import percentile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--puzzles', type=int, default=10, help="puzzles per size and difficulty (25x25 gets a third)")
+    parser.add_argument('--sizes', default="3,4,5", help="box sizes to run: 3 is 9x9, 4 is 16x16, 5 is 25x25")
+    parser.add_argument('--budget-16-ms', type=float, default=2000.0, help="allowed p99 16x16 generation latency")
+    parser.add_argument('--budget-25-ms', type=float, default=60000.0, help="allowed p99 25x25 generation latency")
+    args = parser.parse_args(argv)
+    budgets = {4: args.budget_16_ms, 5: args.budget_25_ms}
+
+    failed = False
+    print("%-6s %-7s %8s %8s %8s %8s %6s %9s %9s %9s" % (
+        "size", "level", "fill ms", "dig ms", "p99 ms", "solve ms", "clues", "count ms", "valid us", "hints us"))
+    for box_size in (int(box) for box in args.sizes.split(",")):
+        size = box_size * box_size
+        puzzles = args.puzzles if box_size < 5 else max(1, args.puzzles // 3)
+        for difficulty in sudoku_engine.CELLS_TO_KEEP:
+            fills, totals, solves, counts, validations, hints, clues = [], [], [], [], [], [], []
+            for seed in range(puzzles):
+                stats = sudoku_engine.EngineStats()
+                start = time.perf_counter()
+                puzzle, solution = sudoku_engine.generate(difficulty, seed, stats=stats, box_size=box_size)
+                totals.append((time.perf_counter() - start) * 1e3)
+                fills.append(stats.phases["fill"] * 1e3)
+                clues.append(puzzle.count_filled())
+
+                start = time.perf_counter()
+                solved = sudoku_engine.solve_board(puzzle, backend="propagate")
+                solves.append((time.perf_counter() - start) * 1e3)
+                start = time.perf_counter()
+                found = sudoku_engine.count_solutions(puzzle, backend="propagate")
+                counts.append((time.perf_counter() - start) * 1e3)
+                if found != 1 or solved != solution:
+                    print("FAIL: %dx%d %s puzzle for seed %d has %d solutions" % (size, size, difficulty, seed,
+                                                                                  found))
+                    failed = True
+
+                rows = solution.to_rows()
+                start = time.perf_counter()
+                valid, _ = sudoku_engine.validate_grid(rows)
+                validations.append((time.perf_counter() - start) * 1e6)
+                if not valid:
+                    print("FAIL: %dx%d %s solution for seed %d does not validate" % (size, size, difficulty, seed))
+                    failed = True
+                start = time.perf_counter()
+                sudoku_engine.hint_scores(puzzle)
+                hints.append((time.perf_counter() - start) * 1e6)
+
+            totals.sort()
+            p99 = percentile(totals, 0.99)
+            mean_fill = sum(fills) / len(fills)
+            print("%-6s %-7s %8.1f %8.1f %8.1f %8.2f %6.0f %9.2f %9.1f %9.1f" % (
+                "%dx%d" % (size, size), difficulty, mean_fill, sum(totals) / len(totals) - mean_fill, p99,
+                sum(solves) / len(solves), sum(clues) / len(clues), sum(counts) / len(counts),
+                sum(validations) / len(validations), sum(hints) / len(hints)))
+            if box_size in budgets and p99 > budgets[box_size]:
+                print("FAIL: %dx%d %s p99 %.1f ms is over the %.1f ms budget" % (size, size, difficulty, p99,
+                                                                                  budgets[box_size]))
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
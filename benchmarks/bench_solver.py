@@ -0,0 +1,132 @@
+"""Compares the bitboard solver with the original is_valid based backtracker
+
+Run from the repository root:
+
+    python -m benchmarks.bench_solver [--fills N]
+"""
+import argparse
+import random
+import sys
+import time
+
+from sudoku_engine import BitboardSolver, Grid
+from benchmarks.corpus import PUZZLES, is_solved, parse
+
+
+def naive_find_empty(board):
+    for i in range(9):
+        for j in range(9):
+            if board[i][j] == 0:
+                return (i, j)
+    return None
+
+
+def naive_is_valid(board, row, col, num):
+    for j in range(9):
+        if board[row][j] == num and j != col:
+            return False
+    for i in range(9):
+        if board[i][col] == num and i != row:
+            return False
+    box_row, box_col = 3 * (row // 3), 3 * (col // 3)
+    for i in range(box_row, box_row + 3):
+        for j in range(box_col, box_col + 3):
+            if board[i][j] == num and (i, j) != (row, col):
+                return False
+    return True
+
+
+def naive_solve(board, rng):
+    """The solve_board implementation this solver replaced"""
+    empty = naive_find_empty(board)
+    if not empty:
+        return True
+    row, col = empty
+    for num in rng.sample(range(1, 10), 9):
+        if naive_is_valid(board, row, col, num):
+            board[row][col] = num
+            if naive_solve(board, rng):
+                return True
+            board[row][col] = 0
+    return False
+
+
+def naive_fill(board, rng):
+    rows = Grid.coerce(board).to_rows()
+    naive_solve(rows, rng)
+    return Grid.from_rows(rows)
+
+
+def bitboard_fill(board, rng):
+    solver = BitboardSolver(board)
+    solver.solve(rng)
+    return solver.grid()
+
+
+def time_fills(solve, count, seed):
+    """Fills `count` empty grids, returns (seconds, boards)"""
+    rng = random.Random(seed)
+    boards = []
+    start = time.perf_counter()
+    for _ in range(count):
+        boards.append(solve(Grid(), rng))
+    return time.perf_counter() - start, boards
+
+
+def time_puzzle(solve, line, seed, repeat):
+    """Solves a corpus puzzle `repeat` times, returns (seconds, last board)"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    puzzle = parse(line)
+    for _ in range(repeat):
+        board = solve(puzzle, rng)
+    return time.perf_counter() - start, board
+
+
+def best_of(runs, timer, *args):
+    """The fastest of several (seconds, result) runs"""
+    return min((timer(*args) for _ in range(runs)), key=lambda run: run[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fills', type=int, default=200, help="empty grids to fill per solver")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--min-speedup', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    results = []
+    # Best of three runs, to keep scheduler noise out of the ratios
+    naive_time, naive_boards = best_of(3, time_fills, naive_fill, args.fills, args.seed)
+    fast_time, fast_boards = best_of(3, time_fills, bitboard_fill, args.fills, args.seed)
+    for board in fast_boards:
+        if not is_solved(board):
+            print("FAIL: bitboard solver filled an invalid grid")
+            return 1
+    results.append(("fill x%d" % args.fills, naive_time, fast_time))
+
+    # The naive solver takes minutes on the hardest corpus entries, so stick to these
+    for name, repeat in (("norvig_easy", 50), ("ai_escargot", 3)):
+        naive_time, naive_board = best_of(3, time_puzzle, naive_fill, PUZZLES[name], args.seed, repeat)
+        fast_time, fast_board = best_of(3, time_puzzle, bitboard_fill, PUZZLES[name], args.seed, repeat)
+        if naive_board != fast_board:
+            print("FAIL: solvers disagree on %s" % name)
+            return 1
+        results.append(("%s x%d" % (name, repeat), naive_time, fast_time))
+
+    print("%-16s %12s %12s %9s" % ("case", "naive (s)", "bitboard (s)", "speedup"))
+    worst = float('inf')
+    for name, naive_time, fast_time in results:
+        speedup = naive_time / fast_time
+        worst = min(worst, speedup)
+        print("%-16s %12.4f %12.4f %8.1fx" % (name, naive_time, fast_time, speedup))
+
+    if worst < args.min_speedup:
+        print("FAIL: slowest case is %.1fx, expected at least %.1fx" % (worst, args.min_speedup))
+        return 1
+    print("OK: at least %.1fx faster in every case" % worst)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
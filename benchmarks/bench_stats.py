@@ -0,0 +1,128 @@
+"""Cost of instrumentation: engine calls with stats off, on, and without the stats hooks
+
+"direct" is the code path as it was before instrumentation: the plain
+solver class, and is_valid without its stats check. With stats off the
+entry points should cost the same as direct.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_stats [--rounds N] [--max-overhead FRACTION]
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, parse
+
+
+def direct_is_valid(board, row, col, num):
+    """is_valid without the stats argument"""
+    for j in range(9):
+        if board[row][j] == num and j != col:
+            return False
+    for i in range(9):
+        if board[i][col] == num and i != row:
+            return False
+    box_row, box_col = 3 * (row // 3), 3 * (col // 3)
+    for i in range(box_row, box_row + 3):
+        for j in range(box_col, box_col + 3):
+            if board[i][j] == num and (i, j) != (row, col):
+                return False
+    return True
+
+
+def direct_solve(puzzle):
+    solver = sudoku_engine.BitboardSolver(puzzle)
+    solver.solve(None)
+    return solver.grid()
+
+
+def best_times(variants, rounds):
+    """Runs the variants in turn `rounds` times so drift hits them alike, returns the fastest time of each"""
+    best = dict.fromkeys(variants)
+    order = list(variants.items())
+    gc.disable()  # As timeit does, so a collection does not land in one variant's run
+    try:
+        for _ in range(rounds):
+            random.shuffle(order)
+            for name, function in order:
+                start = time.perf_counter()
+                function()
+                elapsed = time.perf_counter() - start
+                best[name] = elapsed if best[name] is None else min(best[name], elapsed)
+    finally:
+        gc.enable()
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=200, help="interleaved short runs per variant, the fastest counts")
+    parser.add_argument('--max-overhead', type=float, default=0.05,
+                        help="fail when stats off is slower than direct by more than this fraction")
+    args = parser.parse_args(argv)
+
+    # Short runs, so some of the many rounds miss any background load entirely
+    puzzles = [parse(PUZZLES[name]) for name in ("norvig_easy", "ai_escargot")]
+    boards = [puzzles[0], sudoku_engine.generate_solved_board(random.Random(0))]
+    probes = [(board, row, col, num) for board in boards for row in range(9) for col in range(9) for num in (1, 9)]
+
+    def solve(stats_factory):
+        def run():
+            for puzzle in puzzles:
+                sudoku_engine.solve(puzzle, stats=stats_factory())
+        return run
+
+    def valid(stats):
+        def run(is_valid=sudoku_engine.is_valid):
+            for board, row, col, num in probes:
+                is_valid(board, row, col, num, stats)
+        return run
+
+    def generate(stats_factory):
+        def run():
+            sudoku_engine.generate("easy", 0, stats=stats_factory())
+        return run
+
+    def direct_solve_all():
+        for puzzle in puzzles:
+            direct_solve(puzzle)
+
+    def direct_valid_all(is_valid=direct_is_valid):
+        for board, row, col, num in probes:
+            is_valid(board, row, col, num)
+
+    groups = {
+        "solve": ({"direct": direct_solve_all, "off": solve(lambda: None)}, solve(sudoku_engine.EngineStats)),
+        "is_valid": ({"direct": direct_valid_all, "off": valid(None)}, valid(sudoku_engine.EngineStats())),
+        "generate": ({"off": generate(lambda: None)}, generate(sudoku_engine.EngineStats)),
+    }
+
+    # Stats off is timed before any instrumented class has run, as in a game that never turns stats on
+    best = {path: best_times(variants, args.rounds) for path, (variants, _) in groups.items()}
+    for path, (_, on) in groups.items():
+        best[path]["on"] = best_times({"on": on}, args.rounds)["on"]
+
+    failed = False
+    print("%-10s %12s %12s %12s %10s %10s" % ("path", "direct ms", "off ms", "on ms", "off cost", "on cost"))
+    for path, times in best.items():
+        reference = times.get("direct", times["off"])
+        off_cost = times["off"] / reference - 1
+        print("%-10s %12s %12.3f %12.3f %+9.1f%% %+9.1f%%" % (
+            path, "%.3f" % (times["direct"] * 1e3) if "direct" in times else "-", times["off"] * 1e3,
+            times["on"] * 1e3, off_cost * 100, (times["on"] / reference - 1) * 100))
+        if off_cost > args.max_overhead:
+            print("FAIL: %s with stats off costs %.1f%% over direct" % (path, off_cost * 100))
+            failed = True
+
+    stats = sudoku_engine.EngineStats()
+    sudoku_engine.generate("hard", 1, stats=stats)
+    print("\nOne hard generate:\n" + stats.to_prometheus())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Packed puzzle store: bulk write rate, open time, RSS and random fetch latency as the store grows
+
+Stores are built in a temporary directory by appending the same batch of
+derived puzzles until they reach each size, so building a million records
+takes seconds rather than hours of generation. Opening a store and drawing
+from it should cost the same at every size.
+
+RSS is split as Linux reports it: "anon" is the process's own memory and
+should not grow with the store; "file" is mapped store pages the fetches
+touched, page cache the kernel can drop at any time.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_store [--sizes N,N,...] [--fetches N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import sudoku_engine
+
+
+def rss_kb():
+    """(anonymous, file-backed) resident KB of this process from /proc, None where there is no /proc"""
+    fields = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("RssAnon:", "RssFile:")):
+                    fields[line.split(":")[0]] = int(line.split()[1])
+    except OSError:
+        return None
+    return fields.get("RssAnon", 0), fields.get("RssFile", 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default="10000,100000,1000000", help="comma-separated store sizes in records")
+    parser.add_argument('--batch', type=int, default=1000, help="distinct derived puzzles per appended batch")
+    parser.add_argument('--fetches', type=int, default=10000, help="random fetches timed per size")
+    parser.add_argument('--max-fetch-us', type=float, default=50.0, help="fail when a random fetch is slower")
+    parser.add_argument('--max-anon-kb', type=int, default=1024,
+                        help="fail when opening and reading a store grows anonymous memory by more")
+    args = parser.parse_args(argv)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    rng = random.Random(0)
+    difficulties = list(sudoku_engine.CELLS_TO_KEEP)
+    batch = []
+    for i in range(args.batch):
+        difficulty = difficulties[i % len(difficulties)]
+        batch.append((difficulty,) + sudoku_engine.derive(difficulty, rng.getrandbits(64)))
+
+    failed = False
+    print("%-10s %12s %10s %10s %10s %12s %12s" % ("records", "write rec/s", "file MB", "open us", "fetch us",
+                                                   "anon +KB", "file +KB"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "puzzles.pk")
+        write_time = 0.0
+        written = 0
+        with sudoku_engine.PuzzleStoreWriter(path) as writer:
+            for size in sizes:
+                while writer.count < size:
+                    entries = batch[:size - writer.count]
+                    start = time.perf_counter()
+                    writer.extend(entries)
+                    write_time += time.perf_counter() - start
+                    written += len(entries)
+
+                rss_before = rss_kb()
+                start = time.perf_counter()
+                store = sudoku_engine.PuzzleStore(path)
+                open_time = time.perf_counter() - start
+
+                fetch_rng = random.Random(size)
+                start = time.perf_counter()
+                for i in range(args.fetches):
+                    store.random(difficulties[i % len(difficulties)], fetch_rng)
+                fetch_time = (time.perf_counter() - start) / args.fetches
+                rss_after = rss_kb()
+
+                # Every record reads back as the pair written to it
+                for record in (0, size // 2, size - 1):
+                    difficulty, puzzle, solution = store.get(record)
+                    if (difficulty, puzzle, solution) != batch[record % len(batch)]:
+                        print("FAIL: record %d of %d did not read back as written" % (record, size))
+                        failed = True
+                for difficulty in difficulties:
+                    expected = sum(1 for record in range(size) if batch[record % len(batch)][0] == difficulty)
+                    if store.count_of(difficulty) != expected:
+                        print("FAIL: %s index holds %d records, expected %d"
+                              % (difficulty, store.count_of(difficulty), expected))
+                        failed = True
+                store.close()
+
+                anon, mapped = ("-", "-") if rss_before is None else (
+                    rss_after[0] - rss_before[0], rss_after[1] - rss_before[1])
+                print("%-10d %12.0f %10.1f %10.1f %10.2f %12s %12s" % (
+                    size, written / write_time, os.path.getsize(path) / 1e6, open_time * 1e6, fetch_time * 1e6,
+                    anon, mapped))
+                if rss_before is not None and anon > args.max_anon_kb:
+                    print("FAIL: reading %d records grew anonymous memory by %d KB" % (size, anon))
+                    failed = True
+                if fetch_time * 1e6 > args.max_fetch_us:
+                    print("FAIL: random fetch at %d records takes %.1f us" % (size, fetch_time * 1e6))
+                    failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
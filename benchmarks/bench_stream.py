@@ -0,0 +1,142 @@
+"""Streaming export: records/s per format, memory over a long stream, and backpressure
+
+The long stream writes --count derived puzzles as JSONL to /dev/null and
+samples this process's anonymous RSS along the way. It fails if RSS grows
+by more than --max-growth-kb after the first tenth. Pass
+--count 10000000 for the full ten-million-record run.
+
+The pooled stream must give the same records as the inline one for the
+same seed, all of them, whatever the chunk size.
+
+The backpressure check streams across a process pool, stops pulling
+records for a second, and measures the CPU time the workers spend
+meanwhile. A stream that only refills its window when the consumer takes
+a chunk leaves them idle; an eager one would keep them busy all along.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_stream [--count N] [--max-growth-kb KB] [--workers N]
+"""
+import argparse
+import io
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+import sudoku_engine
+
+
+def anon_rss_kb():
+    """Anonymous resident KB of this process from /proc, None where there is no /proc"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def children_cpu_seconds():
+    """User plus system CPU seconds used so far by this process's live children"""
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0
+    for child in multiprocessing.active_children():
+        try:
+            with open("/proc/%d/stat" % child.pid) as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])  # utime and stime
+    return total / ticks
+
+
+def sampled(records, every, samples):
+    """Passes records through, appending (count, anonymous RSS) every `every` records"""
+    for count, record in enumerate(records, 1):
+        if count % every == 0:
+            samples.append((count, anon_rss_kb()))
+        yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000, help="records in the long stream")
+    parser.add_argument('--max-growth-kb', type=int, default=1024, help="allowed RSS growth after the first tenth")
+    parser.add_argument('--workers', type=int, default=2, help="pool size in the backpressure check")
+    parser.add_argument('--sample', type=int, default=5000, help="records timed per format")
+    args = parser.parse_args(argv)
+
+    failed = False
+    print("%-8s %12s %14s" % ("format", "records/s", "bytes/record"))
+    for name, exporter in sorted(sudoku_engine.EXPORTERS.items()):
+        out = io.StringIO()
+        start = time.perf_counter()
+        exporter(sudoku_engine.stream_puzzles("hard", args.sample, seed=0, derived=True), out)
+        elapsed = time.perf_counter() - start
+        print("%-8s %12.0f %14.1f" % (name, args.sample / elapsed, len(out.getvalue()) / args.sample))
+
+    # Generation proper, for scale: this is what a content pipeline pays per puzzle
+    start = time.perf_counter()
+    sudoku_engine.write_jsonl(sudoku_engine.stream_puzzles("medium", 20, seed=0), io.StringIO())
+    print("%-8s %12.1f %14s  (generated rather than derived)" % ("jsonl", 20 / (time.perf_counter() - start), ""))
+
+    samples = []
+    every = max(1, args.count // 20)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as out:
+        written = sudoku_engine.write_jsonl(
+            sampled(sudoku_engine.stream_puzzles("hard", args.count, seed=1, derived=True), every, samples), out)
+    elapsed = time.perf_counter() - start
+    print("\nstreamed %d records in %.1f s (%.0f records/s)" % (written, elapsed, written / elapsed))
+    if written != args.count:
+        print("FAIL: wrote %d records, expected %d" % (written, args.count))
+        failed = True
+    if samples and samples[0][1] is not None:
+        settled = [rss for count, rss in samples if count >= args.count // 10]
+        growth = max(settled) - settled[0]
+        print("anonymous RSS: %d KB after the first tenth, %d KB at most later, growth %d KB" % (
+            settled[0], max(settled), growth))
+        if growth > args.max_growth_kb:
+            print("FAIL: RSS grew %d KB while streaming, over %d KB" % (growth, args.max_growth_kb))
+            failed = True
+    else:
+        print("no /proc here, memory not sampled")
+
+    # Across a pool, records come out whole and in the inline stream's order
+    inline = io.StringIO()
+    sudoku_engine.write_jsonl(sudoku_engine.stream_puzzles("easy", 50, seed=3, derived=True), inline)
+    print()
+    for chunk_size in (1, 7, 16, 50, 64):
+        pooled = io.StringIO()
+        written = sudoku_engine.write_jsonl(sudoku_engine.stream_puzzles(
+            "easy", 50, seed=3, workers=args.workers, chunk_size=chunk_size, derived=True), pooled)
+        same = pooled.getvalue() == inline.getvalue()
+        print("%d workers, chunks of %2d: %d of 50 records, %s the inline stream" % (
+            args.workers, chunk_size, written, "same as" if same else "differing from"))
+        if written != 50 or not same:
+            print("FAIL: the pooled stream lost or changed records")
+            failed = True
+
+    records = sudoku_engine.stream_puzzles("hard", None, seed=2, workers=args.workers, derived=True)
+    for _ in range(200):
+        next(records)
+    time.sleep(0.2)  # Let the refilled window finish
+    before = children_cpu_seconds()
+    time.sleep(1.0)
+    idle_cpu = children_cpu_seconds() - before
+    taken = sum(1 for _ in itertools.islice(records, 200))
+    records.close()
+    print("\nworkers' CPU time while the consumer paused for 1 s: %.3f s (%d records taken after)" % (
+        idle_cpu, taken))
+    if idle_cpu > 0.1:
+        print("FAIL: workers kept generating while nothing was consumed")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Timing of every engine hot path, with JSON results and a regression check against a baseline
+
+Each case runs a fixed workload from fixed seeds and the shared corpus,
+known-hard puzzles included, and the fastest of its runs counts. The
+cases time the engine functions the game calls into: SudokuBoard.solve_board
+is solve_board, New Game's digging is dig, and the hint methods are
+hint_score and select_hint_cell. No display is needed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite                      # compare with benchmarks/baseline.json
+    python -m benchmarks.bench_suite --json results.json  # also write the results
+    python -m benchmarks.bench_suite --save-baseline      # record this machine's baseline
+
+Baselines are only comparable on the machine that recorded them.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import sudoku_engine
+from benchmarks.corpus import PUZZLES, ROW_MAJOR_SLOW, parse
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def build_cases():
+    """{name: (function, calls)}: each function runs `calls` operations of its hot path"""
+    puzzles = {name: parse(line) for name, line in PUZZLES.items()}
+    solutions = [sudoku_engine.generate_solved_board(random.Random(seed)) for seed in range(20)]
+    cases = {}
+
+    for name, puzzle in puzzles.items():
+        if name not in ROW_MAJOR_SLOW:
+            cases["solve_board/" + name] = (lambda puzzle=puzzle: sudoku_engine.solve(puzzle), 1)
+        cases["solve_board_dlx/" + name] = (lambda puzzle=puzzle: sudoku_engine.solve(puzzle, "dlx"), 1)
+
+    def fill():
+        rng = random.Random(0)
+        for _ in range(50):
+            sudoku_engine.generate_solved_board(rng)
+    cases["generate_solved_board"] = (fill, 50)
+
+    for difficulty, cells_to_keep in sudoku_engine.CELLS_TO_KEEP.items():
+        def dig(cells_to_keep=cells_to_keep):
+            rng = random.Random(cells_to_keep)
+            for solution in solutions:
+                sudoku_engine.dig(solution, cells_to_keep, rng)
+        cases["dig/" + difficulty] = (dig, len(solutions))
+
+    boards = list(puzzles.values()) + solutions
+    probes = [(board, row, col, num) for board in boards for row in range(9) for col in range(0, 9, 2)
+              for num in (1, 5, 9)]
+
+    def valid():
+        for board, row, col, num in probes:
+            sudoku_engine.is_valid(board, row, col, num)
+    cases["is_valid"] = (valid, len(probes))
+
+    def score():
+        for puzzle in puzzles.values():
+            sudoku_engine.hint_scores(puzzle)
+    cases["hint_score"] = (score, len(puzzles))
+
+    scores = [sudoku_engine.hint_scores(puzzle) for puzzle in puzzles.values()]
+
+    def select():
+        for cell_scores in scores:
+            for difficulty in sudoku_engine.CELLS_TO_KEEP:
+                sudoku_engine.select_hint_cell(cell_scores, difficulty)
+    cases["select_hint_cell"] = (select, len(scores) * len(sudoku_engine.CELLS_TO_KEEP))
+    return cases
+
+
+def run(cases, repeat, min_time):
+    """Times each case, returns {name: microseconds per call}
+
+    A case runs at least `repeat` times and until `min_time` seconds have
+    gone by, so quick cases get enough samples for the fastest to be stable.
+    """
+    results = {}
+    for name, (function, calls) in cases.items():
+        best = None
+        runs = 0
+        started = time.perf_counter()
+        while runs < repeat or time.perf_counter() - started < min_time:
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            runs += 1
+        results[name] = best / calls * 1e6
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="fewest runs per case, the fastest counts")
+    parser.add_argument('--min-time', type=float, default=0.5, help="fewest seconds spent on each case")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON to compare with")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="fail when a case is slower than the baseline by more than this fraction")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--only', help="run only cases whose name starts with this")
+    args = parser.parse_args(argv)
+
+    cases = build_cases()
+    if args.only:
+        cases = {name: case for name, case in cases.items() if name.startswith(args.only)}
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "unit": "us/call",
+        "results": run(cases, args.repeat, args.min_time),
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    failed = False
+    print("%-34s %12s %12s %8s" % ("case", "us/call", "baseline", "change"))
+    for name, micros in report["results"].items():
+        if name not in baseline:
+            print("%-34s %12.2f %12s %8s" % (name, micros, "-", "-"))
+            continue
+        change = micros / baseline[name] - 1
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSED"
+            failed = True
+        print("%-34s %12.2f %12.2f %+7.0f%%%s" % (name, micros, baseline[name], change * 100, flag))
+
+    if failed:
+        print("FAIL: cases slower than the baseline by more than %.0f%%" % (args.threshold * 100))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Search nodes per dug puzzle: uniqueness checks with and without a transposition cache
+
+Each solved grid is dug as far as it goes three ways, all removing clues
+in the same order:
+
+- "other digits": the default check, which tries every other digit in
+  the emptied cell on the bitboard backend (propagate on 16x16);
+- "count": counts the whole puzzle's solutions up to two on the
+  propagating backend, remembering nothing;
+- "count+cache": the same counts sharing a TranspositionCache, which is
+  what dig(..., cache=...) does.
+
+The three must dig the same puzzle. Nodes are the recursive search calls
+counted by EngineStats. A cache hit saves the whole subtree under it, so
+a low hit rate can still cut many nodes. On 9x9 singles settle almost
+every check before any branching, so there is little to remember; the
+16x16 grids (--large) are dug by full uniqueness checks here, not by the
+singles-only digging generate uses for them, to give the cache search
+trees to share. The capped run repeats the 9x9 digs with --max-entries to
+show eviction.
+
+First it checks that the Zobrist key table has one row per cell and one
+key per digit plus the unused 0, for every board size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_transposition [--grids N] [--large N] [--max-entries N]
+"""
+import argparse
+import random
+import sys
+import time
+
+import sudoku_engine
+from sudoku_engine.generator import _removals
+from sudoku_engine.transposition import zobrist_keys
+
+VARIANTS = ("other digits", "count", "count+cache")
+
+
+class Uncached(sudoku_engine.TranspositionCache):
+    """A cache that never remembers, for counting without one"""
+
+    def lookup(self, key, limit):
+        return None
+
+    def store(self, key, found, limit):
+        pass
+
+
+def dig_all(solution, seed, cache, stats):
+    """The puzzle left once no clue can go, dug in the order `seed` gives
+
+    Goes through _removals, as dig() does for 9x9, so 16x16 grids get
+    full uniqueness checks too.
+    """
+    puzzle = solution
+    for _, puzzle in _removals(solution, random.Random(seed), "bitboard", stats, cache):
+        pass
+    return puzzle
+
+
+def run(solutions, variants, max_entries=None):
+    """{variant: [nodes, seconds, hits, lookups, evictions, peak entries]} over all the grids, and a failure flag"""
+    totals = {variant: [0, 0.0, 0, 0, 0, 0] for variant in variants}
+    failed = False
+    for seed, solution in enumerate(solutions):
+        dug = {}
+        for variant in variants:
+            cache = {"other digits": None, "count": Uncached(),
+                     "count+cache": sudoku_engine.TranspositionCache(max_entries)}[variant]
+            stats = sudoku_engine.EngineStats()
+            start = time.perf_counter()
+            dug[variant] = dig_all(solution, seed, cache, stats)
+            total = totals[variant]
+            total[0] += stats.nodes
+            total[1] += time.perf_counter() - start
+            if variant == "count+cache":
+                total[2] += cache.hits
+                total[3] += cache.hits + cache.misses
+                total[4] += cache.evictions
+                total[5] = max(total[5], len(cache))
+        if len(set(dug.values())) != 1:
+            print("FAIL: grid %d dug to different puzzles: %s" % (seed, {v: p.count_filled() for v, p in dug.items()}))
+            failed = True
+    return totals, failed
+
+
+def report(label, totals, grids):
+    print("\n%s, %d grid%s" % (label, grids, "" if grids == 1 else "s"))
+    print("%-14s %14s %12s %10s %10s %10s" % ("check", "nodes/puzzle", "ms/puzzle", "hit rate", "evictions",
+                                             "entries"))
+    for variant, (nodes, seconds, hits, lookups, evictions, entries) in totals.items():
+        cached = variant == "count+cache"
+        hit_rate = "%.3f" % (hits / lookups if lookups else 0)
+        print("%-14s %14.1f %12.1f %10s %10s %10s" % (variant, nodes / grids, seconds / grids * 1e3,
+                                                      hit_rate if cached else "-", evictions if cached else "-",
+                                                      entries if cached else "-"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--grids', type=int, default=20, help="9x9 solved grids dug")
+    parser.add_argument('--large', type=int, default=1, help="16x16 solved grids dug (about 90 s each)")
+    parser.add_argument('--max-entries', type=int, default=50, help="cache cap in the capped run")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for box_size in (2, 3, 4, 5):
+        size = box_size * box_size
+        zobrist_keys.cache_clear()
+        start = time.perf_counter()
+        keys = zobrist_keys(box_size)
+        elapsed = time.perf_counter() - start
+        print("%dx%d Zobrist keys: %d cells x %d digits in %.1f ms" % (
+            size, size, len(keys), len(keys[0]), elapsed * 1e3))
+        if len(keys) != size * size or any(len(row) != size + 1 for row in keys):
+            print("FAIL: %dx%d needs %d rows of %d keys" % (size, size, size * size, size + 1))
+            failed = True
+
+    for label, box_size, grids in (("9x9", 3, args.grids), ("16x16", 4, args.large)):
+        if not grids:
+            continue
+        rng = random.Random(box_size)
+        solutions = [sudoku_engine.generate_solved_board(rng, "propagate", box_size=box_size) for _ in range(grids)]
+        totals, grid_failed = run(solutions, VARIANTS)
+        failed |= grid_failed
+        report(label, totals, grids)
+        if totals["count+cache"][0] > totals["count"][0]:
+            print("FAIL: %s: the cache adds search nodes" % label)
+            failed = True
+
+    if args.grids:
+        rng = random.Random(3)
+        solutions = [sudoku_engine.generate_solved_board(rng, "propagate") for _ in range(args.grids)]
+        totals, grid_failed = run(solutions, ("count+cache",), args.max_entries)
+        failed |= grid_failed
+        report("9x9 with the cache capped at %d entries" % args.max_entries, totals, args.grids)
+        if totals["count+cache"][5] > args.max_entries:
+            print("FAIL: the cache held more than %d entries" % args.max_entries)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
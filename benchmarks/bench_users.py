@@ -0,0 +1,167 @@
+"""Account store: login latency per hash cost, bulk import rate, validators and indexed lookup
+
+A cost "holds" when its p99 login stays under --max-login-ms and the
+machine's cores can verify --peak logins per second at no more than 50%
+load. The highest cost that holds is the one to configure.
+
+The import is timed at a low cost (--import-iterations) so it measures
+the pool, validation and insert pipeline; at a real cost hashing
+dominates, and the report estimates that from the login timings.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_users [--costs N,N,...] [--peak LOGINS_PER_S] [--accounts N]
+"""
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import percentile
+from sudoku_engine import users
+
+
+def legacy_validate_username(username):
+    """SignupScreen.validate_username as it was: import and pattern lookup on every call"""
+    import re
+    pattern = r'^[a-zA-Z][a-zA-Z0-9_]{3,19}$'
+    return bool(re.match(pattern, username))
+
+
+def legacy_validate_password(password):
+    """SignupScreen.validate_password as it was"""
+    import re
+    if not (8 <= len(password) <= 30):
+        return False
+    if not re.search(r'[A-Z]', password):
+        return False
+    if not re.search(r'[a-z]', password):
+        return False
+    if not re.search(r'\d', password):
+        return False
+    if not re.search(r'[!@#$%^&*]', password):
+        return False
+    return True
+
+
+def make_accounts(count, rng):
+    """(username, password) rows: mostly valid, with some invalid and some repeated usernames"""
+    accounts = []
+    for i in range(count):
+        username = "player_%d" % i
+        password = "Aa1!" + "".join(rng.choice(string.ascii_letters) for _ in range(8))
+        kind = rng.random()
+        if kind < 0.05:
+            password = password.lower()  # No upper case letter
+        elif kind < 0.1:
+            username = "9" + username  # Starts with a digit
+        elif kind < 0.15 and accounts:
+            username = accounts[rng.randrange(len(accounts))][0]
+        accounts.append((username, password))
+    return accounts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--costs', default="100000,300000,600000,1000000", help="PBKDF2 iteration counts to time")
+    parser.add_argument('--logins', type=int, default=6, help="timed logins per cost")
+    parser.add_argument('--peak', type=float, default=1.0, help="expected peak logins per second")
+    parser.add_argument('--cores', type=int, default=os.cpu_count() or 1, help="cores verifying logins")
+    parser.add_argument('--max-login-ms', type=float, default=1000.0, help="p99 login latency a cost must stay under")
+    parser.add_argument('--accounts', type=int, default=20000, help="accounts in the bulk import")
+    parser.add_argument('--import-iterations', type=int, default=100, help="hash cost during the timed import")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="import worker processes")
+    args = parser.parse_args(argv)
+    costs = sorted(int(cost) for cost in args.costs.split(","))
+
+    failed = False
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        print("%-10s %10s %10s %14s %8s" % ("cost", "p50 ms", "p99 ms", "logins/s cap", "holds"))
+        holding = None
+        mean_login = {}
+        for cost in costs:
+            with users.UserStore(os.path.join(tmp, "cost_%d.db" % cost), cost) as store:
+                store.add_user("player_one", "Secret1!pass")
+                timings = []
+                for i in range(args.logins):
+                    # Alternate right and wrong passwords and unknown users; all should cost the same
+                    username, password = [("player_one", "Secret1!pass"), ("player_one", "Wrong1!pass"),
+                                          ("nobody_here", "Secret1!pass")][i % 3]
+                    start = time.perf_counter()
+                    ok = store.verify(username, password)
+                    timings.append(time.perf_counter() - start)
+                    if ok != (i % 3 == 0):
+                        print("FAIL: verify(%r) returned %r at cost %d" % (username, ok, cost))
+                        failed = True
+            timings.sort()
+            mean_login[cost] = sum(timings) / len(timings)
+            capacity = args.cores / mean_login[cost]
+            holds = percentile(timings, 0.99) * 1e3 <= args.max_login_ms and capacity * 0.5 >= args.peak
+            if holds:
+                holding = cost
+            print("%-10d %10.1f %10.1f %14.1f %8s" % (cost, percentile(timings, 0.5) * 1e3,
+                                                       percentile(timings, 0.99) * 1e3, capacity,
+                                                       "yes" if holds else "no"))
+        if holding is None:
+            print("FAIL: no cost holds %.1f logins/s on %d cores" % (args.peak, args.cores))
+            failed = True
+        else:
+            print("highest cost holding %.1f logins/s on %d cores: %d (default %d)" % (
+                args.peak, args.cores, holding, users.DEFAULT_ITERATIONS))
+
+        # Validators, precompiled against the signup screen's per-call versions
+        samples = make_accounts(5000, rng)
+        for label, check_user, check_password in (("per-call", legacy_validate_username, legacy_validate_password),
+                                                  ("precompiled", users.validate_username,
+                                                   users.validate_password)):
+            start = time.perf_counter()
+            verdicts = [(check_user(username), check_password(password)) for username, password in samples]
+            elapsed = time.perf_counter() - start
+            print("%-12s validators: %6.2f us per account" % (label, elapsed / len(samples) * 1e6))
+            if label == "per-call":
+                expected = verdicts
+            elif verdicts != expected:
+                print("FAIL: precompiled validators disagree with the originals")
+                failed = True
+
+        accounts = make_accounts(args.accounts, rng)
+        expected_invalid = sum(1 for username, password in accounts
+                               if not (users.validate_username(username) and users.validate_password(password)))
+        expected_imported = len({username for username, password in accounts
+                                 if users.validate_username(username) and users.validate_password(password)})
+        with users.UserStore(os.path.join(tmp, "import.db")) as store:
+            start = time.perf_counter()
+            result = store.import_users(accounts, args.workers, iterations=args.import_iterations)
+            elapsed = time.perf_counter() - start
+            print("\nimport of %d accounts at cost %d: %.2f s, %.0f accounts/s (%d imported, %d duplicates, "
+                  "%d invalid)" % (len(accounts), args.import_iterations, elapsed, len(accounts) / elapsed,
+                                   result.imported, result.duplicates, len(result.invalid)))
+            if (result.imported, len(result.invalid)) != (expected_imported, expected_invalid):
+                print("FAIL: expected %d imported and %d invalid" % (expected_imported, expected_invalid))
+                failed = True
+            if users.DEFAULT_ITERATIONS in mean_login:
+                workers = args.workers or os.cpu_count() or 1
+                print("at cost %d the hashing alone would take about %.0f s on %d workers" % (
+                    users.DEFAULT_ITERATIONS, len(accounts) * mean_login[users.DEFAULT_ITERATIONS] / workers, workers))
+
+            plan = " ".join(str(row) for row in store._db.execute(
+                "EXPLAIN QUERY PLAN SELECT password_hash FROM users WHERE username = ?", ("player_1",)))
+            usernames = [username for username, _ in accounts[:2000]]
+            start = time.perf_counter()
+            for username in usernames:
+                store.exists(username)
+            lookup = (time.perf_counter() - start) / len(usernames)
+            print("username lookup in %d accounts: %.1f us" % (len(store), lookup * 1e6))
+            if not re.search(r"USING (COVERING )?INDEX users_username", plan):
+                print("FAIL: username lookups do not use the index: %s" % plan)
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Vectorised batch validation versus a per-grid Python loop
+
+Run from the repository root (needs NumPy):
+
+    python -m benchmarks.bench_validate [--grids N]
+"""
+import argparse
+import random
+import sys
+import time
+
+import sudoku_engine
+from sudoku_engine.validate import validate_batch, validate_grid
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def make_grids(count, seed):
+    """Tiles freshly generated grids up to `count` and corrupts about a tenth of them"""
+    rng = random.Random(seed)
+    solved = [sudoku_engine.generate_solved_board(rng) for _ in range(min(count, 500))]
+    grids = np.array([solved[k % len(solved)].to_rows() for k in range(count)], dtype=np.uint8)
+    for n in rng.sample(range(count), count // 10):
+        grids[n, rng.randrange(9), rng.randrange(9)] = rng.randrange(10)
+    return grids
+
+
+def check_solution_loop(board):
+    """The per-cell check SudokuBoard.check_solution does, on a plain board"""
+    for i in range(9):
+        for j in range(9):
+            num = board[i][j]
+            if not 1 <= num <= 9 or not sudoku_engine.is_valid(board, i, j, num):
+                return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--grids', type=int, default=200000)
+    parser.add_argument('--loop-grids', type=int, default=5000, help="grids timed with the Python loop")
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args(argv)
+    if np is None:
+        print("SKIP: NumPy is not installed")
+        return 0
+
+    grids = make_grids(args.grids, args.seed)
+    sample = grids[:args.loop_grids]
+    boards = sample.tolist()
+
+    start = time.perf_counter()
+    for board in boards:
+        check_solution_loop(board)
+    cell_loop_per_grid = (time.perf_counter() - start) / len(boards)
+
+    start = time.perf_counter()
+    loop_results = [validate_grid(board) for board in boards]
+    loop_per_grid = (time.perf_counter() - start) / len(boards)
+
+    start = time.perf_counter()
+    valid, conflicts = validate_batch(grids)
+    batch_per_grid = (time.perf_counter() - start) / len(grids)
+
+    for n, (ok, conflict) in enumerate(loop_results):
+        if ok != valid[n] or (conflict or (-1, -1)) != tuple(conflicts[n]):
+            print("FAIL: grid %d: loop says %s %s, batch says %s %s" % (
+                n, ok, conflict, valid[n], tuple(conflicts[n])))
+            return 1
+
+    print("invalid grids: %d of %d" % ((~valid).sum(), len(grids)))
+    for label, per_grid in (("per-cell is_valid loop", cell_loop_per_grid),
+                            ("validate_grid loop", loop_per_grid),
+                            ("validate_batch", batch_per_grid)):
+        print("%-24s %10.3f us/grid %12.0f grids/s %9.1fx" % (
+            label, per_grid * 1e6, 1 / per_grid, per_grid / batch_per_grid))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""Fixed puzzle corpus and helpers shared by the benchmarks"""
+from sudoku_engine import from_line
+
+# 81-character puzzles, '.' marks an empty cell. Every entry has exactly one solution.
+PUZZLES = {
+    "norvig_easy": "..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3..",
+    "ai_escargot": "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+    "easter_monster": "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    "inkala_2012": "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    # Built so that a row-major backtracker needs minutes to find the first solution
+    "anti_backtracking": "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9",
+}
+
+# Entries the row-major bitboard solve() should not be timed on
+ROW_MAJOR_SLOW = {"anti_backtracking"}
+
+
+def parse(line):
+    """Turns an 81-character puzzle line into a Grid"""
+    return from_line(line)
+
+
+def percentile(values, fraction):
+    """The value `fraction` of the way up the values in sorted order, e.g. 0.99 for the p99"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def is_solved(board):
+    """Every row, column and box holds the digits 1-9 exactly once"""
+    digits = set(range(1, 10))
+    for k in range(9):
+        box_row, box_col = 3 * (k // 3), 3 * (k % 3)
+        if set(board[k]) != digits:
+            return False
+        if {board[i][k] for i in range(9)} != digits:
+            return False
+        if {board[i][j] for i in range(box_row, box_row + 3) for j in range(box_col, box_col + 3)} != digits:
+            return False
+    return True
@@ -0,0 +1,27 @@
+"""Headless Sudoku generation and solving engine
+
+Nothing in this package imports tkinter, so it can run on servers and in
+worker processes without a display.
+"""
+from .budget import Budget, BudgetExceeded, Progress, Task
+from .dlx import DLXSolver
+from .formats import cell_char, cell_value, from_line, to_line
+from .generator import CELLS_TO_KEEP, dig, generate, generate_solved_board
+from .grader import TECHNIQUES, Grade, difficulty_of, grade
+from .grid import BOX_SIZES, Grid, cell_units, peers, units
+from .hints import Hint, HintEngine, describe_hint, hint_score, hint_scores, select_hint_cell
+from .journal import Journal, Move, MoveHistory, SavedGame, load_game
+from .model import BoardModel
+from .pool import PuzzlePool
+from .propagate import PropagatingSolver
+from .puzzle_ids import (GENERATOR_VERSION, PuzzleCache, canonical_puzzle_id, make_puzzle_id, new_puzzle,
+                         new_puzzle_id, parse_puzzle_id, puzzle_from_id)
+from .solver import (BACKENDS, BitboardSolver, count_solutions, find_empty, get_backend, is_valid, new_solver,
+                     solve, solve_board)
+from .stats import EngineStats, timed
+from .store import PuzzleStore, PuzzleStoreWriter
+from .stream import EXPORTERS, PuzzleRecord, stream_puzzles, write_csv, write_jsonl, write_lines
+from .transposition import TranspositionCache, zobrist_keys
+from .transform import apply_transform, derive, random_transform
+from .validate import validate_batch, validate_grid
+from .view import BoardView
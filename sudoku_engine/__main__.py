@@ -0,0 +1,5 @@
+import sys
+
+from .factory import main
+
+sys.exit(main())
@@ -0,0 +1,193 @@
+"""Deadlines, node budgets and cancellation for long searches, and a worker thread to run them on
+
+Pass a Budget as `budget=` to the solve, count, dig and generate functions.
+Every search node is charged to it, and generation also checks it after
+each clue it digs. Once the budget's token is set, its deadline passes or
+its nodes run out, the call raises BudgetExceeded. The solver it was
+searching with is left mid-search and is of no further use. Without a
+budget the plain solver classes run, as with `stats=`.
+
+Task runs such a call on a daemon thread. The caller polls done(),
+progress() and result() from its own thread, as the game does from
+window.after callbacks, and cancel() stops the call at its next check.
+"""
+import collections
+import threading
+import time
+
+CHECK_SECONDS = 0.005  # Aimed-for time between looks at the clock and the token
+MAX_CHECK_EVERY = 1024  # Most search nodes between two looks
+
+Progress = collections.namedtuple("Progress", "phase detail nodes seconds")
+Progress.__doc__ = """How far a budgeted call has got
+
+phase is what generate is doing: "fill", "dig" or "grade", or "search"
+for a plain solve or count. detail is the clues left while digging, nodes
+the search nodes charged so far and seconds the time since the budget
+was made.
+"""
+
+
+class BudgetExceeded(Exception):
+    """Raised out of a search its Budget stopped; `reason` is "cancelled", "deadline" or "nodes" """
+
+    def __init__(self, reason, progress):
+        super().__init__("Stopped (%s) after %d nodes in %.3f s" % (reason, progress.nodes, progress.seconds))
+        self.reason = reason
+        self.progress = progress
+
+    def __reduce__(self):
+        # Pickled by its arguments, so it comes back whole from a process pool
+        return type(self), (self.reason, self.progress)
+
+
+class Budget:
+    """Limits on one call: `seconds` from now, `nodes` search nodes and a cancel `token`
+
+    Any limit may be None. The token is anything with is_set(), such as a
+    threading.Event. A node is charged with a single comparison; the
+    clock and the token are looked at every so many nodes, and whenever
+    the call reports a new phase. How many nodes is paced to come round
+    about every CHECK_SECONDS, as a node takes microseconds on a 9x9
+    bitboard and over a millisecond of propagation on 25x25. The node
+    limit is exact.
+    """
+
+    def __init__(self, seconds=None, nodes=None, token=None):
+        self.max_nodes = nodes
+        self.token = token
+        self.nodes = 0
+        self.started = time.monotonic()
+        self.deadline = None if seconds is None else self.started + seconds
+        self._phase = ("search", None)  # One tuple, so another thread never reads half an update
+        self._every = 1  # Nodes between checks, doubled while they come too often
+        self._paced = self.started
+        self._next_check = self._schedule()
+
+    def _schedule(self):
+        """The node count at which to check next"""
+        if self.max_nodes is None:
+            return self.nodes + self._every
+        return min(self.nodes + self._every, self.max_nodes + 1)
+
+    def charge(self):
+        """Counts one search node, checking the limits when one is due"""
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._pace()
+            self.check()
+
+    def _pace(self):
+        """Doubles or halves the nodes between checks towards one check every CHECK_SECONDS"""
+        now = time.monotonic()
+        spent = now - self._paced
+        self._paced = now
+        if spent < CHECK_SECONDS / 2:
+            self._every = min(self._every * 2, MAX_CHECK_EVERY)
+        elif spent > CHECK_SECONDS:
+            self._every = max(self._every // 2, 1)
+
+    def check(self):
+        """Raises BudgetExceeded if the token is set, the deadline has passed or the nodes are spent"""
+        if self.token is not None and self.token.is_set():
+            reason = "cancelled"
+        elif self.max_nodes is not None and self.nodes > self.max_nodes:
+            reason = "nodes"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            reason = "deadline"
+        else:
+            self._next_check = self._schedule()
+            return
+        raise BudgetExceeded(reason, self.progress())
+
+    def report(self, phase, detail=None):
+        """Notes the phase a call has reached, for progress(), and checks the limits"""
+        self._phase = (phase, detail)
+        self.check()
+
+    def progress(self):
+        """A Progress snapshot; safe to call from another thread while the search runs"""
+        phase, detail = self._phase
+        return Progress(phase, detail, self.nodes, time.monotonic() - self.started)
+
+
+def check(budget, phase, detail=None):
+    """budget.report(phase, detail), or nothing when budget is None"""
+    if budget is not None:
+        budget.report(phase, detail)
+
+
+_budgeted = {}
+
+
+def budgeted(cls):
+    """A subclass of a solver backend that charges each node of its search to its `budget` attribute
+
+    Like stats.instrumented, it wraps _solve and _count, the two methods
+    every backend recurses through.
+    """
+    if cls in _budgeted:
+        return _budgeted[cls]
+
+    class Budgeted(cls):
+        budget = None
+
+        def _solve(self, *args):
+            self.budget.charge()
+            return super()._solve(*args)
+
+        def _count(self, *args):
+            self.budget.charge()
+            return super()._count(*args)
+
+    Budgeted.__name__ = Budgeted.__qualname__ = "Budgeted" + cls.__name__
+    _budgeted[cls] = Budgeted
+    return Budgeted
+
+
+class Task:
+    """Runs function(*args, budget=..., **kwargs) on a daemon thread under a Budget(seconds, nodes)
+
+    The thread starts at once. The search gives up the GIL at the
+    interpreter's switch interval, so the caller's thread keeps running
+    alongside it. cancel() sets the budget's token.
+    """
+
+    def __init__(self, function, *args, seconds=None, nodes=None, **kwargs):
+        self.token = threading.Event()
+        self.budget = Budget(seconds, nodes, self.token)
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(function, args, kwargs), name="Task", daemon=True)
+        self._thread.start()
+
+    def _run(self, function, args, kwargs):
+        try:
+            self._result = function(*args, budget=self.budget, **kwargs)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def cancel(self):
+        """Asks the call to stop; it raises BudgetExceeded at its next check"""
+        self.token.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the call ends or `timeout` seconds pass, returns done()"""
+        return self._done.wait(timeout)
+
+    def progress(self):
+        return self.budget.progress()
+
+    def result(self):
+        """What the call returned; re-raises what it raised, BudgetExceeded if the budget stopped it"""
+        if not self.done():
+            raise RuntimeError("Task still running")
+        if self._error is not None:
+            raise self._error
+        return self._result
@@ -0,0 +1,255 @@
+"""Dancing Links (Algorithm X) backend: Sudoku as an exact-cover problem
+
+On a 9x9 board there are 324 columns: 0-80 say "cell (r, c) is filled",
+81-161 "row r has digit d", 162-242 "column c has digit d" and 243-323
+"box b has digit d". Each of the 729 matrix rows places one digit in one
+cell and has a node in four columns. An N x N board has 4 N^2 columns and
+N^3 rows in the same layout.
+"""
+import random
+
+from .grid import Grid
+
+
+def _build_matrix(box_size):
+    """Links the empty-board matrix of one size; every solver starts from a copy of it"""
+    size = box_size * box_size
+    cells = size * size
+    columns = 4 * cells
+    CELL, ROW, COL, BOX = 0, cells, 2 * cells, 3 * cells
+    # Node 0 is the root, then the column headers, then 4 nodes per matrix row
+    count = 1 + columns + cells * size * 4
+    L = [0] * count
+    R = [0] * count
+    U = list(range(count))
+    D = list(range(count))
+    C = [0] * count
+    S = [0] * (columns + 1)
+    rowid = [0] * count
+    first = [0] * (cells * size)
+
+    for col in range(columns + 1):
+        L[col] = col - 1
+        R[col] = col + 1
+    L[0] = columns
+    R[columns] = 0
+
+    node = columns + 1
+    for i in range(size):
+        for j in range(size):
+            box = box_size * (i // box_size) + j // box_size
+            for num in range(1, size + 1):
+                matrix_row = (i * size + j) * size + num - 1
+                first[matrix_row] = node
+                headers = (1 + CELL + i * size + j, 1 + ROW + i * size + num - 1,
+                           1 + COL + j * size + num - 1, 1 + BOX + box * size + num - 1)
+                for offset, header in enumerate(headers):
+                    n = node + offset
+                    C[n] = header
+                    rowid[n] = matrix_row
+                    # Append to the bottom of the column
+                    U[n] = U[header]
+                    D[n] = header
+                    D[U[header]] = n
+                    U[header] = n
+                    S[header] += 1
+                    # Link into the row ring
+                    L[n] = node + (offset - 1) % 4
+                    R[n] = node + (offset + 1) % 4
+                node += 4
+    return L, R, U, D, C, S, rowid, first
+
+
+_matrices = {}  # By box size, each built on first use to keep the engine's import cheap
+
+
+class DLXSolver:
+    """Exact-cover solver over a doubly linked sparse matrix with O(1) cover/uncover"""
+    BOX_SIZES = (2, 3, 4, 5)  # Every board size
+
+    def __init__(self, board):
+        board = Grid.coerce(board)
+        self.box_size = board.box_size
+        self.size = board.size
+        if self.box_size not in _matrices:
+            _matrices[self.box_size] = _build_matrix(self.box_size)
+        L, R, U, D, C, S, rowid, first = _matrices[self.box_size]
+
+        self.cells = bytearray(board.cells)
+        # Only the links and sizes change during search, the rest is shared
+        self.L = L[:]
+        self.R = R[:]
+        self.U = U[:]
+        self.D = D[:]
+        self.S = S[:]
+        self.C = C
+        self.rowid = rowid
+        self.first = first
+
+    def cover(self, col):
+        """Removes a column and every row that has a node in it"""
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        L[R[col]] = L[col]
+        R[L[col]] = R[col]
+        i = D[col]
+        while i != col:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, col):
+        """Undoes cover(col); calls must come in reverse order"""
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[col]
+        while i != col:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[col]] = col
+        R[L[col]] = col
+
+    def candidates(self, row, col):
+        """Returns the bitmask of digits that can go in a cell (bit d set for digit d)"""
+        cells, size, side = self.cells, self.size, self.box_size
+        used = 0
+        box_start = size * side * (row // side) + side * (col // side)
+        for k in range(size):
+            used |= (1 << cells[row * size + k] | 1 << cells[k * size + col]
+                     | 1 << cells[box_start + size * (k // side) + k % side])
+        return ~used & (2 << size) - 2
+
+    def place(self, row, col, num):
+        """Puts a digit in an empty cell"""
+        self.cells[row * self.size + col] = num
+
+    def remove(self, row, col):
+        """Empties a filled cell"""
+        self.cells[row * self.size + col] = 0
+
+    def grid(self):
+        """The current cells as a Grid"""
+        return Grid(self.cells)
+
+    def _select_clues(self):
+        """Covers the columns of every clue, returns them for _release or None on a conflict"""
+        covered = []
+        live = set(range(1, len(self.S)))
+        size = self.size
+        for index, num in enumerate(self.cells):
+            if num:
+                node = self.first[index * size + num - 1]
+                for n in (node, node + 1, node + 2, node + 3):
+                    col = self.C[n]
+                    if col not in live:
+                        # Two clues claim the same constraint
+                        self._release(covered)
+                        return None
+                    live.discard(col)
+                    self.cover(col)
+                    covered.append(col)
+        return covered
+
+    def _release(self, covered):
+        for col in reversed(covered):
+            self.uncover(col)
+
+    def _choose_column(self):
+        """Column with the fewest rows left, the S heuristic from Knuth's paper"""
+        R, S = self.R, self.S
+        best, best_size = 0, self.size + 1  # No column has more than N rows
+        col = R[0]
+        while col:
+            if S[col] < best_size:
+                best, best_size = col, S[col]
+                if best_size <= 1:
+                    break
+            col = R[col]
+        return best
+
+    def _rows_of(self, col):
+        D = self.D
+        rows = []
+        i = D[col]
+        while i != col:
+            rows.append(i)
+            i = D[i]
+        return rows
+
+    def _select_row(self, node):
+        self.cover(self.C[node])
+        j = self.R[node]
+        while j != node:
+            self.cover(self.C[j])
+            j = self.R[j]
+
+    def _deselect_row(self, node):
+        j = self.L[node]
+        while j != node:
+            self.uncover(self.C[j])
+            j = self.L[j]
+        self.uncover(self.C[node])
+
+    def solve(self, rng=random):
+        """Fills the empty cells, trying rows in random order (matrix order if rng is None)"""
+        covered = self._select_clues()
+        if covered is None:
+            return False
+        chosen = []
+        solved = self._solve(rng, chosen)
+        self._release(covered)
+        if solved:
+            for matrix_row in chosen:
+                index, digit = divmod(matrix_row, self.size)
+                self.cells[index] = digit + 1
+        return solved
+
+    def _solve(self, rng, chosen):
+        if self.R[0] == 0:
+            return True
+
+        col = self._choose_column()
+        rows = self._rows_of(col)
+        if rng is not None and len(rows) > 1:
+            rows = rng.sample(rows, len(rows))
+
+        for node in rows:
+            self._select_row(node)
+            chosen.append(self.rowid[node])
+            if self._solve(rng, chosen):
+                self._deselect_row(node)
+                return True
+            chosen.pop()
+            self._deselect_row(node)
+        return False
+
+    def count_solutions(self, limit=2):
+        """Counts solutions up to `limit`, leaving the solver state unchanged"""
+        covered = self._select_clues()
+        if covered is None:
+            return 0
+        found = self._count(limit)
+        self._release(covered)
+        return found
+
+    def _count(self, limit):
+        if self.R[0] == 0:
+            return 1
+
+        col = self._choose_column()
+        found = 0
+        for node in self._rows_of(col):
+            self._select_row(node)
+            found += self._count(limit - found)
+            self._deselect_row(node)
+            # Stop as soon as the limit is reached, e.g. on a second solution
+            if found >= limit:
+                break
+        return found
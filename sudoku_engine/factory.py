@@ -0,0 +1,123 @@
+"""Batch puzzle factory: generates many puzzles across a process pool
+
+Each output line holds a puzzle and its solution as two 81-character
+strings separated by a space. With --store the puzzles are appended to a
+packed PuzzleStore instead. --format line, jsonl or csv streams the
+records through an exporter in order and in constant memory.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from .formats import to_line
+from .generator import CELLS_TO_KEEP, generate
+from .store import PuzzleStoreWriter
+from .stream import EXPORTERS, stream_puzzles
+
+
+def _generate_chunk(task):
+    """Worker: generates one chunk of puzzles, returns their (puzzle, solution) pairs"""
+    difficulty, seed, chunk, size, backend = task
+    # Every chunk gets its own stream, so results do not depend on which worker ran it
+    rng = random.Random("%s/%d" % (seed, chunk))
+    return [generate(difficulty, rng.getrandbits(64), backend) for _ in range(size)]
+
+
+def generate_batch(out, difficulty, count, workers=None, chunk_size=50, seed=None, backend="bitboard",
+                   progress=None):
+    """Writes `count` puzzles to `out`, returns the seconds taken
+
+    `out` is an open text file or a PuzzleStoreWriter. Chunks are written
+    as soon as any worker finishes them; `progress`, if given, is called
+    with the number of puzzles written so far.
+    """
+    if difficulty not in CELLS_TO_KEEP:
+        raise ValueError("Unknown difficulty: %r" % (difficulty,))
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+
+    tasks = []
+    for chunk, start in enumerate(range(0, count, chunk_size)):
+        tasks.append((difficulty, seed, chunk, min(chunk_size, count - start), backend))
+
+    started = time.perf_counter()
+    written = 0
+    with multiprocessing.Pool(workers) as pool:
+        for pairs in pool.imap_unordered(_generate_chunk, tasks):
+            if isinstance(out, PuzzleStoreWriter):
+                out.extend((difficulty, puzzle, solution) for puzzle, solution in pairs)
+            else:
+                out.writelines("%s %s\n" % (to_line(puzzle), to_line(solution)) for puzzle, solution in pairs)
+            written += len(pairs)
+            if progress:
+                progress(written)
+    if not isinstance(out, PuzzleStoreWriter):
+        out.flush()
+    return time.perf_counter() - started
+
+
+def _reporting(records, progress, every=100):
+    """Passes records through, calling progress with the count every `every` records"""
+    for count, record in enumerate(records, 1):
+        if count % every == 0:
+            progress(count)
+        yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sudoku_engine", description="Generate puzzles in bulk")
+    parser.add_argument('difficulty', choices=sorted(CELLS_TO_KEEP))
+    parser.add_argument('count', type=int, help="number of puzzles to generate")
+    parser.add_argument('-o', '--output', default='-', help="output file, '-' for stdout (default)")
+    parser.add_argument('--store', action='store_true', help="append to the packed puzzle store at --output")
+    parser.add_argument('--format', choices=["pairs"] + sorted(EXPORTERS), default="pairs",
+                        help="pairs (default): puzzle and solution per line; line, jsonl and csv are streamed")
+    parser.add_argument('--derive', action='store_true',
+                        help="with --format, transform stored puzzles instead of generating (fast, no IDs)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=50, help="puzzles per worker task")
+    parser.add_argument('--seed', type=int, default=None, help="base seed for a reproducible batch")
+    parser.add_argument('--backend', default="bitboard", help="solver backend name")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no progress on stderr")
+    args = parser.parse_args(argv)
+
+    def progress(written):
+        sys.stderr.write("\r%d/%d puzzles" % (written, args.count))
+
+    if args.derive and args.format == "pairs":
+        parser.error("--derive needs --format line, jsonl or csv")
+    if args.store:
+        if args.output == '-':
+            parser.error("--store needs an --output path")
+        if args.format != "pairs":
+            parser.error("--store writes packed records, not --format %s" % args.format)
+        out = PuzzleStoreWriter(args.output)
+    else:
+        out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        if args.format == "pairs":
+            seconds = generate_batch(out, args.difficulty, args.count, args.workers, args.chunk_size, args.seed,
+                                     args.backend, None if args.quiet else progress)
+            written = args.count
+        else:
+            records = stream_puzzles(args.difficulty, args.count, args.seed, args.workers or os.cpu_count() or 1,
+                                     args.chunk_size, derived=args.derive, backend=args.backend)
+            if not args.quiet:
+                records = _reporting(records, progress)
+            started = time.perf_counter()
+            written = EXPORTERS[args.format](records, out)
+            out.flush()
+            seconds = time.perf_counter() - started
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    sys.stderr.write("%s%d %s puzzles in %.2f s (%.1f puzzles/s)\n" % (
+        '' if args.quiet else '\n', written, args.difficulty, seconds, written / seconds if seconds else 0))
+    if written != args.count:
+        sys.stderr.write("error: wrote %d of the %d puzzles asked for\n" % (written, args.count))
+        return 1
+    return 0
@@ -0,0 +1,38 @@
+"""Text formats for boards"""
+from .grid import BOX_SIZES, LINE_CHARS, Grid
+
+# bytes.translate table from line characters to cell values, 0xFF for anything else
+_VALUES = bytearray(b'\xff' * 256)
+for _value, _char in enumerate(LINE_CHARS):
+    _VALUES[ord(_char)] = _VALUES[ord(_char.lower())] = _value
+_VALUES[ord('0')] = 0
+_VALUES = bytes(_VALUES)
+
+
+def cell_value(char, size=9):
+    """The value a typed character stands for on a board of side `size`, or None if it stands for none"""
+    value = _VALUES[ord(char)] if len(char) == 1 and ord(char) < 256 else 0xFF
+    return value if 1 <= value <= size else None
+
+
+def cell_char(num):
+    """The character shown for a cell value: its digit, or a letter from 10 up"""
+    return LINE_CHARS[num] if num else ''
+
+
+def to_line(board, empty='.'):
+    """Board as one line, row by row: the standard 81 characters for 9x9"""
+    return Grid.coerce(board).to_line(empty)
+
+
+def from_line(line):
+    """Parses a line into a Grid: '.' or '0' mark an empty cell, letters stand for 10 and up on large boards"""
+    line = line.strip()
+    if len(line) not in BOX_SIZES:
+        raise ValueError("Expected 81 characters (or 16, 256 or 625), got %d" % len(line))
+    cells = line.encode('ascii', 'replace').translate(_VALUES)
+    size = BOX_SIZES[len(cells)] ** 2
+    if max(cells) > size:
+        bad = next(ch for ch, value in zip(line, cells) if value > size)
+        raise ValueError("Unexpected character %r in a %dx%d board" % (bad, size, size))
+    return Grid(cells)
@@ -0,0 +1,180 @@
+"""Puzzle generation: fill an empty grid, then dig clues out of it"""
+import random
+
+from .budget import check
+from .grader import DIFFICULTY_TECHNIQUES, LEVELS, grade
+from .grid import Grid
+from .propagate import PropagatingSolver
+from .solver import new_solver, solve_board
+from .stats import timed
+
+# Most clues left on the board for each difficulty. Generation digs further
+# while the grader finds the puzzle too easy
+CELLS_TO_KEEP = {
+    "easy": 50,
+    "medium": 40,
+    "hard": 30
+}
+
+
+def generate_solved_board(rng=random, backend="bitboard", stats=None, box_size=3, budget=None):
+    """Generates a solved Sudoku board, 9x9 unless another box size is given
+
+    backend="propagate" fills with singles propagation and fewest-candidates
+    branching; the row-major bitboard default is quicker on an empty 9x9
+    grid, which it almost never has to backtrack on.
+    """
+    check(budget, "fill")
+    with timed(stats, "fill"):
+        return solve_board(Grid.empty(box_size), rng, backend, stats, budget)
+
+
+def dig(solution, cells_to_keep, rng=random, backend="bitboard", stats=None, cache=None, budget=None):
+    """Removes clues from the solution while it keeps a unique solution, returns the puzzle Grid
+
+    Stops at `cells_to_keep` clues, or earlier if no further clue can go.
+    Boards larger than 9x9 are only dug while singles still solve them,
+    see _singles_removals. With a TranspositionCache as `cache` the
+    uniqueness checks count on the propagating backend and share outcomes
+    through it; the puzzle dug is the same either way. A Budget as
+    `budget` is checked after every clue removed and charged every search
+    node, see budget.Budget.
+    """
+    puzzle = Grid.coerce(solution)
+    if puzzle.count_filled() <= cells_to_keep:
+        return puzzle
+    removals = _removals if puzzle.box_size <= 3 else _singles_removals
+    with timed(stats, "dig"):
+        for clues, puzzle in removals(puzzle, rng, backend, stats, cache, budget):
+            if clues <= cells_to_keep:
+                break
+    return puzzle
+
+
+def _removals(solution, rng, backend, stats=None, cache=None, budget=None):
+    """Removes clues in random order while the solution stays unique, yields (clues, puzzle) after each one"""
+    # One solver follows the puzzle through every removal instead of re-solving it
+    if cache is None:
+        solver = new_solver(solution, backend, stats, budget)
+    else:
+        solver = new_solver(solution, "propagate", stats, budget)
+        solver.cache = cache
+    clues = solution.count_filled()
+
+    positions = [(i, j) for i in range(solution.size) for j in range(solution.size)]
+    rng.shuffle(positions)
+
+    for i, j in positions:
+        num = solution[i, j]
+        if not num:
+            continue
+        check(budget, "dig", clues)
+        solver.remove(i, j)
+        with timed(stats, "uniqueness"):
+            if cache is None:
+                ambiguous = _has_other_solution(solver, i, j, num)
+            else:
+                # Counting the whole puzzle, rather than trying the other digits at (i, j),
+                # reaches the propagated states of earlier checks, cached
+                ambiguous = solver.count_solutions() > 1
+        if ambiguous:
+            solver.place(i, j, num)
+        else:
+            clues -= 1
+            yield clues, solver.grid()
+
+
+def _singles_removals(solution, rng, backend=None, stats=None, cache=None, budget=None):
+    """Removes clues in random order while naked and hidden singles still solve the puzzle, yields like _removals
+
+    Proving a sparse 16x16 or 25x25 puzzle unique by search can take
+    minutes; one propagation pass proves it for puzzles singles can solve,
+    which keeps giant puzzles to a size's worth of easy steps. `backend`
+    and `cache` are unused, propagation is the check.
+    """
+    solver = PropagatingSolver(solution)
+    clues = solution.count_filled()
+
+    positions = [(i, j) for i in range(solution.size) for j in range(solution.size)]
+    rng.shuffle(positions)
+
+    for i, j in positions:
+        num = solution[i, j]
+        if not num:
+            continue
+        # Propagation passes are not search nodes, so the budget is checked per clue
+        check(budget, "dig", clues)
+        solver.remove(i, j)
+        with timed(stats, "uniqueness"):
+            # A cell its filled peers still force needs no propagation pass
+            forced = solver.candidates(i, j) == 1 << num or solver.solved_by_singles()
+        if forced:
+            clues -= 1
+            yield clues, solver.grid()
+        else:
+            solver.place(i, j, num)
+
+
+def _has_other_solution(solver, row, col, num):
+    """True if the puzzle can be solved with something other than num at (row, col)"""
+    others = solver.candidates(row, col) & ~(1 << num)
+    while others:
+        bit = others & -others
+        others ^= bit
+        solver.place(row, col, bit.bit_length() - 1)
+        found = solver.count_solutions(limit=1)
+        solver.remove(row, col)
+        if found:
+            return True
+    return False
+
+
+def generate(difficulty="medium", seed=None, backend="bitboard", stats=None, box_size=3, cache=None, budget=None):
+    """Returns a (puzzle, solution) pair of Grids
+
+    Digging goes on below CELLS_TO_KEEP until the grader puts the puzzle in
+    the requested difficulty; a puzzle that overshoots it is thrown away.
+    So an easy puzzle never needs more than naked singles and a hard one
+    always needs more than singles.
+
+    Larger boards (box_size 4 or 5) are not graded: their difficulty is
+    the share of clues kept, as CELLS_TO_KEEP keeps of 81, and every one
+    of them can be solved with singles.
+
+    `cache`, a TranspositionCache, memoises the uniqueness checks while
+    digging (see dig) without changing the puzzle a seed gives.
+
+    `budget`, a Budget, bounds the whole call: it raises BudgetExceeded
+    once the budget is cancelled, out of time or out of nodes, and the
+    budget's progress() tells which phase it has reached meanwhile.
+    """
+    if difficulty not in CELLS_TO_KEEP:
+        raise ValueError("Unknown difficulty: %r" % (difficulty,))
+    if stats is not None:
+        stats.calls["generate"] += 1
+    rng = random.Random(seed)
+
+    if box_size != 3:
+        solution = generate_solved_board(rng, backend, stats, box_size, budget)
+        cells_to_keep = round(CELLS_TO_KEEP[difficulty] * box_size ** 4 / 81)
+        return dig(solution, cells_to_keep, rng, backend, stats, budget=budget), solution
+
+    easiest, hardest = (LEVELS[name] for name in DIFFICULTY_TECHNIQUES[difficulty])
+    while True:
+        solution = generate_solved_board(rng, backend, stats, budget=budget)
+        removals = _removals(solution, rng, backend, stats, cache, budget)
+        while True:
+            with timed(stats, "dig"):
+                removal = next(removals, None)
+            if removal is None:
+                break
+            clues, puzzle = removal
+            if clues > CELLS_TO_KEEP[difficulty]:
+                continue
+            check(budget, "grade", clues)
+            with timed(stats, "grade"):
+                level = LEVELS[grade(puzzle).technique]
+            if level > hardest:
+                break
+            if level >= easiest:
+                return puzzle, solution
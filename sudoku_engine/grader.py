@@ -0,0 +1,252 @@
+"""Difficulty grading by the techniques a person would need to solve the puzzle
+
+The grader keeps a candidate bitmask per cell and only ever applies
+logical deductions. After every step it starts again from the cheapest
+technique, so a harder one is used only when nothing simpler makes
+progress. A puzzle that runs out of techniques is graded "guess".
+"""
+import collections
+from itertools import combinations
+
+from .grid import Grid
+from .model import UNITS
+from .solver import BitboardSolver
+
+# Techniques from cheapest to hardest, with the score each step adds
+TECHNIQUES = (
+    ("naked_single", 1),
+    ("hidden_single", 2),
+    ("locked_candidates", 6),
+    ("naked_pair", 10),
+    ("hidden_pair", 12),
+    ("naked_triple", 16),
+    ("hidden_triple", 18),
+    ("x_wing", 24),
+    ("swordfish", 32),
+    ("guess", 100),
+)
+LEVELS = {name: level for level, (name, _) in enumerate(TECHNIQUES)}
+COSTS = dict(TECHNIQUES)
+
+# Easiest and hardest technique a puzzle of each difficulty may need at its hardest step
+DIFFICULTY_TECHNIQUES = {
+    "easy": ("naked_single", "naked_single"),
+    "medium": ("hidden_single", "hidden_single"),
+    "hard": ("locked_candidates", "guess"),
+}
+
+Grade = collections.namedtuple('Grade', 'technique score steps')
+Grade.__doc__ = "Hardest technique needed, the summed cost of every step, and how many steps were taken"
+
+ALL_DIGITS = BitboardSolver.ALL_DIGITS
+MASK_DIGITS = BitboardSolver.MASK_DIGITS
+BIT_COUNT = [len(digits) for digits in MASK_DIGITS]
+
+# The three units of each cell, and the 20 cells it shares one with
+CELL_UNITS = [(row, 9 + col, 18 + 3 * (row // 3) + col // 3) for row in range(9) for col in range(9)]
+PEERS = [tuple(sorted({peer for unit in CELL_UNITS[index] for peer in UNITS[unit]} - {index}))
+         for index in range(81)]
+
+
+class _Grader:
+    """Candidates of a puzzle being solved by hand"""
+
+    def __init__(self, puzzle):
+        self.cells = bytearray(puzzle.cells)
+        self.candidates = [0] * 81
+        self.empties = []
+        for index, num in enumerate(self.cells):
+            if not num:
+                used = 0
+                for peer in PEERS[index]:
+                    used |= 1 << self.cells[peer]
+                self.candidates[index] = ~used & ALL_DIGITS
+                self.empties.append(index)
+
+    def place(self, index, num):
+        """Fills a cell and removes the digit from its peers; False if that leaves a peer with no candidates"""
+        cells, candidates = self.cells, self.candidates
+        cells[index] = num
+        candidates[index] = 0
+        self.empties.remove(index)
+        bit = 1 << num
+        for peer in PEERS[index]:
+            if candidates[peer] & bit:
+                candidates[peer] &= ~bit
+                if not candidates[peer]:
+                    return False
+        return True
+
+    def eliminate(self, indices, mask):
+        """Removes the digits of mask from the cells, returns whether anything changed"""
+        candidates = self.candidates
+        changed = False
+        for index in indices:
+            if candidates[index] & mask:
+                candidates[index] &= ~mask
+                changed = True
+        return changed
+
+    def naked_singles(self):
+        """Cells with one candidate left; returns the number placed, or None on a contradiction"""
+        placed = 0
+        for index in [index for index in self.empties if BIT_COUNT[self.candidates[index]] == 1]:
+            digits = MASK_DIGITS[self.candidates[index]]
+            if not digits or not self.place(index, digits[0]):
+                return None
+            placed += 1
+        return placed
+
+    def hidden_singles(self):
+        """Digits with one possible cell in a unit; returns the number placed, or None on a contradiction"""
+        cells, candidates = self.cells, self.candidates
+        placed = 0
+        for unit in UNITS:
+            once = twice = done = 0
+            for index in unit:
+                mask = candidates[index]
+                twice |= once & mask
+                once |= mask
+                done |= 1 << cells[index]
+            if (once | done) & ALL_DIGITS != ALL_DIGITS:
+                return None  # A digit has nowhere to go
+            for num in MASK_DIGITS[once & ~twice & ALL_DIGITS]:
+                bit = 1 << num
+                for index in unit:
+                    if candidates[index] & bit:
+                        if not self.place(index, num):
+                            return None
+                        placed += 1
+                        break
+        return placed
+
+    def locked_candidates(self):
+        """A digit confined to where two units overlap is removed from the rest of both"""
+        candidates = self.candidates
+        for unit_id, unit in enumerate(UNITS):
+            for num in range(1, 10):
+                bit = 1 << num
+                spots = [index for index in unit if candidates[index] & bit]
+                if len(spots) < 2 or len(spots) > 3:
+                    continue
+                # Other units that contain every spot
+                shared = set(CELL_UNITS[spots[0]])
+                for index in spots[1:]:
+                    shared.intersection_update(CELL_UNITS[index])
+                shared.discard(unit_id)
+                for other in shared:
+                    if self.eliminate([index for index in UNITS[other] if index not in spots], bit):
+                        return 1
+        return 0
+
+    def naked_subset(self, size):
+        """`size` cells of a unit sharing `size` candidates take those digits from the rest of the unit"""
+        candidates = self.candidates
+        for unit in UNITS:
+            open_cells = [index for index in unit if candidates[index]]
+            if len(open_cells) <= size:
+                continue
+            small = [index for index in open_cells if BIT_COUNT[candidates[index]] <= size]
+            for group in combinations(small, size):
+                mask = 0
+                for index in group:
+                    mask |= candidates[index]
+                if BIT_COUNT[mask] == size:
+                    if self.eliminate([index for index in open_cells if index not in group], mask):
+                        return 1
+        return 0
+
+    def hidden_subset(self, size):
+        """`size` digits confined to `size` cells of a unit clear every other digit from those cells"""
+        candidates = self.candidates
+        for unit in UNITS:
+            spots = {}
+            for num in range(1, 10):
+                bit = 1 << num
+                where = frozenset(index for index in unit if candidates[index] & bit)
+                if 2 <= len(where) <= size:
+                    spots[num] = where
+            for digits in combinations(spots, size):
+                cells = frozenset().union(*(spots[num] for num in digits))
+                if len(cells) == size:
+                    keep = 0
+                    for num in digits:
+                        keep |= 1 << num
+                    if self.eliminate(cells, ALL_DIGITS & ~keep):
+                        return 1
+        return 0
+
+    def fish(self, size):
+        """X-Wing (size 2) and Swordfish (size 3): a digit's spots in `size` rows cover `size` columns, or the reverse"""
+        candidates = self.candidates
+        for num in range(1, 10):
+            bit = 1 << num
+            for base, cover in ((range(9), range(9, 18)), (range(9, 18), range(9))):
+                lines = {}
+                for unit in base:
+                    spread = 0
+                    for position, index in enumerate(UNITS[unit]):
+                        if candidates[index] & bit:
+                            spread |= 1 << position
+                    if 2 <= BIT_COUNT[spread << 1] <= size:
+                        lines[unit] = spread
+                if len(lines) < size:
+                    continue
+                for group in combinations(lines, size):
+                    spread = 0
+                    for unit in group:
+                        spread |= lines[unit]
+                    if BIT_COUNT[spread << 1] != size:
+                        continue
+                    members = {index for unit in group for index in UNITS[unit]}
+                    others = [index for position in range(9) if spread >> position & 1
+                              for index in UNITS[cover[position]] if index not in members]
+                    if self.eliminate(others, bit):
+                        return 1
+        return 0
+
+
+def grade(puzzle):
+    """Solves the puzzle with human techniques only and returns its Grade
+
+    Raises ValueError if the techniques run into a contradiction, which
+    means the puzzle has no solution.
+    """
+    grader = _Grader(Grid.coerce(puzzle))
+    if not all(grader.candidates[index] for index in grader.empties):
+        raise ValueError("Puzzle has no solution")
+    steps = (
+        ("naked_single", grader.naked_singles),
+        ("hidden_single", grader.hidden_singles),
+        ("locked_candidates", grader.locked_candidates),
+        ("naked_pair", lambda: grader.naked_subset(2)),
+        ("hidden_pair", lambda: grader.hidden_subset(2)),
+        ("naked_triple", lambda: grader.naked_subset(3)),
+        ("hidden_triple", lambda: grader.hidden_subset(3)),
+        ("x_wing", lambda: grader.fish(2)),
+        ("swordfish", lambda: grader.fish(3)),
+    )
+    hardest, score, count = 0, 0, 0
+    while grader.empties:
+        for name, step in steps:
+            progress = step()
+            if progress is None:
+                raise ValueError("Puzzle has no solution")
+            if progress:
+                hardest = max(hardest, LEVELS[name])
+                score += COSTS[name] * progress
+                count += progress
+                break
+        else:
+            # Out of techniques: the rest needs trial and error
+            return Grade("guess", score + COSTS["guess"], count)
+    return Grade(TECHNIQUES[hardest][0], score, count)
+
+
+def difficulty_of(puzzle_grade):
+    """The difficulty name a Grade falls under"""
+    level = LEVELS[puzzle_grade.technique]
+    for difficulty, (easiest, hardest) in DIFFICULTY_TECHNIQUES.items():
+        if LEVELS[easiest] <= level <= LEVELS[hardest]:
+            return difficulty
+    return None
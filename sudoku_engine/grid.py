@@ -0,0 +1,159 @@
+"""Compact immutable board type, and the units of each board size"""
+import functools
+
+# Box size by cell count: boards from 4x4 (boxes of 2x2) to 25x25 (boxes of 5x5)
+BOX_SIZES = {box ** 4: box for box in range(2, 6)}
+# Side length by cell count
+_SIDES = {cells: box * box for cells, box in BOX_SIZES.items()}
+
+# Characters for cell values 0-25 in lines: '.', digits, then letters for 10 and up
+LINE_CHARS = '.123456789ABCDEFGHIJKLMNOP'
+# bytes.translate table from cell values to line characters
+_LINE_CHARS = LINE_CHARS.encode('ascii') + bytes(256 - len(LINE_CHARS))
+
+
+class Grid:
+    """Immutable N x N board backed by N*N bytes, row by row (0 marks an empty cell)
+
+    N is 9 for a standard board, or 4, 16 or 25; the size follows from the
+    number of cells. grid[row] is a zero-copy view of a row, so
+    grid[row][col] reads like the list-of-lists boards it replaces;
+    grid[row, col] works too. Grids are hashable and compare by value.
+    """
+    __slots__ = ('cells', 'size')
+
+    def __init__(self, cells=bytes(81)):
+        cells = bytes(cells)
+        if len(cells) not in BOX_SIZES:
+            raise ValueError("A grid needs 81 cells (or 16, 256 or 625), got %d" % len(cells))
+        self.cells = cells
+        self.size = _SIDES[len(cells)]  # Cells per row, column and box
+
+    @classmethod
+    def empty(cls, box_size=3):
+        """An empty board with boxes of box_size x box_size cells"""
+        return cls(bytes(box_size ** 4))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a grid from N rows of N numbers"""
+        return cls(bytes(num for row in rows for num in row))
+
+    @classmethod
+    def coerce(cls, board):
+        """Returns board as a Grid, converting list-of-lists boards"""
+        return board if isinstance(board, cls) else cls.from_rows(board)
+
+    @property
+    def box_size(self):
+        """Cells per side of a box"""
+        return BOX_SIZES[len(self.cells)]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            row, col = key
+            return self.cells[row * self.size + col]
+        return self.row(key)
+
+    def row(self, row):
+        """Zero-copy view of a row"""
+        size = self.size
+        if not 0 <= row < size:
+            raise IndexError("row out of range")
+        return memoryview(self.cells)[row * size:row * size + size]
+
+    def col(self, col):
+        """Zero-copy strided view of a column"""
+        size = self.size
+        if not 0 <= col < size:
+            raise IndexError("column out of range")
+        return memoryview(self.cells)[col::size]
+
+    def box(self, box):
+        """The row segments of a box (numbered row by row) as zero-copy views"""
+        side = BOX_SIZES[len(self.cells)]
+        size = side * side
+        if not 0 <= box < size:
+            raise IndexError("box out of range")
+        start = size * side * (box // side) + side * (box % side)
+        view = memoryview(self.cells)
+        return tuple(view[start + size * k:start + size * k + side] for k in range(side))
+
+    def __iter__(self):
+        return (self.row(row) for row in range(self.size))
+
+    def __len__(self):
+        return self.size
+
+    def with_cell(self, row, col, num):
+        """A copy of the grid with one cell changed, costs one buffer copy"""
+        cells = bytearray(self.cells)
+        cells[row * self.size + col] = num
+        return Grid(cells)
+
+    def with_cells(self, changes):
+        """A copy of the grid with several (row, col, num) changes applied"""
+        cells = bytearray(self.cells)
+        size = self.size
+        for row, col, num in changes:
+            cells[row * size + col] = num
+        return Grid(cells)
+
+    def to_rows(self):
+        """The grid as a new list-of-lists board"""
+        return [list(row) for row in self]
+
+    def to_line(self, empty='.'):
+        """The grid as one line, row by row (81 characters for 9x9), empty cells as `empty`"""
+        line = self.cells.translate(_LINE_CHARS).decode('ascii')
+        return line if empty == '.' else line.replace('.', empty)
+
+    def count_filled(self):
+        return len(self.cells) - self.cells.count(0)
+
+    def __eq__(self, other):
+        if isinstance(other, Grid):
+            return self.cells == other.cells
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.cells)
+
+    def __str__(self):
+        return self.to_line()
+
+    def __repr__(self):
+        return "Grid(%r)" % self.to_line()
+
+
+@functools.lru_cache(maxsize=None)
+def units(box_size=3):
+    """Cell indices of each unit: rows are units 0 to N-1, then the N columns, then the N boxes"""
+    size = box_size * box_size
+    return tuple(
+        [tuple(row * size + k for k in range(size)) for row in range(size)]
+        + [tuple(k * size + col for k in range(size)) for col in range(size)]
+        + [tuple((box_size * (box // box_size) + k // box_size) * size + box_size * (box % box_size) + k % box_size
+                 for k in range(size)) for box in range(size)]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def cell_units(box_size=3):
+    """For each cell, its three (unit, position in unit) pairs, units numbered as in units()"""
+    size = box_size * box_size
+    return tuple(
+        ((row, col), (size + col, row),
+         (2 * size + box_size * (row // box_size) + col // box_size, box_size * (row % box_size) + col % box_size))
+        for row in range(size) for col in range(size)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def peers(box_size=3):
+    """For each cell, the other cells sharing a row, column or box with it"""
+    unit_cells = units(box_size)
+    return tuple(
+        tuple(sorted({peer for unit, _ in cell for peer in unit_cells[unit]} - {index}))
+        for index, cell in enumerate(cell_units(box_size))
+    )
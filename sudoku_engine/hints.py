@@ -0,0 +1,474 @@
+"""Hints: the next logical step on a board in play, or which empty cell to reveal
+
+HintEngine follows a game move by move and names the next deduction a
+person could make, with the technique and the cells that justify it.
+hint_scores and select_hint_cell pick a cell to reveal outright, for
+boards the engine's techniques cannot crack.
+"""
+import collections
+import functools
+import itertools
+
+from .formats import cell_char
+from .grid import Grid, cell_units, peers, units
+
+Hint = collections.namedtuple('Hint', 'technique placement eliminations cells')
+Hint.__doc__ = """One deduction: its technique and what it finds
+
+placement is a (row, col, num) the technique proves, or None;
+eliminations the (row, col, num) candidates it rules out; cells the
+(row, col) cells the reasoning rests on. The "contradiction" technique
+marks a board with no solution left: cells are where it shows.
+"""
+
+
+def hint_score(board, row, col):
+    """Calculate the strategic importance of a cell for hinting
+
+    Two points per filled cell in the row, column and box (cells in both
+    the box and a line count twice), plus a weight for being near the centre.
+    """
+    board = Grid.coerce(board)
+    return _score(board.cells, board.size, board.box_size, row, col)
+
+
+def _score(cells, size, box, row, col):
+    # Count filled neighbors
+    filled_neighbors = 3 * size - cells[row * size:row * size + size].count(0) - cells[col::size].count(0)
+    start = box * size * (row // box) + box * (col // box)
+    for offset in range(start, start + box * size, size):
+        filled_neighbors -= cells[offset:offset + box].count(0)
+
+    # Prefer center cells
+    centre = size // 2
+    positional_weight = size - (abs(row - centre) + abs(col - centre))
+    return filled_neighbors * 2 + positional_weight
+
+
+def hint_scores(board):
+    """Scores every empty cell, as {(row, col): score} in row-major order"""
+    board = Grid.coerce(board)
+    cells, size, box = board.cells, board.size, board.box_size
+    return {divmod(index, size): _score(cells, size, box, index // size, index % size)
+            for index, num in enumerate(cells) if not num}
+
+
+def select_hint_cell(cell_scores, difficulty):
+    """Select appropriate cell based on difficulty and scores"""
+    if not cell_scores:
+        return None
+
+    sorted_cells = sorted(cell_scores.items(), key=lambda x: x[1])
+    if difficulty == 'easy':
+        # Choose easiest cell (highest score)
+        return sorted_cells[-1][0]
+    elif difficulty == 'hard':
+        # Choose harder cell (lower score)
+        return sorted_cells[0][0]
+    else:  # medium
+        # Choose medium difficulty cell
+        return sorted_cells[len(sorted_cells) // 2][0]
+
+
+def _bits(mask):
+    """Positions of the set bits in mask, lowest first"""
+    found = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        found.append(bit.bit_length() - 1)
+    return found
+
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Before Python 3.10
+    def _popcount(mask):
+        return bin(mask).count("1")
+
+
+def _subsets(items, size):
+    """Yields (keys, union) for each `size` of the (key, mask) items whose masks have `size` bits between them
+
+    Sizes 2 and 3 only, and every mask has at least two bits. Pairs are
+    then equal masks, found by grouping rather than trying every two. A
+    pair whose union is already too wide is not extended, which prunes
+    most triples.
+    """
+    if size == 2:
+        groups = {}
+        for key, mask in items:
+            groups.setdefault(mask, []).append(key)
+        found = [(pair, mask) for mask, keys in groups.items() if len(keys) > 1
+                 for pair in itertools.combinations(keys, 2)]
+        yield from sorted(found) if len(found) > 1 else found  # In the order of the items, as below
+        return
+    for first in range(len(items)):
+        key_a, mask_a = items[first]
+        for second in range(first + 1, len(items)):
+            key_b, mask_b = items[second]
+            union = mask_a | mask_b
+            if _popcount(union) > size:
+                continue
+            if size == 2:
+                yield (key_a, key_b), union
+                continue
+            for third in range(second + 1, len(items)):
+                key_c, mask_c = items[third]
+                if _popcount(union | mask_c) == size:
+                    yield (key_a, key_b, key_c), union | mask_c
+
+
+@functools.lru_cache(maxsize=None)
+def _crossings(box_size=3):
+    """For each unit, (other unit, overlap's positions in this unit, in the other) for every box or line it crosses"""
+    unit_cells = units(box_size)
+    size = box_size * box_size
+    crossings = [[] for _ in unit_cells]
+    for box in range(2 * size, 3 * size):
+        for line in range(2 * size):
+            shared = set(unit_cells[box]) & set(unit_cells[line])
+            if shared:
+                in_box = sum(1 << position for position, index in enumerate(unit_cells[box]) if index in shared)
+                in_line = sum(1 << position for position, index in enumerate(unit_cells[line]) if index in shared)
+                crossings[box].append((line, in_box, in_line))
+                crossings[line].append((box, in_line, in_box))
+    return tuple(tuple(unit) for unit in crossings)
+
+
+class HintEngine:
+    """Candidates of a board in play, kept up to date move by move, and the next deduction they allow
+
+    set() touches only the changed cell and its peers. Besides a candidate
+    mask per cell the engine keeps, per unit and digit, a mask of the
+    positions the digit can still take, so next_hint() finds hidden
+    singles, locked candidates, hidden subsets and fish by combining masks
+    rather than rereading cells. Eliminations passed to apply() hold until
+    a digit is taken off the board, which may undo what they rested on.
+    """
+
+    def __init__(self, puzzle=None, box_size=3):
+        self._use_tables(box_size)
+        self.clear()
+        if puzzle is not None:
+            self.load(puzzle)
+
+    def _use_tables(self, box_size):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self.all_digits = ((1 << self.size) - 1) << 1  # Bits 1 to N
+        self.units = units(box_size)
+        self.cell_units = cell_units(box_size)
+        self.peers = peers(box_size)
+        self.crossings = _crossings(box_size)
+
+    def clear(self):
+        """Empties every cell"""
+        size = self.size
+        self.cells = bytearray(size * size)
+        self.cand = [self.all_digits] * (size * size)
+        # counts[unit][num] placed, and used[unit] the digits placed at least once
+        self.counts = [[0] * (size + 1) for _ in range(3 * size)]
+        self.used = [0] * (3 * size)
+        # where[unit][num]: the positions in the unit num can still go, as a bitmask
+        self.where = [[0] + [(1 << size) - 1] * size for _ in range(3 * size)]
+        self.singles = set()  # Empty cells with one candidate left
+        self.dead = set()  # Empty cells with none
+        self.struck = {}  # Digits apply() removed, by cell
+        self.repeats = 0  # (unit, digit) pairs placed more than once
+
+    def load(self, puzzle):
+        """Starts over from a board, taking on its size"""
+        puzzle = Grid.coerce(puzzle)
+        if puzzle.box_size != self.box_size:
+            self._use_tables(puzzle.box_size)
+        self.clear()
+        for index, num in enumerate(puzzle.cells):
+            if num:
+                self._put(index, num)
+
+    def sync(self, cells):
+        """Catches up with a board given as its cells (a BoardModel's, say), applying only what changed"""
+        if len(cells) != len(self.cells):
+            self.load(Grid(cells))
+            return
+        if cells == self.cells:
+            return
+        size = self.size
+        for index, (num, old) in enumerate(zip(cells, bytes(self.cells))):
+            if num != old:
+                self.set(index // size, index % size, num)
+
+    def set(self, row, col, num):
+        """Writes a digit (0 to empty), updating the candidates of the cell and its peers"""
+        index = row * self.size + col
+        old = self.cells[index]
+        if old == num:
+            return
+        if old:
+            self._take(index, old)
+        if num:
+            self._put(index, num)
+
+    def _change(self, index, mask):
+        """Sets a cell's candidate mask, keeping the per-unit positions and the single and dead sets in step"""
+        old = self.cand[index]
+        self.cand[index] = mask
+        where = self.where
+        units_of = self.cell_units[index]
+        toggled = old ^ mask
+        while toggled:
+            bit = toggled & -toggled
+            toggled ^= bit
+            num = bit.bit_length() - 1
+            for unit, position in units_of:
+                where[unit][num] ^= 1 << position
+        self.singles.discard(index)
+        self.dead.discard(index)
+        if not self.cells[index]:
+            if not mask:
+                self.dead.add(index)
+            elif not mask & (mask - 1):
+                self.singles.add(index)
+
+    def _put(self, index, num):
+        self.cells[index] = num
+        bit = 1 << num
+        counts, used = self.counts, self.used
+        for unit, _ in self.cell_units[index]:
+            counts[unit][num] += 1
+            used[unit] |= bit
+            if counts[unit][num] == 2:
+                self.repeats += 1
+        self.struck.pop(index, None)
+        self._change(index, 0)
+        cand = self.cand
+        for peer in self.peers[index]:
+            if cand[peer] & bit:
+                self._change(peer, cand[peer] & ~bit)
+
+    def _take(self, index, num):
+        self.cells[index] = 0
+        counts, used = self.counts, self.used
+        for unit, _ in self.cell_units[index]:
+            counts[unit][num] -= 1
+            if not counts[unit][num]:
+                used[unit] &= ~(1 << num)
+            elif counts[unit][num] == 1:
+                self.repeats -= 1
+        # Eliminations made with the digit in place may no longer hold
+        stale = list(self.struck)
+        self.struck.clear()
+        cells = self.cells
+        for cell in [index, *self.peers[index], *stale]:
+            if not cells[cell]:
+                mask = self.all_digits
+                for unit, _ in self.cell_units[cell]:
+                    mask &= ~used[unit]
+                self._change(cell, mask)
+
+    def candidates(self, row, col):
+        """Bitmask of the digits still possible at an empty cell (bit n for digit n), 0 for a filled one"""
+        return self.cand[row * self.size + col]
+
+    def apply(self, hint):
+        """Makes a hint's placement, or strikes its eliminated candidates"""
+        if hint.placement is not None:
+            self.set(*hint.placement)
+        size = self.size
+        for row, col, num in hint.eliminations:
+            index = row * size + col
+            bit = 1 << num
+            if self.cand[index] & bit:
+                self.struck[index] = self.struck.get(index, 0) | bit
+                self._change(index, self.cand[index] & ~bit)
+
+    def next_hint(self):
+        """The cheapest deduction the board allows, as a Hint, or None if these techniques find nothing
+
+        Techniques are tried in the grader's order, from naked singles to
+        swordfish. A board with a repeated digit, a cell with no candidates
+        or a digit with nowhere to go in a unit gets a "contradiction".
+        """
+        size = self.size
+        if self.repeats:
+            return self._repeat()
+        if self.dead:
+            index = min(self.dead)
+            return Hint("contradiction", None, (), (divmod(index, size),))
+
+        where, used, unit_cells = self.where, self.used, self.units
+        hidden = None
+        for unit in range(3 * size):
+            spots = where[unit]
+            for num in range(1, size + 1):
+                positions = spots[num]
+                if not positions & (positions - 1):
+                    if positions:
+                        if hidden is None:
+                            hidden = (unit, num, positions.bit_length() - 1)
+                    elif not used[unit] >> num & 1:
+                        # Nowhere left for num in this unit
+                        return Hint("contradiction", None, (),
+                                    tuple(divmod(index, size) for index in unit_cells[unit]))
+
+        if self.singles:
+            index = min(self.singles)
+            num = self.cand[index].bit_length() - 1
+            holders = {}
+            for peer in self.peers[index]:
+                holders.setdefault(self.cells[peer], peer)
+            holders.pop(0, None)
+            return Hint("naked_single", divmod(index, size) + (num,), (),
+                        tuple(divmod(peer, size) for peer in sorted(holders.values())))
+        if hidden is not None:
+            return self._hidden_single(*hidden)
+
+        # Candidates per cell, spots per unit and digit, and empty cells per unit, counted once for every technique
+        cell_counts = list(map(_popcount, self.cand))
+        spot_counts = [list(map(_popcount, spots)) for spots in where]
+        empty = [size - _popcount(digits) for digits in used]
+        missing = [size - sum(placed) for placed in zip(*self.counts[:size])]  # Rows each digit is missing from
+        # A naked subset of k cells in a unit with m empty ones is the hidden
+        # subset of the other m - k digits, with the same eliminations, and the
+        # reverse; fish likewise, over the n rows and columns a digit is missing
+        # from. Singles and the smaller subsets are ruled out by the time a
+        # technique runs, so it only needs units with at least this many empty
+        # cells, or digits missing from this many lines
+        for technique, find, arguments in (
+                ("locked_candidates", self._locked_candidates, (spot_counts,)),
+                ("naked_pair", self._naked_subset, (2, cell_counts, empty, 4)),
+                ("hidden_pair", self._hidden_subset, (2, spot_counts, empty, 5)),
+                ("naked_triple", self._naked_subset, (3, cell_counts, empty, 6)),
+                ("hidden_triple", self._hidden_subset, (3, spot_counts, empty, 7)),
+                ("x_wing", self._fish, (2, spot_counts, missing, 4)),
+                ("swordfish", self._fish, (3, spot_counts, missing, 6))):
+            found = find(*arguments)
+            if found is not None:
+                eliminations, cells = found
+                return Hint(technique, None,
+                            tuple(divmod(index, size) + (num,) for index, num in eliminations),
+                            tuple(divmod(index, size) for index in sorted(cells)))
+        return None
+
+    def _repeat(self):
+        """A contradiction Hint naming the cells of the first digit placed twice in a unit"""
+        cells = self.cells
+        for unit, counts in enumerate(self.counts):
+            for num, count in enumerate(counts):
+                if num and count > 1:
+                    return Hint("contradiction", None, (), tuple(
+                        divmod(index, self.size) for index in self.units[unit] if cells[index] == num))
+        return None
+
+    def _hidden_single(self, unit, num, position):
+        """A Hint placing num at the one position left for it in unit, justified by the digits blocking the rest"""
+        cells, size = self.cells, self.size
+        index = self.units[unit][position]
+        blockers = set()
+        for other in self.units[unit]:
+            if other != index and not cells[other]:
+                for peer in self.peers[other]:
+                    if cells[peer] == num:
+                        blockers.add(peer)
+                        break
+        return Hint("hidden_single", divmod(index, size) + (num,), (),
+                    tuple(divmod(cell, size) for cell in sorted(blockers)))
+
+    def _locked_candidates(self, spot_counts):
+        """A digit confined to where a box and a line cross comes off the rest of the other unit
+
+        Pointing when the digit's spots in a box lie on one line, claiming
+        when its spots on a line lie in one box.
+        """
+        where, unit_cells, box_size = self.where, self.units, self.box_size
+        digits = range(1, self.size + 1)
+        for unit, crossings in enumerate(self.crossings):
+            spots, counts = where[unit], spot_counts[unit]
+            for num in digits:
+                if not 2 <= counts[num] <= box_size:
+                    continue  # A hidden single, or too many spots to fit a crossing
+                spread = spots[num]
+                for other, here, there in crossings:
+                    if not spread & ~here:
+                        rest = where[other][num] & ~there
+                        if rest:
+                            return ([(unit_cells[other][position], num) for position in _bits(rest)],
+                                    [unit_cells[unit][position] for position in _bits(spread)])
+                        break
+        return None
+
+    def _naked_subset(self, size, cell_counts, empty, least):
+        """`size` cells of a unit holding just `size` digits between them take those digits from the rest
+
+        Units with fewer than `least` empty cells are skipped.
+        """
+        cand = self.cand
+        for unit, unit_cells in enumerate(self.units):
+            if empty[unit] < least:
+                continue
+            small = [(index, cand[index]) for index in unit_cells if 0 < cell_counts[index] <= size]
+            if len(small) < size:
+                continue
+            for group, mask in _subsets(small, size):
+                eliminations = [(index, num) for index in unit_cells if index not in group
+                                for num in _bits(cand[index] & mask)]
+                if eliminations:
+                    return eliminations, group
+        return None
+
+    def _hidden_subset(self, size, spot_counts, empty, least):
+        """`size` digits confined to `size` cells of a unit clear every other digit from those cells
+
+        Units with fewer than `least` empty cells are skipped.
+        """
+        cand, where = self.cand, self.where
+        for unit, unit_cells in enumerate(self.units):
+            if empty[unit] < least:
+                continue
+            spots = where[unit]
+            few = [(num, spots[num]) for num, count in enumerate(spot_counts[unit]) if 2 <= count <= size]
+            if len(few) < size:
+                continue
+            for group, positions in _subsets(few, size):
+                keep = sum(1 << num for num in group)
+                cells = [unit_cells[position] for position in _bits(positions)]
+                eliminations = [(index, num) for index in cells for num in _bits(cand[index] & ~keep)]
+                if eliminations:
+                    return eliminations, cells
+        return None
+
+    def _fish(self, size, spot_counts, missing, least):
+        """X-Wing (size 2) and Swordfish (size 3): a digit's spots in `size` rows cover `size` columns, or the reverse
+
+        Digits missing from fewer than `least` rows are skipped.
+        """
+        where, unit_cells, side = self.where, self.units, self.size
+        for num in range(1, side + 1):
+            if missing[num] < least:
+                continue
+            for base, cover in ((0, side), (side, 0)):
+                lines = [(line, where[base + line][num]) for line in range(side)
+                         if 2 <= spot_counts[base + line][num] <= size]
+                if len(lines) < size:
+                    continue
+                for group, spread in _subsets(lines, size):
+                    in_group = sum(1 << line for line in group)
+                    eliminations = [(unit_cells[cover + position][other], num) for position in _bits(spread)
+                                    for other in _bits(where[cover + position][num] & ~in_group)]
+                    if eliminations:
+                        return eliminations, [unit_cells[base + line][position] for line in group
+                                              for position in _bits(where[base + line][num])]
+        return None
+
+
+def describe_hint(hint):
+    """A one-line description of a Hint for players, cells as r<row>c<col> counted from 1"""
+    name = hint.technique.replace('_', ' ').capitalize()
+    if hint.placement is not None:
+        row, col, num = hint.placement
+        return "%s: %s at r%dc%d" % (name, cell_char(num), row + 1, col + 1)
+    if hint.eliminations:
+        return "%s: removes %s" % (name, ", ".join(
+            "%s from r%dc%d" % (cell_char(num), row + 1, col + 1) for row, col, num in hint.eliminations))
+    return "%s at %s" % (name, ", ".join("r%dc%d" % (row + 1, col + 1) for row, col in hint.cells))
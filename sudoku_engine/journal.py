@@ -0,0 +1,383 @@
+"""Undo and redo over a game's moves, and an append-only autosave journal to resume it from
+
+MoveHistory keeps the player's steps as (cell, old, new, timestamp,
+hinted) moves. Undo and redo hand back the cells to change, and the caller
+applies them one set() at a time; the board itself is never copied.
+
+Journal writes the same moves to disk from a background thread, in
+batches, so the Tk thread only queues them. The file is rewritten from
+scratch at the start of a game and at every checkpoint, and appended to
+in between:
+
+    offset  size  field
+    0       8     magic b"SUDOKUJL"
+    8       2     format version (little endian)
+    10      2     move record size in bytes
+    12      52    reserved, zero
+
+    b"G"    the game: the store's 82-byte packed (difficulty, puzzle,
+            solution) record, the puzzle ID padded to 16 bytes with NULs,
+            and the start time as a little-endian double
+    b"C"    checkpoint: 81 bytes, one per cell, holding the board's digit
+            in the high 4 bits and 1 in the low bits for a hinted cell,
+            then the uint32 milliseconds since the start
+    moves   one 9-byte record per changed cell: kind, uint16 cell with
+            HINTED_MOVE set for a move a hint made, old and new digit,
+            uint32 milliseconds since the start
+
+A move's kind says where it falls in the history: b"M" starts a step the
+player made, b"H" one a hint made, b"U" an undo, b"R" a redo, and b"+"
+continues the step before it (clearing the board is one step over many
+cells). Undoing a hint's move takes its cell out of the hinted cells and
+redoing it puts it back. load_game() reads the checkpoint and replays the
+moves after it; a record torn by a crash ends the replay. Format 1 had no
+HINTED_MOVE bit and is still read. Journals cover 9x9 games,
+whose digits fit the packed format.
+"""
+import collections
+import os
+import struct
+import threading
+import time
+
+from .grid import Grid
+from .store import DIFFICULTY_NAMES, RECORD_SIZE, _HIGH, _LOW, _TO_HIGH, pack_record, unpack_record
+
+MAGIC = b"SUDOKUJL"
+FORMAT_VERSION = 2
+READ_VERSIONS = (1, 2)
+HEADER = struct.Struct("<8sHH52x")
+GAME = struct.Struct("<c%ds16sd" % RECORD_SIZE)
+CHECKPOINT = struct.Struct("<c81sI")
+MOVE = struct.Struct("<cHBBI")
+HINTED_MOVE = 0x8000  # Flag in a move record's cell field
+
+STEP_KINDS = (b"M", b"H")  # Kinds that start a new step in the history
+CONTINUED = b"+"
+
+Move = collections.namedtuple("Move", "cell old new timestamp hinted", defaults=(False,))
+Move.__doc__ = """One cell changing from old to new (0 for empty), with time.time() when it did
+
+hinted is True for a move a hint made, and stays True on the moves that
+undo and redo it, so the caller can unmark and mark the cell again.
+"""
+
+SavedGame = collections.namedtuple("SavedGame", "difficulty puzzle solution puzzle_id board hinted history moves")
+SavedGame.__doc__ = """A game read back from a journal
+
+puzzle, solution and board are Grids, board holding the digits at the
+time of the last record; hinted is the set of (row, col) cells filled in
+by hints; history a MoveHistory of the steps since the checkpoint;
+moves the number of move records replayed.
+"""
+
+
+class MoveHistory:
+    """Steps of moves with a cursor; undo() and redo() return the moves to apply, newest change last"""
+
+    def __init__(self):
+        self.steps = []
+        self.cursor = 0  # Steps before the cursor are done, the rest can be redone
+
+    def record(self, moves):
+        """Adds a step of moves already made, dropping anything that could have been redone"""
+        moves = tuple(moves)
+        if moves:
+            del self.steps[self.cursor:]
+            self.steps.append(moves)
+            self.cursor += 1
+        return moves
+
+    def undo(self, timestamp=None):
+        """The moves that take back the last step, or () if there is none"""
+        if not self.cursor:
+            return ()
+        self.cursor -= 1
+        timestamp = time.time() if timestamp is None else timestamp
+        return tuple(Move(move.cell, move.new, move.old, timestamp, move.hinted)
+                     for move in reversed(self.steps[self.cursor]))
+
+    def redo(self, timestamp=None):
+        """The moves that make the last undone step again, or () if there is none"""
+        if self.cursor == len(self.steps):
+            return ()
+        self.cursor += 1
+        timestamp = time.time() if timestamp is None else timestamp
+        return tuple(move._replace(timestamp=timestamp) for move in self.steps[self.cursor - 1])
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self.steps)
+
+    def clear(self):
+        self.steps.clear()
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.steps)
+
+
+class Journal:
+    """Writes a game's moves to `path` on a background thread, checkpointing every `checkpoint_every` moves
+
+    start_game(), log() and discard() only queue work and return at
+    once. The thread waits `flush_interval` seconds after the first
+    queued item so one write carries the whole batch, then flushes and
+    fsyncs; a crash loses at most that interval's moves. It follows the
+    board as it goes, so checkpoints need nothing from the caller.
+    """
+
+    def __init__(self, path, checkpoint_every=64, flush_interval=0.25, sync=True):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self.writes = 0  # write() calls, a batch or a rewrite each
+        self.records = 0  # Move records written
+        self.checkpoints = 0
+        self._pending = []
+        self._busy = False
+        self._flushing = 0  # Callers waiting in flush(), who should not wait out the interval
+        self._stopped = False
+        self._condition = threading.Condition()
+        # Writer thread state: the game record, the board and hinted cells it has seen, the open file
+        self._game = None
+        self._start_time = 0.0
+        self._cells = None
+        self._hinted = set()
+        self._since_checkpoint = 0
+        self._last_ms = 0
+        self._file = None
+        self._thread = threading.Thread(target=self._write_loop, name="Journal", daemon=True)
+        self._thread.start()
+
+    def start_game(self, difficulty, puzzle, solution, puzzle_id="", board=None, hinted=()):
+        """Begins a new journal for a 9x9 game, replacing the last one
+
+        A resumed game passes the `board` it stands at and its `hinted`
+        (row, col) cells, which become the first checkpoint.
+        """
+        puzzle = Grid.coerce(puzzle)
+        board = puzzle if board is None else Grid.coerce(board)
+        self._queue(("game", difficulty, puzzle, Grid.coerce(solution), puzzle_id or "", time.time(), board,
+                     {row * 9 + col for row, col in hinted}))
+
+    def log(self, kind, moves):
+        """Queues a step's moves; kind is b"M", b"H", b"U" or b"R" as in the module docstring"""
+        if moves:
+            self._queue(("moves", kind, tuple(moves)))
+
+    def discard(self):
+        """Deletes the journal, e.g. once the game is solved"""
+        self._queue(("discard",))
+
+    def flush(self, timeout=None):
+        """Waits until everything queued so far is on disk; False if `timeout` seconds pass first"""
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self):
+        """Writes what is queued and stops the thread"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _queue(self, item):
+        with self._condition:
+            if self._stopped:
+                raise ValueError("Journal is closed")
+            self._pending.append(item)
+            self._condition.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopped)
+                if not self._pending:
+                    return
+                # Let a burst of moves gather into one write, unless someone is waiting
+                self._condition.wait_for(lambda: self._stopped or self._flushing, self.flush_interval)
+                items, self._pending = self._pending, []
+                self._busy = True
+            try:
+                self._write(items)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, items):
+        """Applies a batch: one rewrite if it started a game or reached a checkpoint, then one append"""
+        checkpoint = None
+        records = []
+        for item in items:
+            if item[0] == "game":
+                _, difficulty, puzzle, solution, puzzle_id, started, board, hinted = item
+                self._game = GAME.pack(b"G", pack_record(difficulty, puzzle, solution),
+                                       puzzle_id.encode("ascii"), started)
+                self._start_time = started
+                self._cells = bytearray(board.cells)
+                self._hinted = set(hinted)
+                self._last_ms = 0
+                checkpoint = self._snapshot()
+                records = []
+            elif item[0] == "discard":
+                self._game = None
+                checkpoint = None
+                records = []
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+            elif self._game is not None:
+                _, kind, moves = item
+                undoing = kind == b"U"
+                for move in moves:
+                    self._last_ms = max(0, int((move.timestamp - self._start_time) * 1000))
+                    records.append(MOVE.pack(kind, move.cell | (HINTED_MOVE if move.hinted else 0), move.old,
+                                             move.new, self._last_ms))
+                    self._cells[move.cell] = move.new
+                    if move.hinted:
+                        if undoing:
+                            self._hinted.discard(move.cell)
+                        else:
+                            self._hinted.add(move.cell)
+                    kind = CONTINUED
+                self._since_checkpoint += len(moves)
+                if self._since_checkpoint >= self.checkpoint_every:
+                    # The checkpoint holds every move so far; the queued records are not needed
+                    checkpoint = self._snapshot()
+                    records = []
+        if self._game is None:
+            return
+        if checkpoint is not None:
+            self._rewrite(checkpoint)
+        if records:
+            self._file.write(b"".join(records))
+            self.writes += 1
+            self.records += len(records)
+            self._sync()
+
+    def _snapshot(self):
+        """The checkpoint record of the board as it stands"""
+        hinted = bytearray(len(self._cells))
+        for cell in self._hinted:
+            hinted[cell] = 1
+        self._since_checkpoint = 0
+        return CHECKPOINT.pack(b"C", bytes(map(int.__or__, bytes(self._cells).translate(_TO_HIGH), hinted)),
+                               self._last_ms)
+
+    def _rewrite(self, checkpoint):
+        """Replaces the file with the header, the game and a checkpoint, through a rename"""
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, MOVE.size) + self._game + checkpoint)
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "ab")
+        self.writes += 1
+        self.checkpoints += 1
+
+    def _sync(self):
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+
+def load_game(path):
+    """The SavedGame in a journal, or None if there is no journal at `path`
+
+    Raises ValueError for a file that is not a journal.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER.size + GAME.size + CHECKPOINT.size:
+        raise ValueError("%s is not a game journal: too short" % path)
+    magic, version, move_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("%s is not a game journal" % path)
+    if version not in READ_VERSIONS or move_size != MOVE.size:
+        raise ValueError("%s is journal format %d, this reads format %d" % (path, version, FORMAT_VERSION))
+
+    _, record, puzzle_id, _ = GAME.unpack_from(data, HEADER.size)
+    difficulty = DIFFICULTY_NAMES[record[0]]
+    puzzle, solution = unpack_record(record)
+    _, packed, _ = CHECKPOINT.unpack_from(data, HEADER.size + GAME.size)
+    cells = bytearray(packed.translate(_HIGH))
+    hinted = {index for index, flags in enumerate(packed.translate(_LOW)) if flags & 1}
+
+    # Rebuild the steps made since the checkpoint while replaying their moves
+    history = MoveHistory()
+    step = None  # Moves of the step being read, while it is a new one
+    undoing = False  # Whether the record being read takes a step back
+    offset = HEADER.size + GAME.size + CHECKPOINT.size
+    moves = 0
+    while offset + MOVE.size <= len(data):
+        kind, cell, old, new, _ = MOVE.unpack_from(data, offset)
+        offset += MOVE.size
+        hint = bool(cell & HINTED_MOVE) or kind == b"H"  # Format 1 marks only the hint itself
+        cell &= ~HINTED_MOVE
+        if cell >= len(cells):
+            break  # Not a record this writer made; stop rather than guess
+        cells[cell] = new
+        moves += 1
+        move = Move(cell, old, new, None, hint)
+        if kind in STEP_KINDS:
+            step = [move]
+            undoing = False
+            del history.steps[history.cursor:]
+            history.steps.append(step)
+            history.cursor += 1
+        elif kind == CONTINUED:
+            if step is not None:
+                step.append(move)
+        else:
+            step = None
+            undoing = kind == b"U"
+            if kind == b"U" and history.can_undo():
+                history.cursor -= 1
+            elif kind == b"R" and history.can_redo():
+                history.cursor += 1
+        if hint:
+            if undoing:
+                hinted.discard(cell)
+            else:
+                hinted.add(cell)
+    history.steps = [tuple(steps) for steps in history.steps]
+    return SavedGame(difficulty, puzzle, solution, puzzle_id.rstrip(b"\0").decode("ascii"), Grid(cells),
+                     {divmod(index, 9) for index in hinted}, history, moves)
+
+
+def default_path():
+    """SUDOKU_AUTOSAVE if set, otherwise autosave.journal in the home directory's .sudoku folder"""
+    path = os.environ.get('SUDOKU_AUTOSAVE')
+    if path:
+        return path
+    folder = os.path.join(os.path.expanduser("~"), ".sudoku")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, "autosave.journal")
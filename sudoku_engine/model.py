@@ -0,0 +1,121 @@
+"""Mutable board state for a game in progress, with incremental conflict tracking"""
+from .grid import Grid, cell_units, units
+
+# Cell indices of each 9x9 unit: rows are units 0-8, columns 9-17, boxes 18-26
+UNITS = units(3)
+
+# The three (unit, position in unit) pairs of each 9x9 cell
+CELL_UNITS = cell_units(3)
+
+
+class BoardModel:
+    """The player's board with per-row, per-column and per-box digit counts
+
+    set() only looks at other cells when a digit's count in one of the
+    changed cell's units crosses between one and two, so keeping the
+    conflict set up to date costs the same however full the board is.
+    """
+
+    def __init__(self, puzzle=None, box_size=3):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self._units = units(box_size)
+        self._cell_units = cell_units(box_size)
+        self.givens = set()  # (row, col) of the puzzle's clues
+        self.conflicts = set()  # (row, col) of cells whose digit repeats in a unit
+        self.clear()
+        if puzzle is not None:
+            self.load(puzzle)
+
+    def load(self, puzzle):
+        """Starts over from a puzzle, taking on its size; its filled cells become the givens"""
+        puzzle = Grid.coerce(puzzle)
+        if puzzle.box_size != self.box_size:
+            self.box_size = puzzle.box_size
+            self.size = puzzle.size
+            self._units = units(self.box_size)
+            self._cell_units = cell_units(self.box_size)
+        self.clear()
+        size = self.size
+        for index, num in enumerate(puzzle.cells):
+            if num:
+                self.set(index // size, index % size, num)
+                self.givens.add(divmod(index, size))
+
+    def clear(self):
+        """Empties every cell"""
+        size = self.size
+        self.cells = bytearray(size * size)
+        # The cells again, unit by unit, so find() locates a digit in a unit at C speed
+        self.units = [bytearray(size) for _ in range(3 * size)]
+        self.givens.clear()
+        self.conflicts.clear()
+        self.filled = 0
+        # counts[unit][num], units numbered as in grid.units()
+        self.counts = [[0] * (size + 1) for _ in range(3 * size)]
+
+    def get(self, row, col):
+        return self.cells[row * self.size + col]
+
+    def set(self, row, col, num):
+        """Writes a digit (0 to empty) and returns the cells whose conflict state may have changed"""
+        size = self.size
+        index = row * size + col
+        old = self.cells[index]
+        if old == num:
+            return set()
+
+        counts = self.counts
+        units = self.units
+        unit_cells = self._units
+        self.cells[index] = num
+        self.filled += (num != 0) - (old != 0)
+
+        affected = {(row, col)}
+        for unit, position in self._cell_units[index]:
+            cells = units[unit]
+            cells[position] = num
+            if old:
+                counts[unit][old] -= 1
+                if counts[unit][old] == 1:
+                    # The one cell still holding old in this unit may stop conflicting
+                    affected.add(divmod(unit_cells[unit][cells.find(old)], size))
+            if num:
+                counts[unit][num] += 1
+                if counts[unit][num] == 2:
+                    # The cell that held num alone until now starts conflicting
+                    other = cells.find(num)
+                    if other == position:
+                        other = cells.find(num, other + 1)
+                    affected.add(divmod(unit_cells[unit][other], size))
+
+        for cell in affected:
+            if self._repeats(*cell):
+                self.conflicts.add(cell)
+            else:
+                self.conflicts.discard(cell)
+        return affected
+
+    def _repeats(self, row, col):
+        """True if the cell's digit appears elsewhere in its row, column or box"""
+        index = row * self.size + col
+        num = self.cells[index]
+        if not num:
+            return False
+        counts = self.counts
+        return any(counts[unit][num] > 1 for unit, _ in self._cell_units[index])
+
+    def is_valid_move(self, row, col, num):
+        """Checks if num could go at (row, col) without repeating in a unit"""
+        index = row * self.size + col
+        own = 1 if self.cells[index] == num else 0
+        counts = self.counts
+        return all(counts[unit][num] == own for unit, _ in self._cell_units[index])
+
+    def is_complete(self):
+        """Every cell filled and nothing repeats"""
+        return self.filled == len(self.cells) and not self.conflicts
+
+    def grid(self):
+        """The current board as a Grid"""
+        return Grid(self.cells)
@@ -0,0 +1,105 @@
+"""In-memory pool of ready puzzles, topped up by a background thread"""
+import collections
+import threading
+import time
+
+from .generator import CELLS_TO_KEEP, generate
+
+
+class PuzzlePool:
+    """Keeps up to `capacity` puzzles per difficulty so get() rarely has to generate
+
+    Puzzles are whatever `generator(difficulty)` returns: (puzzle,
+    solution) pairs from the default generate, or the (puzzle, solution,
+    puzzle_id) triples of new_puzzle, as the game uses. A daemon thread
+    refills a difficulty back to capacity once it drops below `low_water`. Hit/miss counters and refill latencies are kept for
+    sizing the pool, see stats().
+    """
+
+    def __init__(self, difficulties=tuple(CELLS_TO_KEEP), capacity=8, low_water=3, generator=generate):
+        if not 0 <= low_water <= capacity:
+            raise ValueError("low_water must be between 0 and capacity")
+        self.capacity = capacity
+        self.low_water = low_water
+        self.generator = generator
+        self.hits = dict.fromkeys(difficulties, 0)
+        self.misses = dict.fromkeys(difficulties, 0)
+        self.refill_times = collections.deque(maxlen=1000)  # Seconds per generated puzzle
+
+        self._puzzles = {difficulty: collections.deque() for difficulty in difficulties}
+        self._refilling = set(difficulties)  # Start by filling every level
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._refill_loop, name="PuzzlePool", daemon=True)
+
+    def start(self):
+        """Starts the background refill thread"""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Asks the refill thread to exit once its current puzzle is done"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def get(self, difficulty, block=True):
+        """Returns a pooled puzzle as the generator made it, generating one on the spot if the pool is empty
+
+        With block=False an empty pool returns None instead, for callers
+        that generate elsewhere; the miss is counted and a refill started
+        all the same.
+        """
+        with self._condition:
+            puzzles = self._puzzles[difficulty]
+            if puzzles:
+                self.hits[difficulty] += 1
+                made = puzzles.popleft()
+            else:
+                self.misses[difficulty] += 1
+                made = None
+            if len(puzzles) < self.low_water:
+                self._refilling.add(difficulty)
+                self._condition.notify()
+        if made is None and block:
+            made = self.generator(difficulty)
+        return made
+
+    def size(self, difficulty):
+        with self._condition:
+            return len(self._puzzles[difficulty])
+
+    def stats(self):
+        """Counters and refill latency summary as a plain dict"""
+        with self._condition:
+            times = sorted(self.refill_times)
+            return {
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "sizes": {difficulty: len(puzzles) for difficulty, puzzles in self._puzzles.items()},
+                "refills": len(times),
+                "refill_mean": sum(times) / len(times) if times else 0.0,
+                "refill_p99": times[int(0.99 * (len(times) - 1))] if times else 0.0,
+            }
+
+    def _refill_loop(self):
+        while True:
+            with self._condition:
+                while not self._refilling and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                # Serve the emptiest level first
+                difficulty = min(self._refilling, key=lambda level: len(self._puzzles[level]))
+
+            started = time.perf_counter()
+            made = self.generator(difficulty)
+            elapsed = time.perf_counter() - started
+
+            with self._condition:
+                self.refill_times.append(elapsed)
+                puzzles = self._puzzles[difficulty]
+                if len(puzzles) < self.capacity:
+                    puzzles.append(made)
+                if len(puzzles) >= self.capacity:
+                    self._refilling.discard(difficulty)
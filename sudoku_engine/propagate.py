@@ -0,0 +1,240 @@
+"""Constraint-propagating backend for every board size
+
+Each cell keeps a bitmask of the digits it can still take. Placing a digit
+strikes it from the cell's peers (naked singles) and a digit with one
+place left in a unit is placed there (hidden singles), repeated until
+nothing changes. Search then branches on the cell with the fewest
+candidates (MRV). Every mask change is pushed on a trail as (cell, old
+mask), so backtracking pops back to a mark instead of copying the masks
+per branch. A Zobrist hash of the solved cells is kept up to date along
+the way, so counting can memoise outcomes in a TranspositionCache. On
+16x16 and 25x25 boards this settles most cells without branching at
+all, where row-major backtracking never finishes.
+"""
+import random
+import sys
+
+from .grid import Grid, cell_units, peers, units
+from .transposition import zobrist_keys
+
+# Search recurses once per branching cell, and filling an empty 25x25 board
+# branches about 480 deep; leave room for that, and for the frames that
+# stats.instrumented and budget.budgeted add per level. The limit is
+# process-wide, so it is raised once on import rather than per solver
+RECURSION_LIMIT = 4 * 25 * 25 + 100
+if sys.getrecursionlimit() < RECURSION_LIMIT:
+    sys.setrecursionlimit(RECURSION_LIMIT)
+
+
+def _digits(mask, rng):
+    """The digits in a candidate mask, ascending or in random order"""
+    digits = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        digits.append(bit.bit_length() - 1)
+    if rng is not None and len(digits) > 1:
+        rng.shuffle(digits)
+    return digits
+
+
+class PropagatingSolver:
+    """Search over candidate masks with naked and hidden single propagation and fewest-candidates branching"""
+    BOX_SIZES = (2, 3, 4, 5)
+
+    def __init__(self, board, cache=None):
+        board = Grid.coerce(board)
+        self.cache = cache  # TranspositionCache for count_solutions, optional
+        self.cells = bytearray(board.cells)
+        self.box_size = board.box_size
+        self.size = board.size
+        self.all_digits = (2 << self.size) - 2
+        self.units = units(self.box_size)
+        self.peers = peers(self.box_size)
+        self.cell_units = tuple(tuple(unit for unit, _ in cell) for cell in cell_units(self.box_size))
+        self.zobrist = zobrist_keys(self.box_size)
+
+    def candidates(self, row, col):
+        """Returns the bitmask of digits that can go in a cell, judged by the filled cells only"""
+        cells = self.cells
+        used = 0
+        for peer in self.peers[row * self.size + col]:
+            used |= 1 << cells[peer]
+        return ~used & self.all_digits
+
+    def place(self, row, col, num):
+        """Puts a digit in an empty cell"""
+        self.cells[row * self.size + col] = num
+
+    def remove(self, row, col):
+        """Empties a filled cell"""
+        self.cells[row * self.size + col] = 0
+
+    def grid(self):
+        """The current cells as a Grid"""
+        return Grid(self.cells)
+
+    def _start(self):
+        """Sets up the candidate masks and an empty trail from the cells; False on a contradiction"""
+        all_digits = self.all_digits
+        self.cand = [1 << num if num else all_digits for num in self.cells]
+        self.trail = []
+        zobrist = self.zobrist
+        self.hash = 0
+        for index, num in enumerate(self.cells):
+            if num:
+                self.hash ^= zobrist[index][num]
+        return self._propagate([index for index, num in enumerate(self.cells) if num], set(range(len(self.units))))
+
+    def _undo(self, mark):
+        """Restores every mask, and the hash, changed since the trail was `mark` entries long"""
+        cand = self.cand
+        trail = self.trail
+        while len(trail) > mark:
+            index, mask = trail.pop()
+            if index < 0:
+                self.hash = mask  # (-1, hash) entries save the hash
+            else:
+                cand[index] = mask
+
+    def _propagate(self, queue, dirty):
+        """Applies naked and hidden singles until nothing changes; False on a contradiction
+
+        `queue` holds cells just narrowed to one digit, whose peers have not
+        had that digit struck yet; `dirty` the units to check for hidden
+        singles. Changed masks go on the trail, and each cell that becomes
+        solved is XORed into the hash.
+        """
+        cand = self.cand
+        zobrist = self.zobrist
+        key = self.hash
+        record = self.trail.append
+        peers = self.peers
+        cell_units = self.cell_units
+        units = self.units
+        all_digits = self.all_digits
+        while True:
+            while queue:
+                index = queue.pop()
+                bit = cand[index]
+                for peer in peers[index]:
+                    mask = cand[peer]
+                    if mask & bit:
+                        if mask == bit:
+                            return False
+                        record((peer, mask))
+                        mask ^= bit
+                        cand[peer] = mask
+                        dirty.update(cell_units[peer])
+                        if not mask & (mask - 1):
+                            queue.append(peer)
+                            key ^= zobrist[peer][mask.bit_length() - 1]
+
+            # Only units that lost a candidate can have gained a hidden single
+            while dirty:
+                unit = units[dirty.pop()]
+                once = twice = placed = 0
+                for index in unit:
+                    mask = cand[index]
+                    twice |= once & mask
+                    once |= mask
+                    if not mask & (mask - 1):
+                        placed |= mask
+                if once != all_digits:
+                    return False  # A digit has nowhere left to go in this unit
+                singles = all_digits & ~twice & ~placed
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    for index in unit:
+                        mask = cand[index]
+                        if mask & bit:
+                            record((index, mask))
+                            cand[index] = bit
+                            queue.append(index)
+                            key ^= zobrist[index][bit.bit_length() - 1]
+                            # Its other units lost candidates too
+                            dirty.update(cell_units[index])
+                            break
+                    else:
+                        return False  # The cell it needed took another hidden single
+            if not queue:
+                self.hash = key
+                return True
+
+    def solved_by_singles(self):
+        """True if naked and hidden singles alone fill the board, which proves its solution unique"""
+        return self._start() and all(not mask & (mask - 1) for mask in self.cand)
+
+    def _branch_cell(self):
+        """The unsolved cell with the fewest candidates, or None when every cell is solved"""
+        best, best_size = None, self.size + 1
+        for index, mask in enumerate(self.cand):
+            if mask & (mask - 1):
+                size = bin(mask).count("1")
+                if size < best_size:
+                    best, best_size = index, size
+                    if size == 2:
+                        break
+        return best
+
+    def _try(self, index, num):
+        """Places num at index and propagates, returns the trail mark to undo to, or None on a contradiction"""
+        mark = len(self.trail)
+        self.trail.append((-1, self.hash))
+        self.trail.append((index, self.cand[index]))
+        self.cand[index] = 1 << num
+        self.hash ^= self.zobrist[index][num]
+        if self._propagate([index], set(self.cell_units[index])):
+            return mark
+        self._undo(mark)
+        return None
+
+    def solve(self, rng=random):
+        """Fills the empty cells, trying digits in random order (ascending if rng is None)"""
+        if not self._start() or not self._solve(rng):
+            return False
+        self.cells[:] = bytes(mask.bit_length() - 1 for mask in self.cand)
+        return True
+
+    def _solve(self, rng):
+        """Searches from the current masks; on success they are left solved"""
+        index = self._branch_cell()
+        if index is None:
+            return True
+        for num in _digits(self.cand[index], rng):
+            mark = self._try(index, num)
+            if mark is not None:
+                if self._solve(rng):
+                    return True
+                self._undo(mark)
+        return False
+
+    def count_solutions(self, limit=2):
+        """Counts solutions up to `limit`, leaving the solver state unchanged"""
+        if not self._start():
+            return 0
+        return self._count(limit)
+
+    def _count(self, limit):
+        index = self._branch_cell()
+        if index is None:
+            return 1
+        cache = self.cache
+        if cache is not None:
+            key = self.hash
+            known = cache.lookup(key, limit)
+            if known is not None:
+                return known
+        found = 0
+        for num in _digits(self.cand[index], None):
+            mark = self._try(index, num)
+            if mark is not None:
+                found += self._count(limit - found)
+                self._undo(mark)
+                # Stop as soon as the limit is reached, e.g. on a second solution
+                if found >= limit:
+                    break
+        if cache is not None:
+            cache.store(key, found, limit)
+        return found
@@ -0,0 +1,146 @@
+"""Compact puzzle IDs that rebuild a puzzle from its generator version, difficulty and seed
+
+generate() is a pure function of (difficulty, seed) for a given version of
+the generator, so an ID such as "1h3v9qk2a7" (version 1, hard, seed in
+base 32) is all it takes to share or replay a puzzle. Popular IDs are kept
+in a PuzzleCache so they are not regenerated on every request.
+"""
+import collections
+import random
+import threading
+
+from .generator import generate
+
+# Bump whenever generate() may return a different puzzle for the same seed;
+# IDs made by another version are refused rather than rebuilt wrongly
+GENERATOR_VERSION = 1
+
+DIFFICULTY_CODES = {"easy": "e", "medium": "m", "hard": "h"}
+CODE_DIFFICULTIES = {code: difficulty for difficulty, code in DIFFICULTY_CODES.items()}
+
+# Crockford's base 32: no i, l, o or u, so IDs survive being read out or retyped
+ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"
+DECODE = {char: value for value, char in enumerate(ALPHABET)}
+DECODE.update({'i': 1, 'l': 1, 'o': 0})
+
+SEED_BITS = 40  # Seeds drawn by new_puzzle_id, eight characters
+
+
+def make_puzzle_id(difficulty, seed, version=GENERATOR_VERSION):
+    """The ID of generate(difficulty, seed) for a non-negative integer seed"""
+    if difficulty not in DIFFICULTY_CODES:
+        raise ValueError("Unknown difficulty: %r" % (difficulty,))
+    if seed < 0:
+        raise ValueError("Seeds in puzzle IDs must not be negative")
+    digits = []
+    while True:
+        seed, value = divmod(seed, 32)
+        digits.append(ALPHABET[value])
+        if not seed:
+            break
+    return "%d%s%s" % (version, DIFFICULTY_CODES[difficulty], "".join(reversed(digits)))
+
+
+def parse_puzzle_id(puzzle_id):
+    """Splits an ID into (version, difficulty, seed); case and surrounding spaces are ignored"""
+    text = puzzle_id.strip().lower()
+    split = 0
+    while split < len(text) and text[split].isdigit():
+        split += 1
+    if not split or split + 1 >= len(text) or text[split] not in CODE_DIFFICULTIES:
+        raise ValueError("Malformed puzzle ID: %r" % (puzzle_id,))
+
+    seed = 0
+    for char in text[split + 1:]:
+        if char not in DECODE:
+            raise ValueError("Malformed puzzle ID: %r" % (puzzle_id,))
+        seed = seed * 32 + DECODE[char]
+    return int(text[:split]), CODE_DIFFICULTIES[text[split]], seed
+
+
+def canonical_puzzle_id(puzzle_id):
+    """The one spelling of an ID that make_puzzle_id would produce"""
+    version, difficulty, seed = parse_puzzle_id(puzzle_id)
+    return make_puzzle_id(difficulty, seed, version)
+
+
+def new_puzzle_id(difficulty, rng=None):
+    """An ID with a fresh random seed"""
+    rng = rng or random.SystemRandom()
+    return make_puzzle_id(difficulty, rng.getrandbits(SEED_BITS))
+
+
+def puzzle_from_id(puzzle_id, budget=None):
+    """Rebuilds the (puzzle, solution) pair of Grids an ID stands for, within `budget` if one is given"""
+    version, difficulty, seed = parse_puzzle_id(puzzle_id)
+    if version != GENERATOR_VERSION:
+        raise ValueError("Puzzle ID %r is from generator version %d, this is version %d"
+                         % (puzzle_id, version, GENERATOR_VERSION))
+    return generate(difficulty, seed, budget=budget)
+
+
+def new_puzzle(difficulty, budget=None):
+    """A (puzzle, solution, puzzle_id) triple for a fresh random ID, usable as a PuzzlePool generator"""
+    puzzle_id = new_puzzle_id(difficulty)
+    return puzzle_from_id(puzzle_id, budget) + (puzzle_id,)
+
+
+class PuzzleCache:
+    """Memoizes puzzle_from_id for up to `maxsize` IDs, evicting the least recently used
+
+    Lookups are safe from several threads. Two threads missing on the same
+    ID may both generate it; the result is the same either way.
+    """
+
+    def __init__(self, maxsize=256, builder=puzzle_from_id):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.builder = builder
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, puzzle_id, budget=None, block=True):
+        """Returns the (puzzle, solution) pair for an ID, building it on a miss
+
+        `budget` is passed on to the builder. With block=False a miss
+        returns None instead of building, for callers that build the pair
+        elsewhere; a malformed ID still raises ValueError.
+        """
+        with self._lock:
+            pair = self._entries.get(puzzle_id)
+            if pair is not None:
+                self._entries.move_to_end(puzzle_id)
+                self.hits += 1
+                return pair
+
+        # Equivalent spellings of an ID share one entry
+        key = canonical_puzzle_id(puzzle_id)
+        with self._lock:
+            pair = self._entries.get(key)
+            if pair is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pair
+            if not block:
+                return None  # The get that builds it counts the miss
+            self.misses += 1
+
+        pair = self.builder(key) if budget is None else self.builder(key, budget)
+        with self._lock:
+            self._entries[key] = pair
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return pair
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Counters as a plain dict"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
@@ -0,0 +1,416 @@
+"""Asyncio HTTP/JSON server for generating, solving, validating and hinting puzzles
+
+    python -m sudoku_engine.server --port 8080 --workers 4
+
+Boards travel as 81-character lines ('.' or '0' for an empty cell):
+
+    POST /generate  {"difficulty": "hard"} or {"id": "1h3"}  -> {"id", "puzzle", "solution"}
+    POST /solve     {"puzzle": line}                          -> {"solution"}
+    POST /validate  {"board": line}                           -> {"complete", "valid", "conflicts"}
+    POST /hint      {"board": line, "difficulty": "medium",
+                     "solution": line}  (solution optional)   -> {"row", "col", "value"}
+    GET  /metrics   latency histograms in the Prometheus text format
+    GET  /stats     the same as JSON
+
+Errors come back as {"error": message}: 400 for a malformed request, 422
+for a board with no solution or nothing to hint, 503 when the server is
+full and 504 past the request timeout.
+
+Generating, solving and hinting run in a process pool, so the event loop
+only parses and routes. At most `max_concurrency` jobs are in the pool at
+once and `max_pending` more may wait for a slot; past that requests are
+turned away with 503 rather than queued without bound. A request's
+deadline is set when it arrives. A job whose request ran out of time
+while waiting for a slot is never started. A started job searches under
+a Budget of the time its request has left, so it ends itself, and frees
+its worker and slot, about when the client gets its 504.
+"""
+import argparse
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+from .budget import Budget, BudgetExceeded
+from .formats import from_line, to_line
+from .generator import CELLS_TO_KEEP
+from .hints import hint_scores, select_hint_cell
+from .model import BoardModel
+from .puzzle_ids import new_puzzle_id, puzzle_from_id
+from .solver import solve
+
+# Upper bounds in seconds, from a cached validate to a hard generate
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MAX_HEAD = 16 * 1024  # Request line and headers
+MAX_BODY = 16 * 1024
+IDLE_TIMEOUT = 60.0  # Seconds a keep-alive connection may sit between requests
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           422: "Unprocessable Entity", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class HTTPError(Exception):
+    """Ends a request with an error status and {"error": message}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyHistogram:
+    """Latencies counted into LATENCY_BUCKETS, as a Prometheus histogram keeps them"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Estimated q-quantile, interpolated within its bucket; None before any observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):
+                    return lower  # +Inf bucket, report its lower bound
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def to_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float('inf') else repr(bound)] = cumulative
+        return {"count": self.count, "sum": self.sum, "p50": self.quantile(0.5), "p99": self.quantile(0.99),
+                "buckets": buckets}
+
+
+# Pool jobs: module-level so they pickle, plain strings in and out so they pickle cheaply.
+# `deadline` is the request's, in time.time() seconds: unlike time.monotonic(), a clock the
+# worker processes are sure to share with the server
+
+def _budget(deadline):
+    """A Budget for what is left of a request's time"""
+    return Budget(deadline - time.time())
+
+
+def _generate_job(puzzle_id, deadline):
+    puzzle, solution = puzzle_from_id(puzzle_id, _budget(deadline))
+    return to_line(puzzle), to_line(solution)
+
+
+def _solve_job(line, backend, deadline):
+    solution = solve(from_line(line), backend, budget=_budget(deadline))
+    return None if solution is None else to_line(solution)
+
+
+def _hint_job(line, difficulty, solution_line, backend, deadline):
+    board = from_line(line)
+    solution = (solve(board, backend, budget=_budget(deadline)) if solution_line is None
+                else from_line(solution_line))
+    if solution is None:
+        return None
+    cell = select_hint_cell(hint_scores(board), difficulty)
+    if cell is None:
+        return None
+    row, col = cell
+    return row, col, solution[row][col]
+
+
+class PuzzleServer:
+    """The HTTP front end; start() it inside a running event loop, close() when done"""
+
+    def __init__(self, workers=None, max_concurrency=None, max_pending=64, timeout=10.0, executor=None,
+                 backend="dlx"):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.executor = executor
+        # Clients send arbitrary puzzles, and DLX has no row-major worst case to hit
+        self.backend = backend
+        self.latency = collections.defaultdict(LatencyHistogram)  # By endpoint
+        self.responses = collections.Counter()  # By (endpoint, status)
+        self.rejected = 0
+        self.in_pool = 0
+        self._waiting = 0
+        self._slots = None
+        self._server = None
+        self.routes = {
+            "/generate": ("POST", self.generate),
+            "/solve": ("POST", self.solve),
+            "/validate": ("POST", self.validate),
+            "/hint": ("POST", self.hint),
+            "/metrics": ("GET", self.metrics),
+            "/stats": ("GET", self.stats),
+        }
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """Starts listening, returns the bound port (useful with port 0)"""
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+            # Start the workers now rather than on the first requests, which would time out waiting
+            await asyncio.gather(*(asyncio.wrap_future(self.executor.submit(int)) for _ in range(self.workers)))
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(self._connection, host, port, limit=MAX_HEAD)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _offload(self, deadline, function, *args):
+        """Runs function(*args, deadline) in the process pool once a slot is free, unless the deadline has passed"""
+        if self._waiting >= self.max_pending:
+            self.rejected += 1
+            raise HTTPError(503, "Server busy, try again later")
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        if time.time() >= deadline:
+            self._slots.release()
+            raise asyncio.TimeoutError  # Out of time while queued; the job would only hold a worker
+        loop = asyncio.get_running_loop()
+        self.in_pool += 1
+        try:
+            future = self.executor.submit(function, *args, deadline)
+        except BaseException:
+            self._release_slot()
+            raise
+        # The slot is held until the worker is really done, not just until the request gives up
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_slot))
+        return await asyncio.wrap_future(future)
+
+    def _release_slot(self):
+        self.in_pool -= 1
+        self._slots.release()
+
+    async def generate(self, request, deadline):
+        if "id" in request:
+            puzzle_id = _field(request, "id")
+        else:
+            difficulty = request.get("difficulty", "medium")
+            if difficulty not in CELLS_TO_KEEP:
+                raise HTTPError(400, "Unknown difficulty: %r" % (difficulty,))
+            puzzle_id = new_puzzle_id(difficulty)
+        puzzle, solution = await self._offload(deadline, _generate_job, puzzle_id)
+        return {"id": puzzle_id, "puzzle": puzzle, "solution": solution}
+
+    async def solve(self, request, deadline):
+        solution = await self._offload(deadline, _solve_job, _consistent(_board(request, "puzzle")), self.backend)
+        if solution is None:
+            raise HTTPError(422, "Puzzle has no solution")
+        return {"solution": solution}
+
+    async def validate(self, request, deadline):
+        # Loading the model is a few dozen microseconds, less than a round trip to the pool
+        model = BoardModel(from_line(_board(request, "board")))
+        return {"complete": model.is_complete(), "valid": not model.conflicts,
+                "conflicts": sorted(model.conflicts)}
+
+    async def hint(self, request, deadline):
+        difficulty = request.get("difficulty", "medium")
+        if difficulty not in CELLS_TO_KEEP:
+            raise HTTPError(400, "Unknown difficulty: %r" % (difficulty,))
+        solution = _board(request, "solution") if "solution" in request else None
+        hint = await self._offload(deadline, _hint_job, _consistent(_board(request, "board")), difficulty, solution,
+                                   self.backend)
+        if hint is None:
+            raise HTTPError(422, "No hint: the board is full or has no solution")
+        row, col, value = hint
+        return {"row": row, "col": col, "value": value}
+
+    async def metrics(self, request, deadline):
+        lines = ["# HELP sudoku_http_request_duration_seconds Request latency by endpoint.",
+                 "# TYPE sudoku_http_request_duration_seconds histogram"]
+        for endpoint, histogram in sorted(self.latency.items()):
+            for bound, count in histogram.to_dict()["buckets"].items():
+                lines.append('sudoku_http_request_duration_seconds_bucket{endpoint="%s",le="%s"} %d'
+                             % (endpoint, bound, count))
+            lines.append('sudoku_http_request_duration_seconds_sum{endpoint="%s"} %r' % (endpoint, histogram.sum))
+            lines.append('sudoku_http_request_duration_seconds_count{endpoint="%s"} %d'
+                         % (endpoint, histogram.count))
+        lines += ["# HELP sudoku_http_responses_total Responses by endpoint and status.",
+                  "# TYPE sudoku_http_responses_total counter"]
+        for (endpoint, status), count in sorted(self.responses.items()):
+            lines.append('sudoku_http_responses_total{endpoint="%s",status="%d"} %d' % (endpoint, status, count))
+        lines += ["# HELP sudoku_http_jobs_in_pool Jobs running or queued in the process pool.",
+                  "# TYPE sudoku_http_jobs_in_pool gauge",
+                  "sudoku_http_jobs_in_pool %d" % self.in_pool]
+        return "\n".join(lines) + "\n"
+
+    async def stats(self, request, deadline):
+        statuses = collections.defaultdict(dict)
+        for (endpoint, status), count in self.responses.items():
+            statuses[endpoint][str(status)] = count
+        return {
+            "endpoints": {endpoint: dict(histogram.to_dict(), statuses=statuses[endpoint])
+                          for endpoint, histogram in self.latency.items()},
+            "in_pool": self.in_pool,
+            "waiting": self._waiting,
+            "rejected": self.rejected,
+        }
+
+    async def dispatch(self, method, path, body):
+        """Routes one request, returns (status, payload); payload is a dict for JSON or text"""
+        path = path.split("?", 1)[0]
+        if path not in self.routes:
+            return 404, {"error": "No such endpoint: %s" % path}
+        route_method, handler = self.routes[path]
+        if method != route_method:
+            return 405, {"error": "%s takes %s" % (path, route_method)}
+
+        start = time.perf_counter()
+        deadline = time.time() + self.timeout
+        try:
+            request = {}
+            if method == "POST":
+                request = json.loads(body or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("Expected a JSON object")
+            status, payload = 200, await asyncio.wait_for(handler(request, deadline), self.timeout)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except (asyncio.TimeoutError, BudgetExceeded):
+            status, payload = 504, {"error": "Timed out after %g s" % self.timeout}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:  # A bug, not the client's fault; keep serving
+            status, payload = 500, {"error": "%s: %s" % (type(e).__name__, e)}
+        self.latency[path].observe(time.perf_counter() - start)
+        self.responses[path, status] += 1
+        return status, payload
+
+    async def _connection(self, reader, writer):
+        """Serves requests on one connection until the client closes it or asks to"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 431, {"error": "Request head too large"}, False)
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = request_line.split()
+                except ValueError:
+                    await _respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY:
+                    await _respond(writer, 413, {"error": "Body must be at most %d bytes" % MAX_BODY}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+                status, payload = await self.dispatch(method, target, body)
+                await _respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _field(request, name):
+    value = request.get(name)
+    if not isinstance(value, str):
+        raise HTTPError(400, "Expected %r to be a string" % name)
+    return value
+
+
+def _board(request, name):
+    """A board line from the request, checked here so bad input never reaches the pool"""
+    line = _field(request, name).strip()
+    if len(line) != 81 or line.strip(".0123456789"):
+        raise HTTPError(400, "Expected %r to be 81 characters of digits and '.'" % name)
+    return line
+
+
+def _consistent(line):
+    """The line if no digit repeats in a unit; the solver assumes so and could search for a long time otherwise"""
+    conflicts = BoardModel(from_line(line)).conflicts
+    if conflicts:
+        raise HTTPError(422, "Digits repeat at %s" % ", ".join("(%d, %d)" % cell for cell in sorted(conflicts)))
+    return line
+
+
+async def _respond(writer, status, payload, keep_alive):
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    writer.write(("HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n"
+                  % (status, REASONS[status], content_type, len(body), "keep-alive" if keep_alive else "close")
+                  ).encode('latin-1') + body)
+    await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sudoku_engine.server", description="Serve puzzles over HTTP")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080, help="0 picks a free port")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--max-concurrency', type=int, default=None, help="jobs in the pool at once (default: workers)")
+    parser.add_argument('--max-pending', type=int, default=64, help="jobs waiting for a slot before 503s")
+    parser.add_argument('--timeout', type=float, default=10.0, help="seconds before a request gets 504")
+    parser.add_argument('--backend', default="dlx", help="solver backend for /solve and /hint")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = PuzzleServer(args.workers, args.max_concurrency, args.max_pending, args.timeout,
+                              backend=args.backend)
+        port = await server.start(args.host, args.port)
+        sys.stderr.write("Serving on http://%s:%d with %d workers\n" % (args.host, port, server.workers))
+        sys.stderr.flush()
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
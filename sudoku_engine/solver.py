@@ -0,0 +1,277 @@
+"""Backtracking solver and the solve/count entry points shared by every backend
+
+Boards are Grid values; list-of-lists boards (0 marks an empty cell) are
+accepted too and converted on the way in.
+"""
+import random
+
+from .budget import budgeted
+from .dlx import DLXSolver
+from .grid import BOX_SIZES, Grid
+from .propagate import PropagatingSolver
+from .stats import instrumented
+
+BOX_SIDES = {box * box: box for box in BOX_SIZES.values()}  # Box size by board size
+
+
+class BitboardSolver:
+    """Backtracking solver that keeps row, column and box occupancy as bitmasks, for 9x9 boards"""
+    BOX_SIZES = (3,)
+    ALL_DIGITS = 0b1111111110  # Bits 1-9, one per digit
+    # Digits set in each possible mask, so a candidate mask is expanded with one lookup
+    MASK_DIGITS = [tuple(num for num in range(1, 10) if mask >> num & 1) for mask in range(1 << 10)]
+
+    def __init__(self, board):
+        # The solver's own mutable copy of the cells, one buffer copy of the grid
+        self.cells = bytearray(Grid.coerce(board).cells)
+        if len(self.cells) != 81:
+            raise ValueError("BitboardSolver only solves 9x9 boards")
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+        self.empties = []
+
+        for i in range(9):
+            for j in range(9):
+                num = self.cells[i * 9 + j]
+                if num:
+                    bit = 1 << num
+                    self.rows[i] |= bit
+                    self.cols[j] |= bit
+                    self.boxes[3 * (i // 3) + j // 3] |= bit
+                else:
+                    # Row-major order, the same order find_empty walks the board
+                    self.empties.append((i, j, 3 * (i // 3) + j // 3))
+
+    def candidates(self, row, col):
+        """Returns the bitmask of digits that can go in a cell"""
+        box = 3 * (row // 3) + col // 3
+        return ~(self.rows[row] | self.cols[col] | self.boxes[box]) & self.ALL_DIGITS
+
+    def place(self, row, col, num):
+        """Puts a digit in an empty cell and updates the masks"""
+        bit = 1 << num
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[3 * (row // 3) + col // 3] |= bit
+        self.cells[row * 9 + col] = num
+        self.empties.remove((row, col, 3 * (row // 3) + col // 3))
+
+    def remove(self, row, col):
+        """Empties a filled cell and updates the masks"""
+        bit = 1 << self.cells[row * 9 + col]
+        self.rows[row] ^= bit
+        self.cols[col] ^= bit
+        self.boxes[3 * (row // 3) + col // 3] ^= bit
+        self.cells[row * 9 + col] = 0
+        self.empties.append((row, col, 3 * (row // 3) + col // 3))
+
+    def grid(self):
+        """The current cells as a Grid"""
+        return Grid(self.cells)
+
+    def solve(self, rng=random):
+        """Fills the empty cells, trying digits in random order (ascending if rng is None)"""
+        return self._solve(0, rng)
+
+    def _solve(self, k, rng):
+        if k == len(self.empties):
+            return True
+
+        row, col, box = self.empties[k]
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        free = ~(rows[row] | cols[col] | boxes[box]) & self.ALL_DIGITS
+        while free:
+            # Draw the next digit lazily, most cells succeed on the first try
+            digits = self.MASK_DIGITS[free]
+            num = digits[int(rng.random() * len(digits))] if rng is not None else digits[0]
+            bit = 1 << num
+            free ^= bit
+
+            rows[row] |= bit
+            cols[col] |= bit
+            boxes[box] |= bit
+            self.cells[row * 9 + col] = num
+            if self._solve(k + 1, rng):
+                return True
+            rows[row] ^= bit
+            cols[col] ^= bit
+            boxes[box] ^= bit
+            self.cells[row * 9 + col] = 0
+
+        return False
+
+    def count_solutions(self, limit=2):
+        """Counts solutions up to `limit`, leaving the solver state unchanged"""
+        return self._count(0, limit)
+
+    def _count(self, k, limit):
+        empties = self.empties
+        if k == len(empties):
+            return 1
+
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        # Digits that fit at least once / at least twice in each unit: rows 0-8,
+        # columns 9-17, boxes 18-26
+        once = [0] * 27
+        twice = [0] * 27
+        best, best_free, best_size = k, 0, 10
+        for index in range(k, len(empties)):
+            row, col, box = empties[index]
+            free = ~(rows[row] | cols[col] | boxes[box]) & self.ALL_DIGITS
+            if not free:
+                return 0
+            size = len(self.MASK_DIGITS[free])
+            if size < best_size:
+                best, best_free, best_size = index, free, size
+            twice[row] |= once[row] & free
+            once[row] |= free
+            col += 9
+            twice[col] |= once[col] & free
+            once[col] |= free
+            box += 18
+            twice[box] |= once[box] & free
+            once[box] |= free
+
+        if best_size > 1:
+            placed = rows + cols + boxes
+            for unit in range(27):
+                missing = ~placed[unit] & self.ALL_DIGITS
+                if once[unit] != missing:
+                    return 0  # A digit has nowhere left to go in this unit
+                single = missing & ~twice[unit]
+                if single:
+                    # Hidden single: the digit fits in one cell only, so branch on just that
+                    bit = single & -single
+                    for index in range(k, len(empties)):
+                        row, col, box = empties[index]
+                        if unit in (row, 9 + col, 18 + box) and ~(rows[row] | cols[col] | boxes[box]) & bit:
+                            best, best_free = index, bit
+                            break
+                    break
+
+        # Move the chosen cell to slot k
+        empties[k], empties[best] = empties[best], empties[k]
+        row, col, box = empties[k]
+
+        found = 0
+        for num in self.MASK_DIGITS[best_free]:
+            bit = 1 << num
+            rows[row] |= bit
+            cols[col] |= bit
+            boxes[box] |= bit
+            found += self._count(k + 1, limit - found)
+            rows[row] ^= bit
+            cols[col] ^= bit
+            boxes[box] ^= bit
+            # Stop as soon as the limit is reached, e.g. on a second solution
+            if found >= limit:
+                break
+
+        empties[k], empties[best] = empties[best], empties[k]
+        return found
+
+
+# Solving backends by name; each takes a board and offers solve, count_solutions,
+# candidates, place, remove and grid, for the box sizes in its BOX_SIZES
+BACKENDS = {
+    "bitboard": BitboardSolver,
+    "dlx": DLXSolver,
+    "propagate": PropagatingSolver,
+}
+
+
+def get_backend(name):
+    """Returns the solver class registered under `name`"""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError("Unknown solver backend: %r" % (name,)) from None
+
+
+def new_solver(board, backend="bitboard", stats=None, budget=None):
+    """A solver for the board, counting its search into `stats` and charging it to `budget` if given
+
+    Boards of a size the backend does not handle go to the propagating
+    solver, the fastest backend on large boards.
+    """
+    cls = get_backend(backend)
+    board = Grid.coerce(board)
+    if board.box_size not in cls.BOX_SIZES:
+        cls = PropagatingSolver
+    if budget is not None:
+        cls = budgeted(cls)
+    if stats is not None:
+        cls = instrumented(cls)
+    solver = cls(board)
+    if budget is not None:
+        solver.budget = budget
+    if stats is not None:
+        solver.stats = stats
+    return solver
+
+
+def find_empty(board, stats=None):
+    """Finds an empty cell in the board"""
+    if stats is not None:
+        stats.calls["find_empty"] += 1
+    if isinstance(board, Grid):
+        index = board.cells.find(0)
+        return divmod(index, board.size) if index >= 0 else None
+    size = len(board)
+    for i in range(size):
+        for j in range(size):
+            if board[i][j] == 0:
+                return (i, j)
+    return None
+
+
+def is_valid(board, row, col, num, stats=None):
+    """Checks if a number is valid in the board"""
+    if stats is not None:
+        stats.calls["is_valid"] += 1
+    size = len(board)
+    # Check row
+    for j in range(size):
+        if board[row][j] == num and j != col:
+            return False
+
+    # Check column
+    for i in range(size):
+        if board[i][col] == num and i != row:
+            return False
+
+    # Check box
+    side = BOX_SIDES[size]
+    box_row, box_col = side * (row // side), side * (col // side)
+    for i in range(box_row, box_row + side):
+        for j in range(box_col, box_col + side):
+            if board[i][j] == num and (i, j) != (row, col):
+                return False
+
+    return True
+
+
+def solve_board(board, rng=random, backend="bitboard", stats=None, budget=None):
+    """Returns the board filled with random digit order as a Grid, or None if it has no solution
+
+    With a Budget as `budget`, raises BudgetExceeded once it runs out.
+    """
+    if stats is not None:
+        stats.calls["solve_board"] += 1
+    solver = new_solver(board, backend, stats, budget)
+    if not solver.solve(rng):
+        return None
+    return solver.grid()
+
+
+def count_solutions(puzzle, limit=2, backend="bitboard", stats=None, budget=None):
+    """Counts the puzzle's solutions, stopping once `limit` are found"""
+    if stats is not None:
+        stats.calls["count_solutions"] += 1
+    return new_solver(puzzle, backend, stats, budget).count_solutions(limit)
+
+
+def solve(puzzle, backend="bitboard", stats=None, budget=None):
+    """Returns the solved puzzle as a Grid, or None if it has no solution"""
+    return solve_board(puzzle, None, backend, stats, budget)
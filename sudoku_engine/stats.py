@@ -0,0 +1,127 @@
+"""Optional search counters and phase timings, exported as JSON or Prometheus text
+
+Instrumentation is opt-in per call: pass an EngineStats as `stats=` to the
+solve, count, dig and generate functions. Without one the plain solver
+classes run, so the search loops carry no counting code at all.
+"""
+import collections
+import contextlib
+import json
+import time
+
+
+class EngineStats:
+    """Counters and wall-clock phase timings collected over one call
+
+    nodes       recursive search calls
+    candidates  digits (or DLX rows) tried, every node below the root
+    backtracks  candidates whose subtree came back empty
+    max_depth   deepest node, the root being 1
+    calls       entry point calls by function name
+    phases      seconds by phase name: fill, dig (uniqueness included),
+                uniqueness, grade, and render in the game
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.candidates = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.calls = collections.Counter()
+        self.phases = collections.defaultdict(float)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Adds the time spent in the with block to a phase"""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def to_dict(self):
+        return {
+            "nodes": self.nodes,
+            "candidates": self.candidates,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "calls": dict(self.calls),
+            "phases": dict(self.phases),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def to_prometheus(self, prefix="sudoku"):
+        """The stats in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help_text))
+            lines.append("# TYPE %s_%s %s" % (prefix, name, kind))
+            for labels, value in samples:
+                lines.append("%s_%s%s %s" % (prefix, name, labels, repr(value)))
+
+        metric("search_nodes_total", "counter", "Recursive search calls.", [("", self.nodes)])
+        metric("search_candidates_total", "counter", "Candidates tried.", [("", self.candidates)])
+        metric("search_backtracks_total", "counter", "Candidates whose subtree failed.", [("", self.backtracks)])
+        metric("search_max_depth", "gauge", "Deepest search node.", [("", self.max_depth)])
+        metric("calls_total", "counter", "Engine entry point calls.",
+               [('{function="%s"}' % name, count) for name, count in sorted(self.calls.items())])
+        metric("phase_seconds", "gauge", "Wall-clock time per phase.",
+               [('{phase="%s"}' % name, seconds) for name, seconds in sorted(self.phases.items())])
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return "EngineStats(%s)" % self.to_json()
+
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+def timed(stats, name):
+    """stats.phase(name), or a context that does nothing when stats is None"""
+    return _NO_PHASE if stats is None else stats.phase(name)
+
+
+_instrumented = {}
+
+
+def instrumented(cls):
+    """A subclass of a solver backend whose search reports into its `stats` attribute
+
+    Backends search by recursing through _solve and _count, so wrapping those
+    two sees every node.
+    """
+    if cls in _instrumented:
+        return _instrumented[cls]
+
+    class Instrumented(cls):
+        stats = None
+        depth = 0
+
+        def _solve(self, *args):
+            return self._visit(super()._solve, args)
+
+        def _count(self, *args):
+            return self._visit(super()._count, args)
+
+        def _visit(self, search, args):
+            stats = self.stats
+            self.depth += 1
+            stats.nodes += 1
+            if self.depth > stats.max_depth:
+                stats.max_depth = self.depth
+            try:
+                found = search(*args)
+            finally:
+                self.depth -= 1
+            if self.depth:
+                stats.candidates += 1
+                if not found:
+                    stats.backtracks += 1
+            return found
+
+    Instrumented.__name__ = Instrumented.__qualname__ = "Instrumented" + cls.__name__
+    _instrumented[cls] = Instrumented
+    return Instrumented
@@ -0,0 +1,210 @@
+"""Packed on-disk puzzle store, read through mmap
+
+The data file is a 64-byte header followed by fixed-size records:
+
+    offset  size  field
+    0       8     magic b"SUDOKUPK"
+    8       2     format version (little endian)
+    10      2     record size in bytes
+    12      52    reserved, zero
+
+    record: 1 byte difficulty code, then 81 bytes, one per cell, holding
+            the puzzle's digit in the high 4 bits and the solution's in the
+            low 4 bits (0 for an empty puzzle cell)
+
+Each difficulty has a side index next to the data file, "<path>.<difficulty>.idx",
+an array of little-endian uint32 record numbers. Picking a random puzzle
+of a difficulty reads one index entry and one record, whatever the store
+size, and since both files are mapped rather than read, opening a store
+costs the same for a thousand records as for tens of millions.
+
+Writers only ever append: records first, then their index entries, so a
+crash can leave at most index entries the reader ignores.
+"""
+import mmap
+import operator
+import os
+import random
+import struct
+
+from .generator import CELLS_TO_KEEP
+from .grid import Grid
+
+MAGIC = b"SUDOKUPK"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHH52x")
+RECORD_SIZE = 82
+INDEX_ENTRY = struct.Struct("<I")
+
+DIFFICULTY_CODES = {difficulty: code for code, difficulty in enumerate(CELLS_TO_KEEP, 1)}
+DIFFICULTY_NAMES = {code: difficulty for difficulty, code in DIFFICULTY_CODES.items()}
+
+# bytes.translate tables between digits and the two halves of a packed cell
+_HIGH = bytes(value >> 4 for value in range(256))
+_LOW = bytes(value & 0xF for value in range(256))
+_TO_HIGH = bytes((value << 4) & 0xFF for value in range(256))
+
+
+def pack_record(difficulty, puzzle, solution):
+    """The 82 bytes a (puzzle, solution) pair is stored as"""
+    puzzle = Grid.coerce(puzzle).cells
+    solution = Grid.coerce(solution).cells
+    packed = bytes(map(operator.or_, puzzle.translate(_TO_HIGH), solution))
+    return bytes([DIFFICULTY_CODES[difficulty]]) + packed
+
+
+def unpack_record(record):
+    """(puzzle, solution) Grids from one packed record, a translate per grid and no per-cell Python work"""
+    cells = record[1:RECORD_SIZE]
+    return Grid(cells.translate(_HIGH)), Grid(cells.translate(_LOW))
+
+
+def _index_path(path, difficulty):
+    return "%s.%s.idx" % (path, difficulty)
+
+
+class PuzzleStoreWriter:
+    """Appends puzzles to a store, creating it if needed; use as a context manager or call close()"""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = open(path, 'ab')
+        if self._data.tell() == 0:
+            self._data.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE))
+        else:
+            with open(path, 'rb') as f:
+                _check_header(f.read(HEADER.size), path)
+        # Whole records only; a torn record from a crash is overwritten by the next one
+        self.count = (self._data.tell() - HEADER.size) // RECORD_SIZE
+        self._data.truncate(HEADER.size + self.count * RECORD_SIZE)
+        self._data.seek(0, os.SEEK_END)
+        self._indexes = {}
+        for difficulty in DIFFICULTY_CODES:
+            index = open(_index_path(path, difficulty), 'ab')
+            _trim_index(index, self.count)
+            self._indexes[difficulty] = index
+
+    def append(self, difficulty, puzzle, solution):
+        """Adds one puzzle, returns its record number"""
+        self.extend([(difficulty, puzzle, solution)])
+        return self.count - 1
+
+    def extend(self, entries):
+        """Adds (difficulty, puzzle, solution) entries with one write per file"""
+        records = []
+        indexes = {}
+        for difficulty, puzzle, solution in entries:
+            records.append(pack_record(difficulty, puzzle, solution))
+            indexes.setdefault(difficulty, []).append(INDEX_ENTRY.pack(self.count))
+            self.count += 1
+        self._data.write(b"".join(records))
+        self._data.flush()
+        for difficulty, entries in indexes.items():
+            self._indexes[difficulty].write(b"".join(entries))
+            self._indexes[difficulty].flush()
+
+    def close(self):
+        self._data.close()
+        for index in self._indexes.values():
+            index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PuzzleStore:
+    """Read-only view of a store with O(1) access by record number or at random by difficulty
+
+    Records appended after opening are not seen; open the store again to pick them up.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            _check_header(f.read(HEADER.size), path)
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = (len(self._data) - HEADER.size) // RECORD_SIZE
+
+        self._indexes = {}
+        for difficulty in DIFFICULTY_CODES:
+            index_path = _index_path(path, difficulty)
+            if os.path.exists(index_path) and os.path.getsize(index_path) >= INDEX_ENTRY.size:
+                with open(index_path, 'rb') as f:
+                    index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._indexes[difficulty] = (index, self._indexed(index))
+
+    def _indexed(self, index):
+        """Index entries that point at records present when the store was opened"""
+        entries = len(index) // INDEX_ENTRY.size
+        # Entries are in record order, so trailing ones past the data are the only strays
+        while entries and INDEX_ENTRY.unpack_from(index, (entries - 1) * INDEX_ENTRY.size)[0] >= self.count:
+            entries -= 1
+        return entries
+
+    def __len__(self):
+        return self.count
+
+    def count_of(self, difficulty):
+        """Number of stored puzzles of a difficulty"""
+        return self._indexes[difficulty][1] if difficulty in self._indexes else 0
+
+    def get(self, record):
+        """(difficulty, puzzle, solution) of a record number"""
+        if not 0 <= record < self.count:
+            raise IndexError("record out of range")
+        start = HEADER.size + record * RECORD_SIZE
+        data = self._data[start:start + RECORD_SIZE]
+        return (DIFFICULTY_NAMES[data[0]],) + unpack_record(data)
+
+    def nth(self, difficulty, n):
+        """(puzzle, solution) of the nth stored puzzle of a difficulty"""
+        if not 0 <= n < self.count_of(difficulty):
+            raise IndexError("no puzzle %d for difficulty %r" % (n, difficulty))
+        index, _ = self._indexes[difficulty]
+        record, = INDEX_ENTRY.unpack_from(index, n * INDEX_ENTRY.size)
+        start = HEADER.size + record * RECORD_SIZE
+        return unpack_record(self._data[start:start + RECORD_SIZE])
+
+    def random(self, difficulty, rng=random):
+        """A random (puzzle, solution) pair of a difficulty"""
+        count = self.count_of(difficulty)
+        if not count:
+            raise LookupError("No stored puzzles for difficulty: %r" % (difficulty,))
+        return self.nth(difficulty, int(rng.random() * count))
+
+    def close(self):
+        self._data.close()
+        for index, _ in self._indexes.values():
+            index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _trim_index(index, count):
+    """Drops a torn last entry and entries for records that never made it to the data file"""
+    entries = index.tell() // INDEX_ENTRY.size
+    with open(index.name, 'rb') as f:
+        while entries:
+            f.seek((entries - 1) * INDEX_ENTRY.size)
+            if INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))[0] < count:
+                break
+            entries -= 1
+    index.truncate(entries * INDEX_ENTRY.size)
+    index.seek(0, os.SEEK_END)
+
+
+def _check_header(header, path):
+    if len(header) < HEADER.size:
+        raise ValueError("%s is not a puzzle store: too short" % path)
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("%s is not a puzzle store" % path)
+    if version != FORMAT_VERSION or record_size != RECORD_SIZE:
+        raise ValueError("%s is puzzle store format %d, this reads format %d" % (path, version, FORMAT_VERSION))
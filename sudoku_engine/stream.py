@@ -0,0 +1,139 @@
+"""Lazy puzzle streams and exporters that write them one record at a time
+
+stream_puzzles() yields PuzzleRecords only as fast as they are asked for.
+Inline, each record is generated when the consumer pulls it. Across a
+process pool at most `prefetch` chunks are in flight; another is
+submitted only when the consumer has taken one. A slow writer therefore
+slows generation down instead of piling records up in memory, and a
+stream of any length runs in constant memory:
+
+    with open("hard.jsonl", "w") as out:
+        write_jsonl(stream_puzzles("hard", 10 ** 6, workers=8), out)
+"""
+import collections
+import csv
+import itertools
+import json
+import multiprocessing
+import random
+
+from .formats import to_line
+from .generator import CELLS_TO_KEEP, generate
+from .puzzle_ids import SEED_BITS, make_puzzle_id
+from .transform import derive
+
+PuzzleRecord = collections.namedtuple("PuzzleRecord", "puzzle solution metadata")
+PuzzleRecord.__doc__ = """A puzzle, its solution (both Grids) and a dict of metadata
+
+The metadata holds the record's index in the stream, its difficulty,
+seed and clue count. It also holds the puzzle ID, or None for derived and
+larger-than-9x9 puzzles, which IDs cannot rebuild.
+"""
+
+CSV_FIELDS = ("puzzle", "solution", "index", "difficulty", "seed", "clues", "id")
+
+
+def _make_record(difficulty, index, seed, derived, backend, box_size):
+    if derived:
+        puzzle, solution = derive(difficulty, seed)
+    else:
+        puzzle, solution = generate(difficulty, seed, backend, box_size=box_size)
+    puzzle_id = make_puzzle_id(difficulty, seed) if not derived and box_size == 3 else None
+    return PuzzleRecord(puzzle, solution, {"index": index, "difficulty": difficulty, "seed": seed,
+                                           "clues": puzzle.count_filled(), "id": puzzle_id})
+
+
+def _make_chunk(task):
+    """Worker: the records for one chunk of (index, seed) pairs"""
+    difficulty, seeds, derived, backend, box_size = task
+    return [_make_record(difficulty, index, seed, derived, backend, box_size) for index, seed in seeds]
+
+
+def stream_puzzles(difficulty="medium", count=None, seed=None, workers=0, chunk_size=16, prefetch=None,
+                   derived=False, backend="bitboard", box_size=3):
+    """Yields PuzzleRecords on demand, `count` of them or without end
+
+    Each puzzle gets its own seed drawn from `seed`, so a seeded stream is
+    reproducible and every generated 9x9 record carries a puzzle ID. With
+    `workers` > 0 chunks of `chunk_size` records are made across a
+    process pool, at most `prefetch` chunks (twice the workers by
+    default) ahead of the consumer; records still come out in order.
+    `derived` transforms stored puzzles (see derive) instead of
+    generating, which is far faster but gives no IDs.
+    """
+    if difficulty not in CELLS_TO_KEEP:
+        raise ValueError("Unknown difficulty: %r" % (difficulty,))
+    rng = random.Random(seed) if seed is not None else random.SystemRandom()
+
+    def seeds():
+        index = 0
+        while count is None or index < count:
+            yield index, rng.getrandbits(SEED_BITS)
+            index += 1
+
+    if not workers:
+        for index, puzzle_seed in seeds():
+            yield _make_record(difficulty, index, puzzle_seed, derived, backend, box_size)
+        return
+
+    pending_seeds = seeds()
+
+    def next_task():
+        chunk = list(itertools.islice(pending_seeds, chunk_size))
+        return (difficulty, chunk, derived, backend, box_size) if chunk else None
+
+    with multiprocessing.Pool(workers) as pool:
+        in_flight = collections.deque()
+        for _ in range(prefetch or 2 * workers):
+            task = next_task()
+            if task is None:
+                break
+            in_flight.append(pool.apply_async(_make_chunk, (task,)))
+        while in_flight:
+            records = in_flight.popleft().get()
+            # Refill the window only now that a chunk has been taken
+            task = next_task()
+            if task is not None:
+                in_flight.append(pool.apply_async(_make_chunk, (task,)))
+            yield from records
+
+
+def write_lines(records, out, solutions=False):
+    """Writes each puzzle as an 81-character line, followed by its solution if `solutions`
+
+    Returns the number of records written.
+    """
+    written = 0
+    for puzzle, solution, _ in records:
+        out.write("%s %s\n" % (to_line(puzzle), to_line(solution)) if solutions else to_line(puzzle) + "\n")
+        written += 1
+    return written
+
+
+def write_jsonl(records, out):
+    """Writes one JSON object per line: puzzle and solution lines plus the metadata"""
+    written = 0
+    for puzzle, solution, metadata in records:
+        out.write(json.dumps(dict(puzzle=to_line(puzzle), solution=to_line(solution), **metadata)) + "\n")
+        written += 1
+    return written
+
+
+def write_csv(records, out):
+    """Writes a header and then one row per record, columns as in CSV_FIELDS"""
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    written = 0
+    for puzzle, solution, metadata in records:
+        writer.writerow((to_line(puzzle), to_line(solution), metadata["index"], metadata["difficulty"],
+                         metadata["seed"], metadata["clues"], metadata["id"] or ""))
+        written += 1
+    return written
+
+
+# Streaming exporters by format name
+EXPORTERS = {
+    "line": write_lines,
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+}
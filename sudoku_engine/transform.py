@@ -0,0 +1,98 @@
+"""Puzzle derivation through Sudoku's symmetries: new puzzles from stored seeds with no search
+
+Relabelling the digits, shuffling the bands and the rows within each band,
+doing the same for stacks and columns, and transposing all map a valid grid
+to a valid grid. Applied to a puzzle and its solution together they keep
+the solution unique and the techniques needed the same, so a derived
+puzzle is as good as the seed it came from and costs one pass over 81 cells.
+
+The seeds live in seeds.txt, one "<difficulty> <puzzle> <solution>" per line.
+write_seeds() rebuilds it with generate().
+"""
+import os
+import random
+from itertools import permutations
+from operator import itemgetter
+
+from .formats import from_line
+from .generator import CELLS_TO_KEEP, generate
+from .grid import Grid
+
+SEEDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seeds.txt')
+
+_seeds = None  # The default seed file, loaded on first use
+
+# The 6 orders of 3 things, picked from with one rng.random() call instead of rng.sample()
+ORDERS_OF_3 = list(permutations(range(3)))
+
+
+def _line_order(rng):
+    """A random order of 9 rows or columns: the bands shuffled, and the rows within each band"""
+    draw = rng.random
+    order = []
+    for band in ORDERS_OF_3[int(draw() * 6)]:
+        order.extend(3 * band + k for k in ORDERS_OF_3[int(draw() * 6)])
+    return order
+
+
+def random_transform(rng=random):
+    """A random symmetry as (pick, relabel)
+
+    pick(cells) returns the 81 cell values in their new order and relabel is
+    a bytes.translate table for the digits, 0 staying 0.
+    """
+    rows = _line_order(rng)
+    cols = _line_order(rng)
+    if rng.random() < 0.5:
+        order = [row * 9 + col for row in rows for col in cols]
+    else:
+        order = [row * 9 + col for col in cols for row in rows]
+    digits = list(range(1, 10))
+    rng.shuffle(digits)
+    relabel = bytes([0] + digits) + bytes(246)
+    return itemgetter(*order), relabel
+
+
+def apply_transform(board, transform):
+    """The board with a transform from random_transform applied, as a Grid"""
+    pick, relabel = transform
+    return Grid(bytes(pick(Grid.coerce(board).cells)).translate(relabel))
+
+
+def load_seeds(path=SEEDS_PATH):
+    """Reads a seed file into {difficulty: [(puzzle, solution), ...]}"""
+    seeds = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                difficulty, puzzle, solution = line.split()
+                seeds.setdefault(difficulty, []).append((from_line(puzzle), from_line(solution)))
+    return seeds
+
+
+def write_seeds(path=SEEDS_PATH, per_difficulty=16, seed=0):
+    """Generates a fresh seed file with per_difficulty puzzles for every difficulty"""
+    with open(path, 'w') as f:
+        for difficulty in CELLS_TO_KEEP:
+            for k in range(per_difficulty):
+                puzzle, solution = generate(difficulty, "%s/%s/%d" % (seed, difficulty, k))
+                f.write("%s %s %s\n" % (difficulty, puzzle.to_line(), solution.to_line()))
+
+
+def derive(difficulty="medium", seed=None, seeds=None):
+    """Returns a (puzzle, solution) pair of Grids derived from a random seed puzzle
+
+    `seeds` is a dict as returned by load_seeds, the bundled seed file by default.
+    """
+    global _seeds
+    if seeds is None:
+        if _seeds is None:
+            _seeds = load_seeds()
+        seeds = _seeds
+    if difficulty not in seeds:
+        raise ValueError("No seed puzzles for difficulty: %r" % (difficulty,))
+
+    rng = random.Random(seed)
+    puzzle, solution = rng.choice(seeds[difficulty])
+    transform = random_transform(rng)
+    return apply_transform(puzzle, transform), apply_transform(solution, transform)
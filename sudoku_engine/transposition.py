@@ -0,0 +1,86 @@
+"""Zobrist hashing and a bounded LRU cache of search outcomes
+
+A board state hashes to the XOR of one random 64-bit key per (cell,
+digit) placed, so placing or taking back a digit updates the hash with a
+single XOR. The propagating solver hashes its state after singles
+propagation, which two different boards often share, e.g. a puzzle and
+the same puzzle with one clue removed that singles put straight back.
+
+TranspositionCache maps those hashes to solution counts. While digging,
+"no solution" and "exactly one solution" results then carry over from
+one uniqueness check to the next. Two states sharing a 64-bit hash are
+taken to be the same; with a million entries the odds of a collision
+are around one in ten million million.
+"""
+import collections
+import functools
+import random
+
+# Approximate bytes one cache entry costs: the int key, and the OrderedDict's
+# hash table slot and linked-list node
+ENTRY_BYTES = 150
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_keys(box_size=3):
+    """Per cell, a tuple of random 64-bit keys indexed by digit (index 0 unused)"""
+    size = box_size * box_size
+    rng = random.Random("zobrist/%d" % box_size)
+    return tuple(tuple(rng.getrandbits(64) for _ in range(size + 1)) for _ in range(size * size))
+
+
+class TranspositionCache:
+    """Solution counts by state hash, least recently used evicted first, capped in entries and bytes
+
+    Values are the count itself when the search was exhaustive (0 for no
+    solution, 1 for exactly one) or minus the count when it stopped at
+    its limit, which only proves that many solutions at least.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=64 << 20):
+        limits = [limit for limit in (max_entries, max_bytes and max_bytes // ENTRY_BYTES) if limit]
+        self.max_entries = min(limits) if limits else None
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key, limit):
+        """The count a search with `limit` would return from this state, or None if unknown"""
+        value = self._entries.get(key)
+        if value is not None:
+            if value >= 0:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return min(value, limit)
+            if -value >= limit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return limit
+        self.misses += 1
+        return None
+
+    def store(self, key, found, limit):
+        """Records what a search with `limit` found from this state"""
+        entries = self._entries
+        entries[key] = found if found < limit else -found
+        entries.move_to_end(key)
+        if self.max_entries is not None and len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self):
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hit_rate,
+                "approx_bytes": len(self._entries) * ENTRY_BYTES}
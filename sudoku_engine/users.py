@@ -0,0 +1,217 @@
+"""SQLite-backed player accounts with salted PBKDF2 password hashes
+
+Hashes are stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>", so the
+work factor can be raised at any time: old hashes still verify, and are
+rehashed at the new cost the next time their owner logs in. Pick the
+cost with benchmarks/bench_users, which times a login at several costs
+against an expected login peak.
+
+Bulk imports validate and hash accounts across a process pool, then
+insert them in one transaction:
+
+    python -m sudoku_engine.users import accounts.csv --db users.db --workers 8
+"""
+import argparse
+import base64
+import collections
+import csv
+import hashlib
+import hmac
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import time
+
+ALGORITHM = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = 600_000  # OWASP's 2023 figure for PBKDF2-HMAC-SHA256
+SALT_BYTES = 16
+
+USERNAME_PATTERN = re.compile(r'[a-zA-Z][a-zA-Z0-9_]{3,19}')
+# Each must match somewhere in a password
+PASSWORD_PATTERNS = tuple(re.compile(pattern) for pattern in (r'[A-Z]', r'[a-z]', r'\d', r'[!@#$%^&*]'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users (username);
+"""
+
+ImportResult = collections.namedtuple("ImportResult", "imported duplicates invalid")
+ImportResult.__doc__ = """Outcome of import_users: counts, and (username, reason) pairs for rejected rows"""
+
+
+def validate_username(username):
+    """4-20 letters, digits or underscores, starting with a letter"""
+    return USERNAME_PATTERN.fullmatch(username) is not None
+
+
+def validate_password(password):
+    """8-30 characters with an upper and lower case letter, a digit and one of !@#$%^&*"""
+    return 8 <= len(password) <= 30 and all(pattern.search(password) for pattern in PASSWORD_PATTERNS)
+
+
+def hash_password(password, iterations=DEFAULT_ITERATIONS, salt=None):
+    """The encoded hash of a password, under a fresh random salt unless one is given"""
+    salt = salt or os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "%s$%d$%s$%s" % (ALGORITHM, iterations, _b64(salt), _b64(digest))
+
+
+def check_password(password, encoded):
+    """Whether a password matches an encoded hash, compared in constant time"""
+    try:
+        algorithm, iterations, salt, digest = encoded.split("$")
+        iterations = int(iterations)
+        salt, digest = _unb64(salt), _unb64(digest)
+    except ValueError:  # binascii.Error from a corrupt salt or digest is a ValueError too
+        return False
+    if algorithm != ALGORITHM or iterations < 1:
+        return False
+    expected = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return hmac.compare_digest(expected, digest)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _hash_account(task):
+    """Worker: (username, password, iterations) -> (username, encoded hash or None, reason)"""
+    username, password, iterations = task
+    if not validate_username(username):
+        return username, None, "invalid username"
+    if not validate_password(password):
+        return username, None, "invalid password"
+    return username, hash_password(password, iterations), None
+
+
+class UserStore:
+    """Accounts in a SQLite database, looked up through a unique index on username"""
+
+    def __init__(self, path, iterations=DEFAULT_ITERATIONS):
+        self.path = path
+        self.iterations = iterations
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+        # Checked when a username is unknown, so a miss costs as long as a wrong password
+        self._dummy_hash = "%s$%d$%s$%s" % (ALGORITHM, iterations, _b64(bytes(SALT_BYTES)), _b64(bytes(32)))
+
+    def add_user(self, username, password):
+        """Creates an account; raises ValueError for a rule-breaking or taken username or password"""
+        if not validate_username(username):
+            raise ValueError("Username does not meet requirements")
+        if not validate_password(password):
+            raise ValueError("Password does not meet requirements")
+        try:
+            with self._db:
+                self._db.execute("INSERT INTO users (username, password_hash, created) VALUES (?, ?, ?)",
+                                 (username, hash_password(password, self.iterations), time.time()))
+        except sqlite3.IntegrityError:
+            raise ValueError("Username is already taken") from None
+
+    def verify(self, username, password):
+        """Whether the credentials match an account; rehashes at the current cost on success"""
+        row = self._db.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            check_password(password, self._dummy_hash)
+            return False
+        encoded, = row
+        if not check_password(password, encoded):
+            return False
+        if int(encoded.split("$")[1]) != self.iterations:
+            with self._db:
+                self._db.execute("UPDATE users SET password_hash = ? WHERE username = ?",
+                                 (hash_password(password, self.iterations), username))
+        return True
+
+    def exists(self, username):
+        return self._db.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def import_users(self, accounts, workers=None, chunk_size=64, iterations=None):
+        """Validates and hashes (username, password) pairs across a process pool, then inserts them
+
+        Rows that break the rules come back in ImportResult.invalid; usernames
+        already taken, in the store or earlier in `accounts`, are counted as
+        duplicates. `iterations` overrides the store's cost for this import.
+        """
+        iterations = iterations or self.iterations
+        tasks = [(username, password, iterations) for username, password in accounts]
+        invalid = []
+        rows = []
+        created = time.time()
+        with multiprocessing.Pool(workers) as pool:
+            for username, encoded, reason in pool.imap(_hash_account, tasks, chunk_size):
+                if encoded is None:
+                    invalid.append((username, reason))
+                else:
+                    rows.append((username, encoded, created))
+        with self._db:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO users (username, password_hash, created) VALUES (?, ?, ?)",
+                                 rows)
+            imported = self._db.total_changes - before
+        return ImportResult(imported, len(rows) - imported, invalid)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def default_path():
+    """SUDOKU_USERS if set, otherwise users.db in the home directory's .sudoku folder"""
+    path = os.environ.get('SUDOKU_USERS')
+    if path:
+        return path
+    folder = os.path.join(os.path.expanduser("~"), ".sudoku")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, "users.db")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sudoku_engine.users", description="Manage player accounts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="import a CSV of username,password rows")
+    importer.add_argument('csv', help="CSV file, '-' for stdin")
+    importer.add_argument('--db', default=None, help="database path (default: SUDOKU_USERS or ~/.sudoku/users.db)")
+    importer.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    importer.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="PBKDF2 work factor")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.csv == '-' else open(args.csv, newline='')
+    try:
+        accounts = [(row[0], row[1]) for row in csv.reader(source) if len(row) >= 2]
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    start = time.perf_counter()
+    with UserStore(args.db or default_path(), args.iterations) as store:
+        result = store.import_users(accounts, args.workers)
+    seconds = time.perf_counter() - start
+    for username, reason in result.invalid:
+        sys.stderr.write("skipped %s: %s\n" % (username, reason))
+    sys.stderr.write("%d imported, %d duplicates, %d invalid in %.2f s\n" % (
+        result.imported, result.duplicates, len(result.invalid), seconds))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Validation of completed grids, one at a time or as a NumPy batch
+
+A grid of side n is valid when every cell holds 1-n and no digit repeats
+in a row, column or box. The reported conflict is the first offending
+cell in row-major order.
+"""
+from .grid import BOX_SIZES
+
+np = None  # NumPy, imported on first use so the engine starts without it
+
+DIGITS = set(range(1, 10))
+
+# Grids handled per vectorised pass, bounds the size of the temporaries
+BATCH_CHUNK = 1 << 12
+
+
+def validate_grid(board):
+    """Returns (valid, conflict) for one grid; conflict is (row, col) or None"""
+    size = len(board)
+    box = BOX_SIZES[size * size]
+    digits = DIGITS if size == 9 else set(range(1, size + 1))
+    units = _units(board, box)
+    if all(set(unit) == digits for unit in units):
+        return True, None
+
+    rows, cols, boxes = units[:size], units[size:2 * size], units[2 * size:]
+    for i in range(size):
+        for j in range(size):
+            num = board[i][j]
+            if (not 1 <= num <= size or rows[i].count(num) > 1 or cols[j].count(num) > 1
+                    or boxes[box * (i // box) + j // box].count(num) > 1):
+                return False, (i, j)
+    return False, None
+
+
+def _units(board, box=3):
+    """The rows, columns and boxes of a board as lists"""
+    size = box * box
+    rows = [list(row) for row in board]
+    cols = [list(col) for col in zip(*board)]
+    boxes = [[board[box * (k // box) + n // box][box * (k % box) + n % box] for n in range(size)]
+             for k in range(size)]
+    return rows + cols + boxes
+
+
+def validate_batch(grids):
+    """Validates an (N, n, n) array of grids with vectorised checks, n being 4, 9, 16 or 25
+
+    Returns (valid, conflicts): a boolean array of shape (N,) and an int
+    array of shape (N, 2) with the first conflicting (row, col) of each
+    grid, or (-1, -1) for valid grids.
+    """
+    global np
+    if np is None:
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("validate_batch requires NumPy (pip install numpy)") from None
+    grids = np.asarray(grids, dtype=np.uint8)
+    if grids.ndim != 3 or grids.shape[1] != grids.shape[2] or grids.shape[1] ** 2 not in BOX_SIZES:
+        raise ValueError("Expected an (N, n, n) array with n in 4, 9, 16 or 25, got shape %s" % (grids.shape,))
+
+    count = len(grids)
+    valid = np.empty(count, dtype=bool)
+    conflicts = np.empty((count, 2), dtype=np.intp)
+    for start in range(0, count, BATCH_CHUNK):
+        stop = start + BATCH_CHUNK
+        valid[start:stop], conflicts[start:stop] = _validate_chunk(grids[start:stop])
+    return valid, conflicts
+
+
+def _validate_chunk(grids):
+    count, size = grids.shape[:2]
+    box = BOX_SIZES[size * size]
+    # One bit per digit, 0 for anything outside 1-n
+    in_range = (grids >= 1) & (grids <= size)
+    dtype = np.uint16 if size < 16 else np.uint32
+    bits = np.where(in_range, np.left_shift(1, grids, dtype=dtype), 0).astype(dtype)
+
+    # Digit bits seen at least twice in each unit. The position within the unit
+    # is moved to the front so every step works on a contiguous slice
+    row_repeats = _repeats(bits.transpose(2, 0, 1))  # (N, row)
+    col_repeats = _repeats(bits.transpose(1, 0, 2))  # (N, col)
+    by_box = bits.reshape(count, box, box, box, box)  # (N, band, row in band, stack, col in stack)
+    box_repeats = _repeats(by_box.transpose(2, 4, 0, 1, 3).reshape(size, count, box, box))  # (N, band, stack)
+
+    # Spread each unit's repeats back over its cells and flag cells holding one
+    repeats = row_repeats[:, :, None] | col_repeats[:, None, :]
+    repeats |= np.repeat(np.repeat(box_repeats, box, axis=1), box, axis=2)
+    bad = ((bits & repeats) != 0) | ~in_range
+
+    bad = bad.reshape(count, size * size)
+    valid = ~bad.any(axis=1)
+    first = bad.argmax(axis=1)
+    conflicts = np.stack((first // size, first % size), axis=1)
+    conflicts[valid] = -1
+    return valid, conflicts
+
+
+def _repeats(cells):
+    """OR of the digit bits that occur more than once along the first axis"""
+    cells = np.ascontiguousarray(cells)
+    once = np.zeros_like(cells[0])
+    twice = np.zeros_like(cells[0])
+    for cell in cells:
+        twice |= once & cell
+        once |= cell
+    return twice
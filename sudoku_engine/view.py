@@ -0,0 +1,76 @@
+"""What each cell of a board should show, and the least that must change to show it
+
+BoardView derives a (text, fg, bg) triple per cell from a BoardModel plus
+the view's own marks (hinted cells, highlighted backgrounds). It remembers
+what the widgets were last told, so a render only touches cells whose
+triple changed. Applying the changes is up to the caller, which keeps
+this module free of tkinter.
+"""
+from .formats import cell_char
+
+GIVEN_FG = 'black'
+PLAYER_FG = 'blue'  # Also the colour of empty cells, so a typed digit starts out right
+CONFLICT_FG = 'red'
+HINT_FG = 'green'
+BOX_BGS = ('#FCF3CF', '#FFFFFF')  # Light yellow and white, alternating by box
+
+
+class BoardView:
+    """Desired cell states for a BoardModel, diffed against the last render"""
+
+    def __init__(self, model):
+        self.model = model
+        self.hinted = set()  # (row, col) of cells filled in by a hint
+        self.highlights = {}  # (row, col) -> background overriding the box colour
+        self.rendered = {}  # (row, col) -> (text, fg, bg) the widgets show
+        self.synced()
+
+    def cell(self, row, col):
+        """The (text, fg, bg) a cell should show"""
+        model = self.model
+        pos = (row, col)
+        num = model.get(row, col)
+        if pos in model.givens:
+            fg = GIVEN_FG
+        elif num and pos in model.conflicts:
+            fg = CONFLICT_FG
+        elif pos in self.hinted:
+            fg = HINT_FG
+        else:
+            fg = PLAYER_FG
+        bg = self.highlights.get(pos)
+        if bg is None:
+            box = model.box_size
+            bg = BOX_BGS[(row // box + col // box) % 2]
+        return cell_char(num), fg, bg
+
+    def synced(self):
+        """Records that the widgets show exactly the desired states, e.g. right after creating them"""
+        size = self.model.size
+        self.rendered = {(row, col): self.cell(row, col) for row in range(size) for col in range(size)}
+
+    def typed(self, row, col, text):
+        """Records text the player typed into a cell, which the widget already shows"""
+        _, fg, bg = self.rendered[(row, col)]
+        self.rendered[(row, col)] = (text, fg, bg)
+
+    def clear_marks(self):
+        self.hinted.clear()
+        self.highlights.clear()
+
+    def changes(self, positions=None):
+        """The cells whose state changed, as (pos, old, new) states, marked as rendered
+
+        `positions` limits the diff to cells known to be affected, such as
+        those BoardModel.set returns.
+        """
+        rendered = self.rendered
+        cell = self.cell
+        changes = []
+        for pos in rendered if positions is None else positions:
+            old = rendered[pos]
+            new = cell(*pos)
+            if new != old:
+                changes.append((pos, old, new))
+                rendered[pos] = new
+        return changes